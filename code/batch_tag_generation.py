@@ -0,0 +1,304 @@
+"""
+Batch corpus mode for the tag generation pipeline.
+
+Builds the tag generation graph once (LLM clients, spaCy model and gazetteer are
+loaded a single time), streams documents from a directory or a JSONL file, and runs
+them concurrently with a bounded number of workers. One JSON record per document is
+appended to the output JSONL file as soon as that document finishes.
+
+The output file doubles as the checkpoint: on restart, documents that already have a
+successful record are skipped, so a crashed run picks up where it stopped.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from consts import (
+    LLM_TAGS,
+    SPACY_TAGS,
+    GAZETTEER_TAGS,
+    CANDIDATE_TAGS,
+    SELECTED_TAGS,
+)
+from graphs.tag_generation_graph import get_tag_generation_graph
+from llm import get_llm_cache
+from llm_cache import format_cache_stats
+from spacy_ner import extract_entities_or_errors
+from states.tag_generation_state import initialize_tag_generation_state_from_config
+from token_usage import TokenUsageTracker
+from utils import load_config
+
+DOCUMENT_FILE_EXTENSIONS = (".md", ".txt")
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def iter_documents(
+    source: str, text_field: str = "text", id_field: str = "id"
+) -> Iterator[Tuple[str, str]]:
+    """
+    Streams `(doc_id, text)` pairs from a directory or a JSONL file.
+
+    Args:
+        source: A directory of `.md`/`.txt` files, or a `.jsonl` file with one document per line.
+        text_field: Field holding the document text in JSONL records.
+        id_field: Field holding the document id in JSONL records. Falls back to the line number.
+
+    Yields:
+        Tuple[str, str]: The document id and its text.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for file_name in sorted(files):
+                if not file_name.lower().endswith(DOCUMENT_FILE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, file_name)
+                with open(path, "r", encoding="utf-8") as f:
+                    yield os.path.relpath(path, source), f.read()
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Skipping malformed JSONL line {line_number}: {e}")
+                continue
+            text = record.get(text_field)
+            if not text:
+                print(f"⚠️ Skipping line {line_number}: missing '{text_field}' field")
+                continue
+            yield str(record.get(id_field, line_number)), text
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """Returns the ids of documents that already have a successful record in the sink."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from a crashed run.
+                continue
+            if record.get("status") == STATUS_OK:
+                completed.add(str(record["id"]))
+    return completed
+
+
+class JsonlSink:
+    """Thread-safe, append-only JSONL writer that makes each record durable on write."""
+
+    def __init__(self, output_path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(output_path, "a+", encoding="utf-8")
+        # Terminate a torn last line left behind by a crash before appending to it.
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _iter_groups(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yields consecutive groups of at most `size` items."""
+    group = []
+    for item in items:
+        group.append(item)
+        if len(group) >= size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+
+def _error_record(doc_id: str, error: Exception, start: float) -> Dict[str, Any]:
+    return {
+        "id": doc_id,
+        "status": STATUS_ERROR,
+        "error": f"{type(error).__name__}: {error}",
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def _tag_document(
+    graph,
+    doc_id: str,
+    text: str,
+    tag_generation_config: Dict[str, Any],
+    spacy_tags: List[Dict[str, str]],
+    token_usage: TokenUsageTracker,
+) -> Dict[str, Any]:
+    """Runs one document through the compiled graph and returns its result record."""
+    start = time.perf_counter()
+    try:
+        initial_state = initialize_tag_generation_state_from_config(
+            text, tag_generation_config, precomputed_spacy_tags=spacy_tags
+        )
+        final_state = graph.invoke(initial_state, config={"callbacks": [token_usage]})
+    except Exception as e:
+        return _error_record(doc_id, e, start)
+    return {
+        "id": doc_id,
+        "status": STATUS_OK,
+        SELECTED_TAGS: final_state.get(SELECTED_TAGS, []),
+        CANDIDATE_TAGS: final_state.get(CANDIDATE_TAGS, []),
+        LLM_TAGS: final_state.get(LLM_TAGS, []),
+        SPACY_TAGS: final_state.get(SPACY_TAGS, []),
+        GAZETTEER_TAGS: final_state.get(GAZETTEER_TAGS, []),
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def run_tag_generation_batch(
+    source: str,
+    output_path: str,
+    max_workers: Optional[int] = None,
+    tag_generation_config: Optional[Dict[str, Any]] = None,
+    resume: bool = True,
+) -> Dict[str, int]:
+    """
+    Tags every document in `source` and appends one result record per document to `output_path`.
+
+    Args:
+        source: A directory of documents or a JSONL file (see `iter_documents`).
+        output_path: The JSONL sink. Also used as the checkpoint when `resume` is True.
+        max_workers: Maximum number of documents processed concurrently.
+            Defaults to `batch.max_workers` from the config.
+        tag_generation_config: The `tags_generation` config section. Loaded from config.yaml if None.
+        resume: Skip documents that already have a successful record in `output_path`.
+
+    Returns:
+        Dict[str, int]: Counts of processed, failed and skipped documents.
+    """
+    config = tag_generation_config or load_config()["tags_generation"]
+    batch_config = config.get("batch", {})
+    max_workers = max_workers or batch_config.get("max_workers", 4)
+
+    completed = load_completed_ids(output_path) if resume else set()
+    if completed:
+        print(f"⏩ Resuming: {len(completed)} documents already tagged")
+
+    # Build the graph once and share it across all workers.
+    graph = get_tag_generation_graph(config)
+
+    # spaCy runs in the main thread over groups of documents with `nlp.pipe`, and the
+    # entities are handed to the graph so its spaCy node does not re-run the model.
+    spacy_config = config.get("spacy_ner", {})
+    spacy_batch_docs = batch_config.get("spacy_batch_docs", 16)
+
+    summary = {"processed": 0, "failed": 0, "skipped": 0}
+    token_usage = TokenUsageTracker()
+
+    def pending_documents() -> Iterator[Tuple[str, str]]:
+        for doc_id, text in iter_documents(
+            source,
+            text_field=batch_config.get("text_field", "text"),
+            id_field=batch_config.get("id_field", "id"),
+        ):
+            if doc_id in completed:
+                summary["skipped"] += 1
+                continue
+            yield doc_id, text
+
+    def handle(future: Future) -> None:
+        write(future.result())
+
+    def write(record: Dict[str, Any]) -> None:
+        sink.write(record)
+        if record["status"] == STATUS_OK:
+            summary["processed"] += 1
+            print(f"✅ {record['id']} ({record['elapsed_seconds']}s)")
+        else:
+            summary["failed"] += 1
+            print(f"❌ {record['id']}: {record['error']}")
+
+    # Documents are streamed rather than read into memory all at once: at most
+    # `max_workers` run while as many more wait in the executor's queue, so a worker
+    # that finishes can start the next document without waiting for the main thread.
+    max_in_flight = 2 * max_workers
+
+    with JsonlSink(output_path) as sink, ThreadPoolExecutor(max_workers) as executor:
+        in_flight: Set[Future] = set()
+        for group in _iter_groups(pending_documents(), spacy_batch_docs):
+            spacy_start = time.perf_counter()
+            group_spacy_tags = extract_entities_or_errors(
+                [text for _, text in group], spacy_config
+            )
+            for (doc_id, text), spacy_tags in zip(group, group_spacy_tags):
+                if isinstance(spacy_tags, Exception):
+                    write(_error_record(doc_id, spacy_tags, spacy_start))
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(future)
+                in_flight.add(
+                    executor.submit(
+                        _tag_document,
+                        graph,
+                        doc_id,
+                        text,
+                        config,
+                        spacy_tags,
+                        token_usage,
+                    )
+                )
+        for future in wait(in_flight).done:
+            handle(future)
+
+    print(
+        f"🏁 Batch finished: {summary['processed']} tagged, "
+        f"{summary['failed']} failed, {summary['skipped']} skipped"
+    )
+    print(format_cache_stats(get_llm_cache()))
+    print(token_usage.format_report())
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tag a corpus of publications.")
+    parser.add_argument("source", help="Directory of .md/.txt files or a .jsonl file")
+    parser.add_argument("output", help="Output JSONL file (also the resume checkpoint)")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Re-tag documents that already have a record in the output file",
+    )
+    args = parser.parse_args()
+
+    run_tag_generation_batch(
+        source=args.source,
+        output_path=args.output,
+        max_workers=args.max_workers,
+        resume=not args.no_resume,
+    )
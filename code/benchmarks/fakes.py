@@ -0,0 +1,242 @@
+"""
+Deterministic stand-ins for the chat models and the search backend.
+
+`FakeChatModel` answers every prompt with text derived from a hash of the prompt, after
+a simulated latency, and reports simulated token usage. Its `with_structured_output`
+supports the schemas used by the graphs (`Entities`, `SearchQueries`, `References` and
+`ReviewOutput`). `FakeSearchBackend` does the same for web search. The same inputs
+always produce the same outputs, so benchmark runs are comparable.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from llm import register_llm
+from nodes.output_types import (
+    Entities,
+    Entity,
+    Reference,
+    References,
+    ReviewOutput,
+    SearchQueries,
+)
+from search import SearchBackend, register_search_backend
+
+FAKE_SEARCH_BACKEND = "fake"
+
+# (name, type) pairs the fake model draws its tags from.
+FAKE_VOCABULARY = [
+    ("transformer", "algorithm"),
+    ("random forest", "algorithm"),
+    ("k-means", "algorithm"),
+    ("gradient boosting", "algorithm"),
+    ("retrieval-augmented generation", "algorithm"),
+    ("langgraph", "tool-or-framework"),
+    ("langchain", "tool-or-framework"),
+    ("pytorch", "tool-or-framework"),
+    ("hugging face", "tool-or-framework"),
+    ("spacy", "tool-or-framework"),
+    ("mnist", "dataset"),
+    ("imagenet", "dataset"),
+    ("c4", "dataset"),
+    ("text classification", "task"),
+    ("named entity recognition", "task"),
+    ("summarization", "task"),
+    ("image generation", "task"),
+    ("healthcare", "industry"),
+    ("finance", "industry"),
+    ("education", "industry"),
+    ("fraud detection", "use-case"),
+    ("personalized tutoring", "use-case"),
+    ("sentiment analysis", "use-case"),
+    ("document tagging", "use-case"),
+]
+FILLER_WORDS = (
+    "agent model graph state node review title summary reference search tag "
+    "publication prompt token latency system workflow output input feedback"
+).split()
+
+
+def _seed(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _filler(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(n_words))
+
+
+def fake_structured_output(
+    schema: Type[BaseModel], seed: str, approval_rate: float = 0.7
+) -> BaseModel:
+    """
+    Returns a deterministic instance of `schema` derived from `seed`.
+
+    Args:
+        schema: One of `Entities`, `SearchQueries`, `References` or `ReviewOutput`.
+        seed: Any string; equal seeds give equal outputs.
+        approval_rate: Probability that the reviewer approves each component.
+
+    Raises:
+        ValueError: If the schema is not supported.
+    """
+    rng = random.Random(seed)
+    if schema is Entities:
+        picks = rng.sample(FAKE_VOCABULARY, rng.randint(4, 10))
+        return Entities(entities=[Entity(name=name, type=type_) for name, type_ in picks])
+    if schema is SearchQueries:
+        picks = rng.sample(FAKE_VOCABULARY, 3)
+        return SearchQueries(queries=[f"{name} {type_} overview" for name, type_ in picks])
+    if schema is References:
+        references = []
+        for name, _ in rng.sample(FAKE_VOCABULARY, rng.randint(3, 5)):
+            slug = name.replace(" ", "-")
+            references.append(
+                Reference(
+                    url=f"https://example.com/{slug}",
+                    title=f"An introduction to {name}",
+                    page_content=_filler(rng, 60),
+                )
+            )
+        return References(references=references)
+    if schema is ReviewOutput:
+        verdicts = [rng.random() < approval_rate for _ in range(3)]
+        return ReviewOutput(
+            tldr_approved=verdicts[0],
+            tldr_feedback="" if verdicts[0] else "Make the TL;DR more specific.",
+            title_approved=verdicts[1],
+            title_feedback="" if verdicts[1] else "Make the title shorter.",
+            references_approved=verdicts[2],
+            references_feedback="" if verdicts[2] else "Find more relevant references.",
+        )
+    raise ValueError(f"FakeChatModel does not support structured output for {schema}")
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model with simulated latency and token usage.
+
+    Attributes:
+        latency_seconds: Simulated time per call.
+        jitter_seconds: Extra latency of up to this much, derived from the prompt hash.
+        output_tokens: Number of words (counted as tokens) in each response.
+        chars_per_token: Used to estimate input tokens from the prompt length.
+        approval_rate: Probability that a `ReviewOutput` approves each component.
+    """
+
+    latency_seconds: float = 0.05
+    jitter_seconds: float = 0.0
+    output_tokens: int = 150
+    chars_per_token: int = 4
+    approval_rate: float = 0.7
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _respond(self, messages: List[BaseMessage]) -> tuple:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = _seed(prompt)
+        rng = random.Random(seed)
+        delay = self.latency_seconds + rng.random() * self.jitter_seconds
+        input_tokens = max(1, len(prompt) // self.chars_per_token)
+        message = AIMessage(
+            content=f"[{seed[:12]}] {_filler(rng, self.output_tokens)}",
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": input_tokens + self.output_tokens,
+                "input_token_details": {"cache_read": 0},
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)]), delay
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        result, delay = self._respond(messages)
+        time.sleep(delay)
+        return result
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        result, delay = self._respond(messages)
+        await asyncio.sleep(delay)
+        return result
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any) -> Runnable:
+        def parse(message: AIMessage) -> BaseModel:
+            return fake_structured_output(schema, message.content, self.approval_rate)
+
+        return self | RunnableLambda(parse)
+
+
+class FakeSearchBackend(SearchBackend):
+    """Search backend returning deterministic results after a simulated latency.
+
+    Args:
+        latency_seconds: Simulated time per query.
+        results_per_query: Number of results returned per query.
+        content_words: Length of each result's content, in words.
+    """
+
+    name = FAKE_SEARCH_BACKEND
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.1,
+        results_per_query: int = 3,
+        content_words: int = 300,
+    ):
+        self.latency_seconds = latency_seconds
+        self.results_per_query = results_per_query
+        self.content_words = content_words
+
+    def _results(self, query: str) -> List[Dict[str, Any]]:
+        rng = random.Random(_seed(query))
+        return [
+            {
+                "url": f"https://example.com/search/{_seed(query)[:8]}/{i}",
+                "title": f"Result {i} for {query}",
+                "content": _filler(rng, self.content_words),
+            }
+            for i in range(self.results_per_query)
+        ]
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        time.sleep(self.latency_seconds)
+        return self._results(query)
+
+    async def asearch(self, query: str) -> List[Dict[str, Any]]:
+        await asyncio.sleep(self.latency_seconds)
+        return self._results(query)
+
+
+def install_fakes(
+    model_names: Iterable[str],
+    llm_settings: Optional[Dict[str, Any]] = None,
+    search_settings: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Routes `get_llm` for `model_names` to `FakeChatModel` and registers the fake search backend.
+
+    Args:
+        model_names: Model names used in the config (e.g. "gpt-4o-mini").
+        llm_settings: Keyword arguments for `FakeChatModel`.
+        search_settings: Keyword arguments for `FakeSearchBackend`.
+    """
+    llm_settings = llm_settings or {}
+    search_settings = search_settings or {}
+    for model_name in set(model_names):
+        register_llm(model_name, lambda temperature: FakeChatModel(**llm_settings))
+    register_search_backend(
+        FAKE_SEARCH_BACKEND, lambda search_config: FakeSearchBackend(**search_settings)
+    )
@@ -0,0 +1,105 @@
+"""
+Local stand-in for the GitHub REST API endpoints used by the MCP server.
+
+`GitHubStubServer` serves `GET /repos/{owner}/{repo}/readme` and `GET /users/{owner}`
+with deterministic content (READMEs of `readme_chars` characters), ETags and
+`304 Not Modified` answers to conditional requests, after a simulated latency.
+Repositories and owners whose name starts with `missing` return 404. Point the
+server at it with `GITHUB_API_URL` or `--github-base-url`.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+class GitHubStubServer:
+    """Threaded HTTP server answering like the GitHub REST API, with request counters.
+
+    Args:
+        latency_seconds: Delay before every response.
+        readme_chars: Length of every README.
+        host: Interface to bind.
+        port: Port to bind; 0 picks a free port.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.05,
+        readme_chars: int = 4000,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.readme_chars = readme_chars
+        self.counts = {"200": 0, "304": 0, "404": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "GitHubStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Returns the status and JSON body for a GET of `path`."""
+        if path.startswith("/repos/") and path.endswith("/readme"):
+            repo_name = path[len("/repos/") : -len("/readme")]
+            if repo_name.startswith("missing"):
+                return 404, {"message": "Not Found"}
+            line = f"{repo_name} is a stub repository used for load tests.\n"
+            text = f"# {repo_name}\n\n" + line * (self.readme_chars // len(line) + 1)
+            content = base64.b64encode(text[: self.readme_chars].encode()).decode()
+            return 200, {"name": "README.md", "encoding": "base64", "content": content}
+        if path.startswith("/users/"):
+            login = path[len("/users/") :]
+            if login.startswith("missing"):
+                return 404, {"message": "Not Found"}
+            return 200, {"login": login, "name": login.title(), "type": "User"}
+        return 404, {"message": "Not Found"}
+
+    def _count(self, status: int) -> None:
+        with self._lock:
+            self.counts[str(status)] = self.counts.get(str(status), 0) + 1
+
+    def _handler_class(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                time.sleep(stub.latency_seconds)
+                status, data = stub.respond(self.path.split("?")[0])
+                body = json.dumps(data).encode("utf-8")
+                etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                stub._count(status)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status in (200, 304):
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
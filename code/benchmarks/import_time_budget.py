@@ -0,0 +1,159 @@
+"""
+Import-time budget check for the code package.
+
+Imports each module listed in `config/import_time_budget.yaml` in a fresh Python
+process with `python -X importtime`, and compares the module's cumulative import time
+(median over `--runs` processes) with its `max_import_seconds`. Modules may also list
+`forbidden_imports`: packages that must not be loaded by importing them (e.g. spaCy or
+a provider SDK, which are only imported when a node first needs them).
+
+The slowest direct imports of each module are printed to help find the culprit. The
+command exits with status 1 if any budget is exceeded.
+
+Run from the `code/` directory:
+
+    python -m benchmarks.import_time_budget
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from paths import CONFIG_DIR
+from utils import load_config
+
+DEFAULT_BUDGET_PATH = os.path.join(CONFIG_DIR, "import_time_budget.yaml")
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, float]]:
+    """
+    Parses `python -X importtime` output.
+
+    Returns:
+        List[Tuple[str, int, float]]: (module, depth, cumulative seconds) per imported
+        module, in the order reported (a module's imports come before the module itself).
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(IMPORTTIME_PREFIX) :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(fields[1]) / 1_000_000))
+    return entries
+
+
+def profile_import(module: str) -> List[Tuple[str, int, float]]:
+    """Imports `module` in a fresh process and returns its parsed import profile."""
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", f"import {module}"],
+        cwd=CODE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def _forbidden_package(name: str, forbidden: Sequence[str]) -> Optional[str]:
+    for package in forbidden:
+        if name == package or name.startswith(package + "."):
+            return package
+    return None
+
+
+def check_module(
+    module: str, budget: Dict[str, Any], runs: int, top: int
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Profiles the import of `module` and checks it against its budget.
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: The module's results and its budget violations.
+    """
+    durations = []
+    slowest: Dict[str, float] = {}
+    forbidden = budget.get("forbidden_imports") or []
+    forbidden_found = set()
+    for _ in range(runs):
+        entries = profile_import(module)
+        total = next(
+            seconds for name, depth, seconds in reversed(entries) if name == module
+        )
+        durations.append(total)
+        # Direct imports of the module.
+        for name, depth, seconds in entries:
+            if depth == 1:
+                slowest[name] = max(slowest.get(name, 0.0), seconds)
+            package = _forbidden_package(name, forbidden)
+            if package is not None:
+                forbidden_found.add(package)
+
+    import_seconds = statistics.median(durations)
+    results = {
+        "import_seconds": import_seconds,
+        "slowest_imports": dict(
+            sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:top]
+        ),
+        "forbidden_imports_found": sorted(forbidden_found),
+    }
+
+    failures = []
+    limit = budget.get("max_import_seconds")
+    if limit is not None and import_seconds > limit:
+        failures.append(f"{module}: import takes {import_seconds:.3f}s (limit {limit}s)")
+    if forbidden_found:
+        failures.append(f"{module}: imports {', '.join(sorted(forbidden_found))}")
+    return results, failures
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check import times against budgets.")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_PATH)
+    parser.add_argument("--modules", nargs="*", help="Only check these modules")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to show")
+    parser.add_argument("--output", default=None, help="Also write a JSON report")
+    args = parser.parse_args(argv)
+
+    budgets = load_config(args.budget).get("modules", {}) or {}
+    modules = args.modules or list(budgets)
+
+    report = {}
+    failures = []
+    for module in modules:
+        results, module_failures = check_module(
+            module, budgets.get(module) or {}, args.runs, args.top
+        )
+        report[module] = results
+        failures.extend(module_failures)
+        print(f"⏱️ {module}: {results['import_seconds']:.3f}s")
+        for name, seconds in results["slowest_imports"].items():
+            print(f"   {seconds:.3f}s  {name}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"modules": report, "failures": failures}, f, indent=2)
+        print(f"✅ Report saved to {args.output}")
+
+    if failures:
+        print("❌ Import-time budget exceeded:")
+        for failure in failures:
+            print(f"   - {failure}")
+        return 1
+    print("✅ All modules within their import-time budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
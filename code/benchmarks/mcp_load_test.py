@@ -0,0 +1,259 @@
+"""
+Load test for the MCP repository-information server over streamable HTTP.
+
+Starts a `GitHubStubServer` and the MCP server (`lesson4_mcp.py`, pointed at the stub),
+waits for its `/ready` endpoint, then runs `--clients` concurrent MCP client sessions.
+Each session makes `--calls-per-client` tool calls, a random mix of
+`get_github_readme`, `get_github_owner_info` and `get_github_readmes` over a pool of
+`--repos` repositories. The report gives per-tool call counts, errors and p50/p95/p99
+latency, overall calls per second, and the requests the stub served (the rest were
+answered by the server's GitHub cache). It is written as JSON.
+
+Run from the `code/` directory:
+
+    python -m benchmarks.mcp_load_test --clients 32 --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+from benchmarks.github_stub import GitHubStubServer
+from benchmarks.run_benchmarks import percentile
+from paths import MCP_SERVER_PATH, OUTPUTS_DIR
+
+DEFAULT_OUTPUT_PATH = os.path.join(OUTPUTS_DIR, "benchmarks", "mcp_load_test.json")
+# Relative frequency of each tool in the call mix.
+TOOL_WEIGHTS = {
+    "get_github_readme": 5,
+    "get_github_owner_info": 3,
+    "get_github_readmes": 2,
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    port: int, workers: int, github_base_url: str, log_file: Any
+) -> subprocess.Popen:
+    """Starts the MCP server over streamable HTTP in a subprocess."""
+    command = [
+        sys.executable,
+        MCP_SERVER_PATH,
+        "--transport",
+        "streamable-http",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--github-base-url",
+        github_base_url,
+    ]
+    return subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_until_ready(
+    base_url: str, server: subprocess.Popen, timeout_seconds: float = 60
+) -> None:
+    """Polls `/ready` until the server answers 200."""
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"MCP server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"MCP server not ready after {timeout_seconds}s")
+
+
+def _tool_arguments(
+    tool: str, rng: random.Random, repos: List[str], batch_size: int
+) -> Dict[str, Any]:
+    if tool == "get_github_readme":
+        return {"repo_name": rng.choice(repos)}
+    if tool == "get_github_owner_info":
+        return {"owner_name": rng.choice(repos).split("/")[0]}
+    return {"repo_names": rng.sample(repos, min(batch_size, len(repos)))}
+
+
+async def run_client(
+    mcp_url: str,
+    client_id: int,
+    calls: int,
+    repos: List[str],
+    batch_size: int,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    """Runs one MCP client session making `calls` tool calls."""
+    rng = random.Random(client_id)
+    tools, weights = zip(*TOOL_WEIGHTS.items())
+    async with streamablehttp_client(mcp_url) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for _ in range(calls):
+                tool = rng.choices(tools, weights)[0]
+                arguments = _tool_arguments(tool, rng, repos, batch_size)
+                started = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    failed = result.isError
+                except Exception:
+                    failed = True
+                latencies[tool].append(time.perf_counter() - started)
+                if failed:
+                    errors[tool] += 1
+
+
+def summarize(
+    latencies: Dict[str, List[float]], errors: Dict[str, int], wall_seconds: float
+) -> Dict[str, Any]:
+    """Per-tool and overall call counts, errors and latency percentiles."""
+
+    def stats(values: List[float], error_count: int) -> Dict[str, Any]:
+        return {
+            "calls": len(values),
+            "errors": error_count,
+            "latency_seconds": {
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+                "max": round(max(values, default=0.0), 4),
+            },
+        }
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "tools": {
+            tool: stats(values, errors[tool]) for tool, values in sorted(latencies.items())
+        },
+        "overall": stats(all_latencies, sum(errors.values())),
+        "wall_seconds": round(wall_seconds, 3),
+        "calls_per_second": round(len(all_latencies) / wall_seconds, 2),
+    }
+
+
+async def drive_clients(
+    mcp_url: str, clients: int, calls: int, repos: List[str], batch_size: int
+) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_client(mcp_url, client_id, calls, repos, batch_size, latencies, errors)
+            for client_id in range(clients)
+        )
+    )
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_load_test(
+    clients: int,
+    calls_per_client: int,
+    workers: int,
+    repo_count: int,
+    batch_size: int,
+    stub_latency: float,
+    readme_chars: int,
+) -> Dict[str, Any]:
+    """Starts the stub and the server, drives the clients and returns the report."""
+    stub = GitHubStubServer(latency_seconds=stub_latency, readme_chars=readme_chars)
+    stub.start()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    repos = [f"owner{i % 10}/repo{i}" for i in range(repo_count)]
+    with tempfile.TemporaryFile(mode="w+") as log_file:
+        server = start_server(port, workers, stub.url, log_file)
+        try:
+            wait_until_ready(base_url, server)
+            print(f"⏱️ {clients} clients x {calls_per_client} calls, {workers} worker(s)")
+            results = asyncio.run(
+                drive_clients(
+                    f"{base_url}/mcp", clients, calls_per_client, repos, batch_size
+                )
+            )
+        except Exception:
+            log_file.seek(0)
+            print(log_file.read()[-4000:])
+            raise
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            stub.stop()
+    return {
+        "settings": {
+            "clients": clients,
+            "calls_per_client": calls_per_client,
+            "workers": workers,
+            "repos": repo_count,
+            "batch_size": batch_size,
+            "stub_latency_seconds": stub_latency,
+            "readme_chars": readme_chars,
+        },
+        "github_stub_responses": dict(stub.counts),
+        **results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the MCP server over HTTP.")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--calls-per-client", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repos", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--readme-chars", type=int, default=4000)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    args = parser.parse_args(argv)
+
+    report = run_load_test(
+        clients=args.clients,
+        calls_per_client=args.calls_per_client,
+        workers=args.workers,
+        repo_count=args.repos,
+        batch_size=args.batch_size,
+        stub_latency=args.stub_latency,
+        readme_chars=args.readme_chars,
+    )
+    for tool, stats in report["tools"].items():
+        latency = stats["latency_seconds"]
+        print(
+            f"   {tool}: {stats['calls']} calls, {stats['errors']} errors, "
+            f"p50 {latency['p50'] * 1000:.0f}ms, p95 {latency['p95'] * 1000:.0f}ms, "
+            f"p99 {latency['p99'] * 1000:.0f}ms"
+        )
+    print(f"   {report['calls_per_second']} calls/s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
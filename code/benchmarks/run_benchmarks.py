@@ -0,0 +1,431 @@
+"""
+End-to-end benchmarks for the tag generation and A3 graphs.
+
+All LLM and web search calls are served by the deterministic fakes in
+`benchmarks.fakes`, so a run costs nothing and is repeatable. Each scenario runs one
+graph over one corpus (a publication example, or a synthetic corpus built from their
+paragraphs) and reports per-node wall time, p50/p95 end-to-end latency, documents per
+second and peak RSS. The report is written as JSON and compared against regression
+thresholds; the process exits with status 1 if any threshold is exceeded.
+
+Run from the `code/` directory:
+
+    python -m benchmarks.run_benchmarks --output ../outputs/benchmarks/report.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fakes import FAKE_SEARCH_BACKEND, install_fakes
+from consts import PRECOMPUTED_SPACY_TAGS
+from document_digest import aprepare_a3_state, prepare_a3_state
+from graphs.a3_graph import build_a3_graph
+from graphs.tag_generation_graph import build_tag_generation_graph
+from paths import CONFIG_DIR, OUTPUTS_DIR
+from states.tag_generation_state import initialize_tag_generation_state_from_config
+from token_usage import TokenUsageTracker
+from utils import load_config, load_publication_example
+
+GRAPHS = ("tag_generation", "a3")
+EXAMPLE_NUMBERS = (1, 2, 3)
+DEFAULT_CORPUS_SIZES = (10, 50, 100)
+DEFAULT_THRESHOLDS_PATH = os.path.join(CONFIG_DIR, "benchmark_thresholds.yaml")
+DEFAULT_OUTPUT_PATH = os.path.join(OUTPUTS_DIR, "benchmarks", "report.json")
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the wall time of every LangGraph node execution. Thread-safe."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._starts: Dict[UUID, tuple] = {}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it.
+        if node is not None and kwargs.get("name") == node:
+            with self._lock:
+                self._starts[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id: UUID) -> None:
+        with self._lock:
+            start = self._starts.pop(run_id, None)
+            if start is not None:
+                node, started_at = start
+                self.durations[node].append(time.perf_counter() - started_at)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of `values` (q in [0, 100])."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_synthetic_corpus(size: int, seed: int = 0) -> List[str]:
+    """
+    Builds `size` documents by sampling paragraphs from the publication examples.
+
+    Document lengths vary between a few paragraphs and roughly a full example.
+    """
+    paragraphs = [
+        paragraph
+        for number in EXAMPLE_NUMBERS
+        for paragraph in load_publication_example(number).split("\n\n")
+        if paragraph.strip()
+    ]
+    rng = random.Random(seed)
+    return [
+        "\n\n".join(rng.choices(paragraphs, k=rng.randint(3, 40)))
+        for _ in range(size)
+    ]
+
+
+def _llm_models(config: Dict[str, Any]) -> List[str]:
+    return [agent["llm"] for agent in config["agents"].values() if "llm" in agent]
+
+
+def _summarize(
+    graph_name: str,
+    corpus_name: str,
+    latencies: List[float],
+    wall_seconds: float,
+    concurrency: int,
+    node_timer: NodeTimer,
+    token_usage: TokenUsageTracker,
+) -> Dict[str, Any]:
+    node_seconds = {
+        node: {
+            "calls": len(durations),
+            "total": round(sum(durations), 4),
+            "mean": round(sum(durations) / len(durations), 4),
+            "p95": round(percentile(durations, 95), 4),
+        }
+        for node, durations in sorted(node_timer.durations.items())
+    }
+    total_usage = token_usage.usage_by_node()["total"]
+    return {
+        "name": f"{graph_name}/{corpus_name}",
+        "graph": graph_name,
+        "corpus": corpus_name,
+        "documents": len(latencies),
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 4),
+        "docs_per_second": round(len(latencies) / wall_seconds, 4) if wall_seconds else 0.0,
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        "node_seconds": node_seconds,
+        "llm_calls": total_usage["calls"],
+        "input_tokens": total_usage["input_tokens"],
+        "output_tokens": total_usage["output_tokens"],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_scenario(
+    graph_name: str,
+    corpus_name: str,
+    texts: List[str],
+    config: Dict[str, Any],
+    concurrency: int,
+    mode: str,
+    skip_spacy: bool,
+) -> Dict[str, Any]:
+    """
+    Runs every text through a freshly built graph and returns the scenario's metrics.
+
+    A3 documents go through `prepare_a3_state`, so long ones include the digest stage.
+
+    Args:
+        graph_name: "tag_generation" or "a3".
+        corpus_name: Label used in the report and for threshold lookup.
+        texts: The documents.
+        config: The graph's config section.
+        concurrency: Maximum number of documents in flight.
+        mode: "async" drives the graph with `ainvoke` on one event loop; "sync" uses
+            `invoke` in a thread pool.
+        skip_spacy: Seed empty spaCy tags so no spaCy model is needed.
+    """
+    if graph_name == "a3":
+        graph = build_a3_graph(config)
+        initialize_state = prepare_a3_state
+        ainitialize_state = aprepare_a3_state
+    else:
+        graph = build_tag_generation_graph(config)
+        initialize_state = initialize_tag_generation_state_from_config
+        ainitialize_state = None
+
+    node_timer = NodeTimer()
+    token_usage = TokenUsageTracker()
+    run_config = {"callbacks": [node_timer, token_usage]}
+
+    def seed(state: Dict[str, Any]) -> Dict[str, Any]:
+        if skip_spacy:
+            state[PRECOMPUTED_SPACY_TAGS] = []
+        return state
+
+    def make_state(text: str) -> Dict[str, Any]:
+        return seed(initialize_state(text, config))
+
+    async def amake_state(text: str) -> Dict[str, Any]:
+        if ainitialize_state is None:
+            return make_state(text)
+        return seed(await ainitialize_state(text, config))
+
+    def run_one(text: str) -> float:
+        started_at = time.perf_counter()
+        graph.invoke(make_state(text), config=run_config)
+        return time.perf_counter() - started_at
+
+    async def arun_all() -> List[float]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def arun_one(text: str) -> float:
+            async with semaphore:
+                started_at = time.perf_counter()
+                await graph.ainvoke(await amake_state(text), config=run_config)
+                return time.perf_counter() - started_at
+
+        return list(await asyncio.gather(*(arun_one(text) for text in texts)))
+
+    started_at = time.perf_counter()
+    if mode == "async":
+        latencies = asyncio.run(arun_all())
+    else:
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(run_one, texts))
+    wall_seconds = time.perf_counter() - started_at
+
+    return _summarize(
+        graph_name,
+        corpus_name,
+        latencies,
+        wall_seconds,
+        concurrency,
+        node_timer,
+        token_usage,
+    )
+
+
+def check_thresholds(
+    scenarios: List[Dict[str, Any]], thresholds: Dict[str, Any]
+) -> List[str]:
+    """
+    Compares scenario metrics against the thresholds and returns the violations.
+
+    `thresholds["defaults"]` applies to every scenario and is overridden per scenario by
+    `thresholds["scenarios"]["<graph>/<corpus>"]`. Supported keys are
+    `max_p50_latency_seconds`, `max_p95_latency_seconds`, `min_docs_per_second` and
+    `max_peak_rss_mb`.
+    """
+    failures = []
+    for scenario in scenarios:
+        limits = {
+            **(thresholds.get("defaults") or {}),
+            **((thresholds.get("scenarios") or {}).get(scenario["name"]) or {}),
+        }
+        checks = [
+            ("max_p50_latency_seconds", scenario["latency_seconds"]["p50"], max),
+            ("max_p95_latency_seconds", scenario["latency_seconds"]["p95"], max),
+            ("min_docs_per_second", scenario["docs_per_second"], min),
+            ("max_peak_rss_mb", scenario["peak_rss_mb"], max),
+        ]
+        for key, value, bound in checks:
+            if key not in limits:
+                continue
+            limit = limits[key]
+            violated = value > limit if bound is max else value < limit
+            if violated:
+                failures.append(f"{scenario['name']}: {key} = {value} (limit {limit})")
+    return failures
+
+
+def run_benchmarks(
+    graphs: Sequence[str],
+    corpus_sizes: Sequence[int],
+    example_repeats: int,
+    concurrency: int,
+    mode: str,
+    llm_settings: Dict[str, Any],
+    search_settings: Dict[str, Any],
+    skip_spacy: bool,
+    spacy_model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Runs every (graph, corpus) scenario and returns the report."""
+    app_config = load_config()
+    configs = {"tag_generation": app_config["tags_generation"], "a3": app_config["a3_system"]}
+    install_fakes(
+        [model for config in configs.values() for model in _llm_models(config)],
+        llm_settings=llm_settings,
+        search_settings=search_settings,
+    )
+    configs["a3"]["search"] = {
+        **configs["a3"].get("search", {}),
+        "backend": FAKE_SEARCH_BACKEND,
+        "cache": {"enabled": False},
+    }
+    if spacy_model:
+        for config in configs.values():
+            config.setdefault("spacy_ner", {})["model"] = spacy_model
+
+    corpora = [
+        (f"example{number}", [load_publication_example(number)] * example_repeats)
+        for number in EXAMPLE_NUMBERS
+    ] + [(f"synthetic_{size}", build_synthetic_corpus(size)) for size in corpus_sizes]
+
+    scenarios = []
+    for graph_name in graphs:
+        for corpus_name, texts in corpora:
+            print(f"⏱️ {graph_name}/{corpus_name}: {len(texts)} documents")
+            scenario = run_scenario(
+                graph_name,
+                corpus_name,
+                texts,
+                configs[graph_name],
+                # Examples are timed one document at a time for clean latencies.
+                concurrency=1 if corpus_name.startswith("example") else concurrency,
+                mode=mode,
+                skip_spacy=skip_spacy,
+            )
+            print(
+                f"   p50 {scenario['latency_seconds']['p50']}s, "
+                f"p95 {scenario['latency_seconds']['p95']}s, "
+                f"{scenario['docs_per_second']} docs/s, "
+                f"peak RSS {scenario['peak_rss_mb']} MiB"
+            )
+            scenarios.append(scenario)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {
+            "mode": mode,
+            "concurrency": concurrency,
+            "example_repeats": example_repeats,
+            "skip_spacy": skip_spacy,
+            "spacy_model": spacy_model,
+            "llm": llm_settings,
+            "search": search_settings,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the tag generation and A3 graphs.")
+    parser.add_argument("--graphs", nargs="+", choices=GRAPHS, default=list(GRAPHS))
+    parser.add_argument(
+        "--corpus-sizes", nargs="*", type=int, default=list(DEFAULT_CORPUS_SIZES)
+    )
+    parser.add_argument(
+        "--example-repeats",
+        type=int,
+        default=5,
+        help="Times each publication example is run (for its latency percentiles)",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=("async", "sync"), default="async")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--llm-output-tokens", type=int, default=150)
+    parser.add_argument("--approval-rate", type=float, default=0.7)
+    parser.add_argument("--search-latency", type=float, default=0.1)
+    parser.add_argument(
+        "--skip-spacy",
+        action="store_true",
+        help="Seed empty spaCy tags instead of running a spaCy model",
+    )
+    parser.add_argument("--spacy-model", default=None, help="Override spacy_ner.model")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS_PATH)
+    parser.add_argument(
+        "--no-thresholds", action="store_true", help="Only write the report"
+    )
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        graphs=args.graphs,
+        corpus_sizes=args.corpus_sizes,
+        example_repeats=args.example_repeats,
+        concurrency=args.concurrency,
+        mode=args.mode,
+        llm_settings={
+            "latency_seconds": args.llm_latency,
+            "jitter_seconds": args.llm_jitter,
+            "output_tokens": args.llm_output_tokens,
+            "approval_rate": args.approval_rate,
+        },
+        search_settings={"latency_seconds": args.search_latency},
+        skip_spacy=args.skip_spacy,
+        spacy_model=args.spacy_model,
+    )
+
+    failures = []
+    if not args.no_thresholds:
+        failures = check_thresholds(report["scenarios"], load_config(args.thresholds))
+    report["threshold_failures"] = failures
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report saved to {args.output}")
+
+    if failures:
+        print("❌ Benchmark regressions:")
+        for failure in failures:
+            print(f"   - {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Startup benchmark for the graph builders.
+
+Measures, for the tag generation and A3 graphs:
+
+- cold start: importing the graph module and building the graph in a fresh Python
+  process (median over `--cold-runs` processes);
+- warm build: building the graph again in a process that already built it once;
+- cached get: `get_tag_generation_graph` / `get_a3_graph` once the graph is cached.
+
+Node resources (LLM clients, search backends, matchers) are created on first use, so
+no API keys or network access are needed. The report is written as JSON.
+
+Run from the `code/` directory:
+
+    python -m benchmarks.startup_benchmark --output ../outputs/benchmarks/startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from paths import OUTPUTS_DIR
+from utils import load_config
+
+GRAPHS = ("tag_generation", "a3")
+DEFAULT_OUTPUT_PATH = os.path.join(OUTPUTS_DIR, "benchmarks", "startup.json")
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter; prints the import and build times as JSON.
+COLD_START_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from utils import load_config
+if {graph!r} == "a3":
+    from graphs.a3_graph import build_a3_graph as build
+    section = "a3_system"
+else:
+    from graphs.tag_generation_graph import build_tag_generation_graph as build
+    section = "tags_generation"
+imported = time.perf_counter()
+build(load_config()[section])
+built = time.perf_counter()
+print(json.dumps({{"import_seconds": imported - started, "build_seconds": built - imported}}))
+"""
+
+
+def _builders(graph: str) -> tuple:
+    if graph == "a3":
+        from graphs.a3_graph import build_a3_graph, get_a3_graph
+
+        return build_a3_graph, get_a3_graph, load_config()["a3_system"]
+    from graphs.tag_generation_graph import (
+        build_tag_generation_graph,
+        get_tag_generation_graph,
+    )
+
+    return (
+        build_tag_generation_graph,
+        get_tag_generation_graph,
+        load_config()["tags_generation"],
+    )
+
+
+def _time_calls(func: Callable[[], Any], repeats: int) -> List[float]:
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def measure_cold_start(graph: str, runs: int) -> Dict[str, float]:
+    """Imports and builds `graph` in `runs` fresh processes; returns the medians."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", COLD_START_SCRIPT.format(graph=graph)],
+            cwd=CODE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample["process_seconds"] = time.perf_counter() - started
+        samples.append(sample)
+    return {
+        key: statistics.median(sample[key] for sample in samples)
+        for key in ("import_seconds", "build_seconds", "process_seconds")
+    }
+
+
+def measure_warm(graph: str, repeats: int) -> Dict[str, float]:
+    """Times fresh builds and cached gets of `graph` in this (warmed-up) process."""
+    build, get, config = _builders(graph)
+    build(config)
+    get(config)
+    build_durations = _time_calls(lambda: build(config), repeats)
+    get_durations = _time_calls(lambda: get(config), repeats)
+    return {
+        "warm_build_seconds": statistics.median(build_durations),
+        "cached_get_seconds": statistics.median(get_durations),
+    }
+
+
+def run_startup_benchmark(
+    graphs: Sequence[str], cold_runs: int, warm_repeats: int
+) -> Dict[str, Any]:
+    """Runs the startup benchmark for each graph and returns the report."""
+    results = {}
+    for graph in graphs:
+        print(f"⏱️ Measuring startup of the {graph} graph...")
+        results[graph] = {
+            **measure_cold_start(graph, cold_runs),
+            **measure_warm(graph, warm_repeats),
+        }
+        print(
+            f"   cold import {results[graph]['import_seconds']:.3f}s, "
+            f"cold build {results[graph]['build_seconds']:.3f}s, "
+            f"warm build {results[graph]['warm_build_seconds'] * 1000:.1f}ms, "
+            f"cached get {results[graph]['cached_get_seconds'] * 1000:.3f}ms"
+        )
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {"cold_runs": cold_runs, "warm_repeats": warm_repeats},
+        "graphs": results,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark graph construction time.")
+    parser.add_argument("--graphs", nargs="+", choices=GRAPHS, default=list(GRAPHS))
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--warm-repeats", type=int, default=20)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    args = parser.parse_args(argv)
+
+    report = run_startup_benchmark(args.graphs, args.cold_runs, args.warm_repeats)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Report saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Durable checkpointing for LangGraph runs.
+
+`SQLiteCheckpointSaver` is LangGraph's `SqliteSaver` (from `langgraph-checkpoint-sqlite`)
+with async support. It stores every completed superstep of a graph run in a single
+SQLite file, keyed by thread id. When a node fails (e.g. the references generator
+raising on a search error), the writes of the nodes that did finish in that superstep
+are kept as well, so a resumed run only re-executes what did not complete:
+
+    checkpointer = get_checkpointer(a3_config["checkpointing"])
+    graph = build_a3_graph(a3_config, checkpointer=checkpointer)
+    graph.invoke(initial_state, config=thread_config("doc-1"))  # raises halfway
+    resume_run(graph, "doc-1")  # picks up after the last completed superstep
+
+`replay_from` forks a thread at an earlier checkpoint (see `list_checkpoints`) and runs
+it again from there. State is serialized with LangGraph's serializer, and payloads
+above `compress_min_bytes` are zlib-compressed. Configured in the `checkpointing` section of the A3 system config.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from paths import CHECKPOINT_DB_PATH, ROOT_DIR
+
+DEFAULT_COMPRESS_MIN_BYTES = 512
+_COMPRESSED_SUFFIX = "+zlib"
+
+_checkpointers: Dict[str, "SQLiteCheckpointSaver"] = {}
+_checkpointers_lock = threading.Lock()
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Wraps a serializer and zlib-compresses payloads of at least `min_bytes`.
+
+    Args:
+        serde: The serializer producing the uncompressed payloads.
+        min_bytes: Smaller payloads are stored as they are.
+    """
+
+    def __init__(
+        self,
+        serde: Optional[SerializerProtocol] = None,
+        min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES,
+    ):
+        self.serde = serde or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) >= self.min_bytes:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return type_ + _COMPRESSED_SUFFIX, compressed
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_COMPRESSED_SUFFIX):
+            type_ = type_[: -len(_COMPRESSED_SUFFIX)]
+            payload = zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+class SQLiteCheckpointSaver(SqliteSaver):
+    """LangGraph's `SqliteSaver` with async methods, so one saver serves sync and async runs.
+
+    SQLite calls are short, so the async variants run the sync ones in the default
+    executor instead of requiring a separate `AsyncSqliteSaver` bound to one event loop.
+
+    Args:
+        path: Path to the SQLite database file. Parent directories are created as needed.
+        compress_min_bytes: Serialized values of at least this size are compressed.
+    """
+
+    def __init__(self, path: str, compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        super().__init__(conn, serde=CompressedSerializer(min_bytes=compress_min_bytes))
+        self.path = path
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Stores a checkpoint."""
+        # LangGraph 0.4 also records each step's node outputs (`writes`) in the
+        # metadata, which this saver stores as plain JSON. The outputs are part of the
+        # checkpoint already, so they are left out of the metadata.
+        metadata = {key: value for key, value in metadata.items() if key != "writes"}
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def get_checkpointer(
+    checkpoint_config: Optional[Dict[str, Any]] = None,
+) -> Optional[SQLiteCheckpointSaver]:
+    """
+    Returns the process-wide checkpointer for a `checkpointing` config section.
+
+    Returns None when checkpointing is disabled. One saver is shared per database path.
+    """
+    checkpoint_config = checkpoint_config or {}
+    if not checkpoint_config.get("enabled", False):
+        return None
+    path = checkpoint_config.get("path") or CHECKPOINT_DB_PATH
+    if not os.path.isabs(path):
+        path = os.path.join(ROOT_DIR, path)
+    with _checkpointers_lock:
+        if path not in _checkpointers:
+            _checkpointers[path] = SQLiteCheckpointSaver(
+                path,
+                compress_min_bytes=checkpoint_config.get(
+                    "compress_min_bytes", DEFAULT_COMPRESS_MIN_BYTES
+                ),
+            )
+        return _checkpointers[path]
+
+
+def new_thread_id() -> str:
+    """Returns a fresh thread id for a checkpointed run."""
+    return uuid.uuid4().hex
+
+
+def thread_config(
+    thread_id: str, config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Returns `config` (e.g. with callbacks) extended with the thread id."""
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+    return config
+
+
+def has_unfinished_run(graph: Any, thread_id: str) -> bool:
+    """Returns True if the thread has a checkpoint with nodes still to run."""
+    snapshot = graph.get_state(thread_config(thread_id))
+    return bool(snapshot.next)
+
+
+def resume_run(
+    graph: Any, thread_id: str, config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Continues a checkpointed run from its last completed superstep.
+
+    Nodes that completed in the failed superstep are not executed again; their stored
+    writes are applied instead. A finished run returns its final state unchanged.
+
+    Raises:
+        ValueError: If the thread has no checkpoint.
+    """
+    run_config = thread_config(thread_id, config)
+    snapshot = graph.get_state(run_config)
+    if not snapshot.values:
+        raise ValueError(f"No checkpoint found for thread '{thread_id}'")
+    if not snapshot.next:
+        return snapshot.values
+    print(f"🔁 Resuming thread {thread_id} at {', '.join(snapshot.next)}")
+    return graph.invoke(None, config=run_config)
+
+
+async def aresume_run(
+    graph: Any, thread_id: str, config: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Async variant of `resume_run`."""
+    run_config = thread_config(thread_id, config)
+    snapshot = await graph.aget_state(run_config)
+    if not snapshot.values:
+        raise ValueError(f"No checkpoint found for thread '{thread_id}'")
+    if not snapshot.next:
+        return snapshot.values
+    print(f"🔁 Resuming thread {thread_id} at {', '.join(snapshot.next)}")
+    return await graph.ainvoke(None, config=run_config)
+
+
+def list_checkpoints(graph: Any, thread_id: str) -> List[Dict[str, Any]]:
+    """
+    Returns the checkpoints of a thread, newest first.
+
+    Each entry has the `checkpoint_id`, the superstep (`step`) and the nodes that run
+    next from it (`next`).
+    """
+    return [
+        {
+            "checkpoint_id": snapshot.config["configurable"]["checkpoint_id"],
+            "step": snapshot.metadata.get("step"),
+            "next": snapshot.next,
+        }
+        for snapshot in graph.get_state_history(thread_config(thread_id))
+    ]
+
+
+def replay_from(
+    graph: Any,
+    thread_id: str,
+    checkpoint_id: str,
+    config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Forks a thread at one of its earlier checkpoints and runs the graph from there.
+
+    The nodes after that checkpoint run again (e.g. with a changed prompt or model); the
+    thread's original checkpoints are kept, and the new ones branch off the chosen one.
+
+    Raises:
+        ValueError: If the thread has no checkpoint `checkpoint_id`.
+    """
+    run_config = thread_config(thread_id, config)
+    run_config["configurable"]["checkpoint_id"] = checkpoint_id
+    snapshot = graph.get_state(run_config)
+    if not snapshot.values:
+        raise ValueError(f"Thread '{thread_id}' has no checkpoint '{checkpoint_id}'")
+    print(f"🔁 Replaying thread {thread_id} from checkpoint {checkpoint_id}")
+    return graph.invoke(None, config=run_config)
@@ -15,6 +15,7 @@ SPACY_TAGS_GENERATOR = "spacy_tags_generator"
 GAZETTEER_TAGS_GENERATOR = "gazetteer_tags_generator"
 TAG_TYPE_ASSIGNER = "tag_type_assigner"
 TAGS_AGGREGATOR = "tags_aggregator"
+TAGS_RANKER = "tags_ranker"
 TAGS_SELECTOR = "tags_selector"
 TAGS_GENERATOR = "tags_generator"
 TLDR_GENERATOR = "tldr_generator"
@@ -29,8 +30,12 @@ TITLE = "title"
 TLDR = "tldr"
 LLM_TAGS = "llm_tags"
 SPACY_TAGS = "spacy_tags"
+PRECOMPUTED_SPACY_TAGS = "precomputed_spacy_tags"
+PRECOMPUTED_LLM_TAGS = "precomputed_llm_tags"
 GAZETTEER_TAGS = "gazetteer_tags"
 CANDIDATE_TAGS = "candidate_tags"
+RANKED_TAGS = "ranked_tags"
+TAGS_RANKING_CONFIDENT = "tags_ranking_confident"
 SELECTED_TAGS = "selected_tags"
 MANAGER_BRIEF = "manager_brief"
 REFERENCE_SEARCH_QUERIES = "reference_search_queries"
@@ -56,3 +61,8 @@ REFERENCES_FEEDBACK = "references_feedback"
 TLDR_APPROVED = "tldr_approved"
 TITLE_APPROVED = "title_approved"
 REFERENCES_APPROVED = "references_approved"
+# Revision round in which each component was last (re)generated
+TLDR_ROUND = "tldr_round"
+TITLE_ROUND = "title_round"
+REFERENCES_ROUND = "references_round"
+PENDING_COMPONENTS = "pending_components"
@@ -0,0 +1,324 @@
+"""
+Digest mode for long publications.
+
+Sending a long publication to every A3 agent multiplies its token cost by the number of
+agents. For documents above the token budget in the `a3_system.digest` config section,
+a map-reduce stage runs before the graph:
+
+- map: the publication is split on its markdown headings into chunks of about
+  `chunk_tokens` tokens, and the manager (a brief of each section) and the LLM tag
+  generator (tags of each section) run over all chunks in parallel;
+- reduce: the section briefs are merged into a compact digest (outline plus one brief
+  per section) and the section tags into one deduplicated tag list.
+
+The agents then receive the digest instead of the full text, and the LLM tag generator
+node reuses the merged tags. spaCy and the gazetteer still see the full text. Documents
+within the budget are processed in full-text mode, exactly as before.
+
+Use `prepare_a3_state` / `aprepare_a3_state` in place of
+`initialize_a3_state_from_config` to pick the mode per document. Digest mode applies to
+the A3 system only: the standalone tag generation graph and the batch runner have no
+manager agent to write the section briefs, so they always send the full text.
+"""
+
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from consts import LLM_TAGS_GENERATOR, MANAGER
+from llm import ainvoke_llm, get_llm, get_structured_llm
+from nodes.output_types import Entities
+from prompt_builder import get_system_prompt_message
+from spacy_ner import merge_entities, split_into_chunks
+from states.a3_state import A3SystemState, initialize_a3_state_from_config
+from states.tag_generation_state import get_tag_types_message
+
+DEFAULT_TOKEN_BUDGET = 4000
+DEFAULT_CHUNK_TOKENS = 3000
+DEFAULT_CHARS_PER_TOKEN = 4
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_SECTION_BRIEF_WORDS = 120
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def estimate_tokens(text: str, chars_per_token: int = DEFAULT_CHARS_PER_TOKEN) -> int:
+    """Returns a rough token count for `text`."""
+    return len(text) // chars_per_token
+
+
+def use_digest(text: str, digest_config: Dict[str, Any]) -> bool:
+    """Returns True if `text` exceeds the digest token budget and digest mode is enabled."""
+    if not digest_config.get("enabled", False):
+        return False
+    chars_per_token = digest_config.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)
+    token_budget = digest_config.get("token_budget", DEFAULT_TOKEN_BUDGET)
+    return estimate_tokens(text, chars_per_token) > token_budget
+
+
+def split_markdown_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Splits a markdown document on its headings.
+
+    Headings inside fenced code blocks are ignored. Text before the first heading forms
+    a section with an empty heading.
+
+    Returns:
+        List[Tuple[str, str]]: (heading path, section text) pairs in document order. The
+        heading path joins the enclosing headings with " > ".
+    """
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    heading_stack: List[Tuple[int, str]] = []
+    in_fence = False
+    for line in text.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match:
+            level, title = len(match.group(1)), match.group(2)
+            while heading_stack and heading_stack[-1][0] >= level:
+                heading_stack.pop()
+            heading_stack.append((level, title))
+            path = " > ".join(title for _, title in heading_stack)
+            sections.append((path, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [
+        (heading, "\n".join(lines).strip())
+        for heading, lines in sections
+        if "\n".join(lines).strip()
+    ]
+
+
+def chunk_markdown(
+    text: str,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    chars_per_token: int = DEFAULT_CHARS_PER_TOKEN,
+) -> List[Dict[str, str]]:
+    """
+    Splits a markdown document into chunks of about `chunk_tokens` tokens.
+
+    Consecutive sections are packed into one chunk while they fit; sections that are
+    too long on their own are split on paragraph and sentence boundaries.
+
+    Returns:
+        List[Dict[str, str]]: Chunks with `heading` (the first section's heading path)
+        and `text` keys, in document order.
+    """
+    max_chunk_chars = chunk_tokens * chars_per_token
+    chunks: List[Dict[str, str]] = []
+    current: Optional[Dict[str, str]] = None
+    for heading, section in split_markdown_sections(text):
+        pieces = (
+            split_into_chunks(section, max_chunk_chars)
+            if len(section) > max_chunk_chars
+            else [section]
+        )
+        for piece in pieces:
+            if current and len(current["text"]) + len(piece) + 2 <= max_chunk_chars:
+                current["text"] = f"{current['text']}\n\n{piece}"
+                continue
+            if current:
+                chunks.append(current)
+            current = {"heading": heading, "text": piece}
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _normalize_tags(response: Entities) -> List[Dict[str, str]]:
+    tags = response.model_dump()["entities"]
+    for tag in tags:
+        tag["name"] = tag["name"].lower().strip()
+        tag["type"] = tag["type"].lower().strip()
+    return tags
+
+
+class _ChunkPrompts:
+    """Builds the per-chunk manager and tag generator prompts from the A3 config."""
+
+    def __init__(self, a3_config: Dict[str, Any], n_chunks: int):
+        agents = a3_config["agents"]
+        digest_config = a3_config.get("digest", {}) or {}
+        self.n_chunks = n_chunks
+        self.brief_words = digest_config.get(
+            "section_brief_words", DEFAULT_SECTION_BRIEF_WORDS
+        )
+        self.manager_system = get_system_prompt_message(
+            agents[MANAGER]["prompt_config"]
+        )
+        self.tags_system = get_system_prompt_message(
+            agents[LLM_TAGS_GENERATOR]["prompt_config"]
+        )
+        self.tag_types_message = get_tag_types_message(a3_config["tag_types"])
+
+    def manager_messages(self, index: int, chunk: Dict[str, str]) -> List[Any]:
+        return [
+            self.manager_system,
+            SystemMessage(
+                f"You are reading part {index + 1} of {self.n_chunks} of a long "
+                f"publication. Write a brief of this part only, in at most "
+                f"{self.brief_words} words."
+            ),
+            HumanMessage(f"Here's your input text:\n\n{chunk['text']}"),
+        ]
+
+    def tags_messages(self, chunk: Dict[str, str]) -> List[Any]:
+        return [
+            self.tags_system,
+            self.tag_types_message,
+            HumanMessage(
+                f"Here's your input text for tags generation:\n\n{chunk['text']}"
+            ),
+        ]
+
+
+def _reduce(
+    text: str,
+    chunks: List[Dict[str, str]],
+    briefs: List[str],
+    tag_lists: List[List[Dict[str, str]]],
+) -> Dict[str, Any]:
+    outline = [
+        f"- {heading}" for heading, _ in split_markdown_sections(text) if heading
+    ]
+    sections = []
+    for i, (chunk, brief) in enumerate(zip(chunks, briefs)):
+        title = f"Part {i + 1}"
+        if chunk["heading"]:
+            title = f"{title}: {chunk['heading']}"
+        sections.append(f"## {title}\n{brief.strip()}")
+    parts = [
+        "This is a digest of a long publication: an outline of its sections followed "
+        "by a brief of each part."
+    ]
+    if outline:
+        parts.append("Outline:\n" + "\n".join(outline))
+    parts.append("\n\n".join(sections))
+    return {
+        "text": "\n\n".join(parts),
+        "llm_tags": merge_entities(tag_lists),
+        "n_chunks": len(chunks),
+    }
+
+
+def build_document_digest(text: str, a3_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the digest of a long publication (see module docstring).
+
+    Args:
+        text: The publication in markdown.
+        a3_config: The `a3_system` config section.
+
+    Returns:
+        Dict[str, Any]: `text` (the digest), `llm_tags` (merged section tags) and
+        `n_chunks`.
+    """
+    digest_config = a3_config.get("digest", {}) or {}
+    chunks = chunk_markdown(
+        text,
+        digest_config.get("chunk_tokens", DEFAULT_CHUNK_TOKENS),
+        digest_config.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN),
+    )
+    prompts = _ChunkPrompts(a3_config, len(chunks))
+    manager_llm = get_llm(a3_config["agents"][MANAGER]["llm"])
+    tags_llm = get_structured_llm(
+        a3_config["agents"][LLM_TAGS_GENERATOR]["llm"], Entities
+    )
+    print(f"🧩 Digest: Processing {len(chunks)} chunks in parallel...")
+
+    max_workers = digest_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        brief_futures = [
+            executor.submit(manager_llm.invoke, prompts.manager_messages(i, chunk))
+            for i, chunk in enumerate(chunks)
+        ]
+        tag_futures = [
+            executor.submit(tags_llm.invoke, prompts.tags_messages(chunk))
+            for chunk in chunks
+        ]
+        briefs = [future.result().content for future in brief_futures]
+        tag_lists = [_normalize_tags(future.result()) for future in tag_futures]
+    return _reduce(text, chunks, briefs, tag_lists)
+
+
+async def abuild_document_digest(
+    text: str, a3_config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Async variant of `build_document_digest`; LLM calls share the provider limits."""
+    digest_config = a3_config.get("digest", {}) or {}
+    chunks = chunk_markdown(
+        text,
+        digest_config.get("chunk_tokens", DEFAULT_CHUNK_TOKENS),
+        digest_config.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN),
+    )
+    prompts = _ChunkPrompts(a3_config, len(chunks))
+    manager_model = a3_config["agents"][MANAGER]["llm"]
+    tags_model = a3_config["agents"][LLM_TAGS_GENERATOR]["llm"]
+    manager_llm = get_llm(manager_model)
+    tags_llm = get_structured_llm(tags_model, Entities)
+    semaphore = asyncio.Semaphore(
+        digest_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+    )
+    print(f"🧩 Digest: Processing {len(chunks)} chunks in parallel...")
+
+    async def brief(index: int, chunk: Dict[str, str]) -> str:
+        async with semaphore:
+            messages = prompts.manager_messages(index, chunk)
+            response = await ainvoke_llm(manager_llm, messages, manager_model)
+            return response.content
+
+    async def tags(chunk: Dict[str, str]) -> List[Dict[str, str]]:
+        async with semaphore:
+            messages = prompts.tags_messages(chunk)
+            response = await ainvoke_llm(tags_llm, messages, tags_model)
+            return _normalize_tags(response)
+
+    briefs, tag_lists = await asyncio.gather(
+        asyncio.gather(*(brief(i, chunk) for i, chunk in enumerate(chunks))),
+        asyncio.gather(*(tags(chunk) for chunk in chunks)),
+    )
+    return _reduce(text, chunks, list(briefs), list(tag_lists))
+
+
+def _state_from_digest(
+    text: str, a3_config: Dict[str, Any], digest: Dict[str, Any]
+) -> A3SystemState:
+    digest_config = a3_config.get("digest", {}) or {}
+    chars_per_token = digest_config.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)
+    print(
+        f"🧩 Digest: {estimate_tokens(text, chars_per_token)} -> "
+        f"{estimate_tokens(digest['text'], chars_per_token)} "
+        f"estimated tokens per agent prompt"
+    )
+    return initialize_a3_state_from_config(
+        text,
+        a3_config,
+        document_text=digest["text"],
+        precomputed_llm_tags=digest["llm_tags"],
+    )
+
+
+def prepare_a3_state(text: str, a3_config: Dict[str, Any]) -> A3SystemState:
+    """
+    Initializes the A3 state in full-text or digest mode, depending on the document size.
+
+    Args:
+        text: The publication in markdown.
+        a3_config: The `a3_system` config section.
+    """
+    if not use_digest(text, a3_config.get("digest", {}) or {}):
+        return initialize_a3_state_from_config(text, a3_config)
+    return _state_from_digest(text, a3_config, build_document_digest(text, a3_config))
+
+
+async def aprepare_a3_state(text: str, a3_config: Dict[str, Any]) -> A3SystemState:
+    """Async variant of `prepare_a3_state`."""
+    if not use_digest(text, a3_config.get("digest", {}) or {}):
+        return initialize_a3_state_from_config(text, a3_config)
+    digest = await abuild_document_digest(text, a3_config)
+    return _state_from_digest(text, a3_config, digest)
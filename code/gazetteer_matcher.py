@@ -0,0 +1,225 @@
+"""
+Aho-Corasick automaton for matching gazetteer entries against input text.
+
+The automaton is compiled once from the gazetteer (entity name -> entity type) and
+finds every entry in a single pass over the text, with the same case-insensitive,
+word-boundary semantics as the `\\b<entity>\\b` regex it replaces. Compiled automata
+can be pickled to disk and reloaded on process start instead of being rebuilt, and
+loaded automata are shared process-wide.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from paths import GAZETTEER_AUTOMATON_CACHE_PATH, GAZETTEER_ENTITIES_FILE_PATH
+from utils import load_config
+
+# Bump whenever the pickled layout of GazetteerMatcher changes.
+AUTOMATON_FORMAT_VERSION = 1
+
+# (gazetteer path, fingerprint) -> loaded automaton, shared by every graph in the process.
+_matchers: Dict[Tuple[str, str], "GazetteerMatcher"] = {}
+_matchers_lock = threading.Lock()
+
+
+def _fold_case(text: str) -> str:
+    """Lowercases text one character at a time so that character offsets are preserved.
+
+    Characters whose lowercase form is longer than one character (e.g. 'İ') are kept
+    as-is, so positions in the folded text always map 1:1 onto the original text.
+    """
+    return "".join(
+        lowered if len(lowered := char.lower()) == 1 else char for char in text
+    )
+
+
+def _is_word_char(char: str) -> bool:
+    """Mirrors the `\\w` character class used by `re` for str patterns."""
+    return char.isalnum() or char == "_"
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    """Returns True if `\\b` would match at `index` in `text`."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+class GazetteerMatcher:
+    """A compiled Aho-Corasick automaton over gazetteer entries.
+
+    Args:
+        gazetteer: Mapping of entity name to entity type, in priority order.
+        fingerprint: Optional content hash of the source gazetteer, used to validate
+            serialized automata against the file they were built from.
+    """
+
+    def __init__(self, gazetteer: Dict[str, str], fingerprint: str = "") -> None:
+        self.fingerprint = fingerprint
+        self.entries: List[Tuple[str, str]] = []
+        # State 0 is the root. goto[state] maps a character to the next state.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Entry indices that end at each state (including those inherited via fail links).
+        self._outputs: List[List[int]] = [[]]
+
+        for entity_name, entity_type in gazetteer.items():
+            name = str(entity_name)
+            if not name:
+                continue
+            self.entries.append((name, str(entity_type)))
+            self._add_pattern(_fold_case(name), len(self.entries) - 1)
+        self._build_fail_links()
+
+    def _add_pattern(self, pattern: str, entry_index: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(entry_index)
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = (
+                    self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find_entries(self, text: str) -> List[int]:
+        """Returns the indices of all entries found in `text`, in gazetteer order.
+
+        An entry matches when it occurs case-insensitively and is delimited by word
+        boundaries on both sides, exactly as `re.search(r"\\b<entry>\\b", text, re.I)`.
+        """
+        folded = _fold_case(text)
+        goto, fail, outputs, entries = self._goto, self._fail, self._outputs, self.entries
+        found = set()
+        state = 0
+        for position, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            if not _is_boundary(text, end):
+                continue
+            for entry_index in outputs[state]:
+                if entry_index in found:
+                    continue
+                if _is_boundary(text, end - len(entries[entry_index][0])):
+                    found.add(entry_index)
+        return sorted(found)
+
+    def extract(self, text: str) -> List[Dict[str, str]]:
+        """Returns the unique `{"name", "type"}` tags found in `text`."""
+        seen = set()
+        entities = []
+        for entry_index in self.find_entries(text):
+            entity_name, entity_type = self.entries[entry_index]
+            key = (entity_name.lower(), entity_type)
+            if key not in seen:
+                seen.add(key)
+                entities.append(
+                    {"name": entity_name.lower().strip(), "type": entity_type.strip()}
+                )
+        return entities
+
+    def save(self, path: str) -> None:
+        """Serializes the compiled automaton to `path`."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"version": AUTOMATON_FORMAT_VERSION, "matcher": self},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["GazetteerMatcher"]:
+        """Loads a serialized automaton, or returns None if it is missing or stale."""
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != AUTOMATON_FORMAT_VERSION
+            or not isinstance(payload.get("matcher"), cls)
+        ):
+            return None
+        return payload["matcher"]
+
+
+def gazetteer_fingerprint(gazetteer_path: str) -> str:
+    """Returns a content hash of the gazetteer file."""
+    with open(gazetteer_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_gazetteer_matcher(
+    gazetteer_path: str = GAZETTEER_ENTITIES_FILE_PATH,
+    cache_path: Optional[str] = GAZETTEER_AUTOMATON_CACHE_PATH,
+) -> GazetteerMatcher:
+    """
+    Loads the compiled gazetteer automaton from cache, rebuilding it if the gazetteer changed.
+
+    The automaton is loaded once per gazetteer version and shared process-wide.
+
+    Args:
+        gazetteer_path: Path to the gazetteer YAML file (entity name -> entity type).
+        cache_path: Where to store the serialized automaton. Pass None to disable caching.
+
+    Returns:
+        GazetteerMatcher: The compiled automaton.
+    """
+    fingerprint = gazetteer_fingerprint(gazetteer_path)
+    key = (os.path.abspath(gazetteer_path), fingerprint)
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            matcher = _load_or_build(gazetteer_path, cache_path, fingerprint)
+            _matchers[key] = matcher
+    return matcher
+
+
+def _load_or_build(
+    gazetteer_path: str, cache_path: Optional[str], fingerprint: str
+) -> GazetteerMatcher:
+    if cache_path:
+        matcher = GazetteerMatcher.load(cache_path)
+        if matcher is not None and matcher.fingerprint == fingerprint:
+            return matcher
+
+    gazetteer: Dict[str, Any] = load_config(gazetteer_path) or {}
+    matcher = GazetteerMatcher(gazetteer, fingerprint=fingerprint)
+    if cache_path:
+        try:
+            matcher.save(cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not cache gazetteer automaton: {e}")
+    return matcher
@@ -0,0 +1,325 @@
+"""
+Shared GitHub client for the MCP repository-information server.
+
+- One PyGithub client per token, created on first use and reused, so every call with
+  the same token shares its HTTP connection pool.
+- Blocking PyGithub calls run in a bounded thread pool (`arun`), so async tool handlers
+  do not stall the server's event loop.
+- READMEs and owner profiles are cached. Within `ttl_seconds` a cached response is
+  served without a request; after that it is revalidated with a conditional request
+  (`If-None-Match` / `If-Modified-Since`), and a `304 Not Modified` answer, which does
+  not count against the GitHub rate limit, renews it.
+- Async requests for a path that is already being fetched with the same token wait
+  for that request instead of sending another one, and `afetch_many` fetches many
+  items with bounded parallelism and per-item errors (used by the batch tools).
+
+Configured in the `github` section of `config/config.yaml`. `base_url` can point at a
+local stub server (e.g. for load tests); the `GITHUB_API_URL` environment variable
+overrides it.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from kv_cache import LRUCache
+from utils import load_config
+
+if TYPE_CHECKING:
+    from github import Github
+
+DEFAULT_BASE_URL = "https://api.github.com"
+GITHUB_API_URL_ENV = "GITHUB_API_URL"
+DEFAULT_TIMEOUT_SECONDS = 15
+DEFAULT_POOL_SIZE = 20
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_CACHE_TTL_SECONDS = 300
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_BATCH_MAX_CONCURRENCY = 8
+
+OWNER_INFO_FIELDS = (
+    "login",
+    "name",
+    "type",
+    "bio",
+    "company",
+    "location",
+    "email",
+    "followers",
+    "following",
+)
+
+
+class GitHubClientPool:
+    """Per-token PyGithub clients, a bounded worker pool and a conditional-request cache.
+
+    Args:
+        github_config: The `github` config section.
+    """
+
+    def __init__(self, github_config: Optional[Dict[str, Any]] = None):
+        github_config = github_config or {}
+        self.base_url = (
+            os.environ.get(GITHUB_API_URL_ENV)
+            or github_config.get("base_url")
+            or DEFAULT_BASE_URL
+        )
+        self.timeout_seconds = github_config.get(
+            "timeout_seconds", DEFAULT_TIMEOUT_SECONDS
+        )
+        self.pool_size = github_config.get("pool_size", DEFAULT_POOL_SIZE)
+        self.seconds_between_requests = github_config.get("seconds_between_requests")
+        self._clients: Dict[Optional[str], "Github"] = {}
+        # Cache key -> future of the request currently fetching it.
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=github_config.get("max_workers", DEFAULT_MAX_WORKERS),
+            thread_name_prefix="github",
+        )
+
+        cache_config = github_config.get("cache", {}) or {}
+        self.cache_ttl_seconds = cache_config.get(
+            "ttl_seconds", DEFAULT_CACHE_TTL_SECONDS
+        )
+        # Expired entries are kept (up to `max_entries`) for revalidation.
+        self._cache = (
+            LRUCache(cache_config.get("max_entries", DEFAULT_CACHE_MAX_ENTRIES))
+            if cache_config.get("enabled", True)
+            else None
+        )
+        self._stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0}
+
+    def client(self, token: Optional[str] = None) -> "Github":
+        """Returns the shared PyGithub client for `token` (unauthenticated if None)."""
+        with self._lock:
+            if token not in self._clients:
+                from github import Auth, Github
+
+                self._clients[token] = Github(
+                    auth=Auth.Token(token) if token else None,
+                    base_url=self.base_url,
+                    timeout=self.timeout_seconds,
+                    pool_size=self.pool_size,
+                    seconds_between_requests=self.seconds_between_requests,
+                )
+            return self._clients[token]
+
+    async def arun(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs a blocking call in the GitHub worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def get_json(self, path: str, token: Optional[str] = None) -> Any:
+        """
+        GETs an API path (e.g. `/users/octocat`) through the response cache.
+
+        Raises:
+            github.GithubException: On an error response (e.g. `UnknownObjectException`
+                for a 404).
+        """
+        key = self._cache_key(path, token)
+        entry = self._cache.get(key) if self._cache is not None else None
+        fresh = entry is not None and (
+            time.time() - entry["fetched_at"] < self.cache_ttl_seconds
+        )
+        if fresh:
+            self._count("fresh_hits")
+            return entry["data"]
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        status, response_headers, body = self.client(token).requester.requestJson(
+            "GET", path, headers=headers
+        )
+        if status == 304 and entry is not None:
+            self._count("revalidated")
+            self._store(key, entry["data"], entry["etag"], entry["last_modified"])
+            return entry["data"]
+        self._count("misses")
+
+        if status >= 400:
+            from github.Requester import Requester
+
+            try:
+                error = json.loads(body) if body else {}
+            except ValueError:
+                error = {"message": body}
+            raise Requester.createException(status, response_headers, error)
+        data = json.loads(body) if body else None
+        headers = {name.lower(): value for name, value in response_headers.items()}
+        self._store(key, data, headers.get("etag"), headers.get("last-modified"))
+        return data
+
+    async def aget_json(self, path: str, token: Optional[str] = None) -> Any:
+        """
+        Async variant of `get_json`; runs in the GitHub worker pool.
+
+        Concurrent calls for the same path and token share one request.
+        """
+        key = self._cache_key(path, token)
+        with self._lock:
+            future = self._inflight.get(key)
+            is_new = future is None
+            if is_new:
+                future = self._executor.submit(self.get_json, path, token)
+                self._inflight[key] = future
+        if is_new:
+            future.add_done_callback(lambda _: self._finish_inflight(key, future))
+        return await asyncio.wrap_future(future)
+
+    def _finish_inflight(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def get_readme(self, repo_name: str, token: Optional[str] = None) -> str:
+        """Returns the decoded README of `owner/repo`."""
+        return _decode_readme(self.get_json(f"/repos/{repo_name}/readme", token))
+
+    def get_owner_info(
+        self, owner_name: str, token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Returns the public profile fields of a GitHub user or organization."""
+        return _owner_fields(self.get_json(f"/users/{owner_name}", token))
+
+    async def aget_readme(self, repo_name: str, token: Optional[str] = None) -> str:
+        """Async variant of `get_readme`."""
+        return _decode_readme(await self.aget_json(f"/repos/{repo_name}/readme", token))
+
+    async def aget_owner_info(
+        self, owner_name: str, token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of `get_owner_info`."""
+        return _owner_fields(await self.aget_json(f"/users/{owner_name}", token))
+
+    async def afetch_many(
+        self,
+        names: Sequence[str],
+        fetch: Callable[[str, Optional[str]], Awaitable[Any]],
+        token: Optional[str] = None,
+        max_concurrency: int = DEFAULT_BATCH_MAX_CONCURRENCY,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetches many items concurrently, at most `max_concurrency` at a time.
+
+        Args:
+            names: Repository or owner names; duplicates are fetched once.
+            fetch: e.g. `aget_readme` or `aget_owner_info`.
+            token: GitHub token used for every item.
+            max_concurrency: Maximum number of items of this call in flight at once.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per name, in input order, `{"result": ...}` or
+            `{"error": "<exception type>: <message>"}`.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch_one(name: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return {"result": await fetch(name, token)}
+                except Exception as e:
+                    return {"error": f"{type(e).__name__}: {e}"}
+
+        unique_names = list(dict.fromkeys(names))
+        results = await asyncio.gather(*(fetch_one(name) for name in unique_names))
+        return dict(zip(unique_names, results))
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of fresh cache hits, revalidated (304) responses and misses."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _store(
+        self, key: str, data: Any, etag: Optional[str], last_modified: Optional[str]
+    ) -> None:
+        if self._cache is None:
+            return
+        entry = {
+            "data": data,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        self._cache.set(key, entry)
+
+    @staticmethod
+    def _cache_key(path: str, token: Optional[str]) -> str:
+        # Responses can differ per token (private repositories), so the key includes a
+        # hash of the token rather than the token itself.
+        token_hash = ""
+        if token:
+            token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+        return f"{token_hash}:{path}"
+
+    def close(self) -> None:
+        """Closes every client and shuts down the worker pool."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+        self._executor.shutdown(wait=False)
+
+
+def _decode_readme(readme: Dict[str, Any]) -> str:
+    return base64.b64decode(readme["content"]).decode("utf-8")
+
+
+def _owner_fields(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: user.get(field) for field in OWNER_INFO_FIELDS}
+
+
+def cap_text_results(
+    results: Dict[str, Dict[str, Any]], max_chars: int, max_total_chars: int
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Truncates the texts in `afetch_many` results, so one response stays bounded.
+
+    Each text keeps at most `max_chars` characters, and all texts together at most
+    `max_total_chars` (earlier items first). Truncated items are marked with
+    `"truncated": True` and carry their full length in `"chars"`.
+    """
+    remaining = max_total_chars
+    capped = {}
+    for name, item in results.items():
+        if "result" not in item:
+            capped[name] = item
+            continue
+        text = item["result"]
+        limit = max(0, min(max_chars, remaining))
+        capped[name] = {
+            "result": text[:limit],
+            "chars": len(text),
+            "truncated": len(text) > limit,
+        }
+        remaining -= len(capped[name]["result"])
+    return capped
+
+
+_pool: Optional[GitHubClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_github_pool() -> GitHubClientPool:
+    """Returns the process-wide GitHub client pool configured in the `github` section."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GitHubClientPool(load_config().get("github", {}))
+        return _pool
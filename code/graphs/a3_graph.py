@@ -1,4 +1,5 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
 
 
@@ -12,6 +13,8 @@ from consts import (
 )
 from states.a3_state import A3SystemState
 from graphs.tag_generation_graph import add_tag_generation_flow
+from instrumentation import instrument_graph
+from langgraph_utils import get_cached_graph
 from nodes.a3_nodes import (
     make_manager_node,
     make_title_generator_node,
@@ -23,9 +26,16 @@ from nodes.a3_nodes import (
 )
 
 
-def build_a3_graph(a3_config: Dict[str, Any]) -> StateGraph:
+def build_a3_graph(
+    a3_config: Dict[str, Any], checkpointer: Optional[BaseCheckpointSaver] = None
+) -> StateGraph:
     """
     Creates and returns the agentic authoring graph with hierarchical structure and feedback loop.
+
+    Args:
+        a3_config: The A3 system config section.
+        checkpointer: Optional checkpointer (see `checkpointing.get_checkpointer`). With
+            one, every superstep is saved per thread id and failed runs can be resumed.
     """
     # Create the graph
     graph = StateGraph(A3SystemState)
@@ -36,23 +46,29 @@ def build_a3_graph(a3_config: Dict[str, Any]) -> StateGraph:
     graph.add_node(MANAGER, manager_node)
 
     # worker nodes to generate title, TLDR, and references
+    compaction_config = a3_config.get("message_compaction", {})
     title_gen_node = make_title_generator_node(
-        llm_model=a3_config["agents"][TITLE_GENERATOR]["llm"]
+        llm_model=a3_config["agents"][TITLE_GENERATOR]["llm"],
+        compaction_config=compaction_config,
     )
     graph.add_node(TITLE_GENERATOR, title_gen_node)
 
     tldr_gen_node = make_tldr_generator_node(
-        llm_model=a3_config["agents"][TLDR_GENERATOR]["llm"]
+        llm_model=a3_config["agents"][TLDR_GENERATOR]["llm"],
+        compaction_config=compaction_config,
     )
     graph.add_node(TLDR_GENERATOR, tldr_gen_node)
 
     references_generator_node = make_references_generator_node(
-        llm_model=a3_config["agents"][REFERENCES_GENERATOR]["llm"]
+        llm_model=a3_config["agents"][REFERENCES_GENERATOR]["llm"],
+        search_config=a3_config.get("search", {}),
+        compaction_config=compaction_config,
     )
     graph.add_node(REFERENCES_GENERATOR, references_generator_node)
 
     references_selector_node = make_references_selector_node(
-        llm_model=a3_config["agents"][REFERENCES_SELECTOR]["llm"]
+        llm_model=a3_config["agents"][REFERENCES_SELECTOR]["llm"],
+        compaction_config=compaction_config,
     )
     graph.add_node(REFERENCES_SELECTOR, references_selector_node)
 
@@ -78,7 +94,12 @@ def build_a3_graph(a3_config: Dict[str, Any]) -> StateGraph:
     )
 
     graph.add_edge(tag_gen_exit_node, END)
-    graph.add_edge([TITLE_GENERATOR, TLDR_GENERATOR, REFERENCES_SELECTOR], REVIEWER)
+    # No barrier join here: the reviewer is triggered by every generator that finishes
+    # and waits until all components sent out for (re)generation have reported back.
+    # Revision rounds then only involve the rejected components.
+    graph.add_edge(TITLE_GENERATOR, REVIEWER)
+    graph.add_edge(TLDR_GENERATOR, REVIEWER)
+    graph.add_edge(REFERENCES_SELECTOR, REVIEWER)
 
     graph.add_conditional_edges(
         REVIEWER,
@@ -91,4 +112,20 @@ def build_a3_graph(a3_config: Dict[str, Any]) -> StateGraph:
         },
     )
 
-    return graph.compile()
+    return instrument_graph(graph.compile(name="a3_graph", checkpointer=checkpointer))
+
+
+def get_a3_graph(
+    a3_config: Dict[str, Any], checkpointer: Optional[BaseCheckpointSaver] = None
+) -> StateGraph:
+    """
+    Returns the A3 graph for this config and checkpointer, compiled once per process.
+
+    Use it instead of `build_a3_graph` where the graph is built per document or run.
+    """
+    return get_cached_graph(
+        "a3_graph",
+        a3_config,
+        lambda: build_a3_graph(a3_config, checkpointer=checkpointer),
+        extra_key=checkpointer,
+    )
@@ -7,6 +7,7 @@ from consts import (
     GAZETTEER_TAGS_GENERATOR,
     TAG_TYPE_ASSIGNER,
     TAGS_AGGREGATOR,
+    TAGS_RANKER,
     TAGS_SELECTOR,
 )
 from nodes.tag_generation import (
@@ -14,12 +15,15 @@ from nodes.tag_generation import (
     make_spacy_tag_generator_node,
     make_gazetteer_tag_generator_node,
     make_tag_type_assigner_node,
-    aggregate_tags_node,
+    make_tags_aggregator_node,
+    make_tags_ranker_node,
     make_tag_selector_node,
 )
 from states.tag_generation_state import (
     TagGenerationState,
 )
+from instrumentation import instrument_graph
+from langgraph_utils import get_cached_graph
 
 
 def build_tag_generation_graph(tag_generation_config: Dict[str, Any]) -> StateGraph:
@@ -33,7 +37,21 @@ def build_tag_generation_graph(tag_generation_config: Dict[str, Any]) -> StateGr
     )
 
     graph.add_edge(final_node, END)
-    return graph.compile()
+    return instrument_graph(graph.compile(name="tag_generation_graph"))
+
+
+def get_tag_generation_graph(tag_generation_config: Dict[str, Any]) -> StateGraph:
+    """
+    Returns the tag generation graph for this config, compiled once per process.
+
+    Use it instead of `build_tag_generation_graph` where the graph is built per
+    document or run.
+    """
+    return get_cached_graph(
+        "tag_generation_graph",
+        tag_generation_config,
+        lambda: build_tag_generation_graph(tag_generation_config),
+    )
 
 
 def add_tag_generation_flow(
@@ -58,18 +76,32 @@ def add_tag_generation_flow(
     )
     graph.add_node(LLM_TAGS_GENERATOR, llm_tags_generator_node)
 
-    spacy_tag_generator_node = make_spacy_tag_generator_node()
+    spacy_tag_generator_node = make_spacy_tag_generator_node(
+        spacy_config=tag_generation_config.get("spacy_ner", {})
+    )
     graph.add_node(SPACY_TAGS_GENERATOR, spacy_tag_generator_node)
 
     tag_type_assigner_node = make_tag_type_assigner_node(
-        llm_model=tag_generation_config["agents"][TAG_TYPE_ASSIGNER]["llm"]
+        llm_model=tag_generation_config["agents"][TAG_TYPE_ASSIGNER]["llm"],
+        tag_types=tag_generation_config["tag_types"],
+        classifier_config=tag_generation_config.get("tag_type_classifier", {}),
     )
     graph.add_node(TAG_TYPE_ASSIGNER, tag_type_assigner_node)
 
     gazetteer_tag_generator_node = make_gazetteer_tag_generator_node()
     graph.add_node(GAZETTEER_TAGS_GENERATOR, gazetteer_tag_generator_node)
 
-    graph.add_node(TAGS_AGGREGATOR, aggregate_tags_node)
+    tags_aggregator_node = make_tags_aggregator_node(
+        tag_types=tag_generation_config["tag_types"],
+        normalization_config=tag_generation_config.get("tag_normalization", {}),
+    )
+    graph.add_node(TAGS_AGGREGATOR, tags_aggregator_node)
+
+    tags_ranker_node = make_tags_ranker_node(
+        max_tags=tag_generation_config["max_tags"],
+        ranking_config=tag_generation_config.get("tag_ranking", {}),
+    )
+    graph.add_node(TAGS_RANKER, tags_ranker_node)
 
     tags_selector_node = make_tag_selector_node(
         llm_model=tag_generation_config["agents"][TAGS_SELECTOR]["llm"],
@@ -88,6 +120,7 @@ def add_tag_generation_flow(
         TAGS_AGGREGATOR,
     )
 
-    graph.add_edge(TAGS_AGGREGATOR, TAGS_SELECTOR)
+    graph.add_edge(TAGS_AGGREGATOR, TAGS_RANKER)
+    graph.add_edge(TAGS_RANKER, TAGS_SELECTOR)
 
     return TAGS_SELECTOR
@@ -0,0 +1,578 @@
+"""
+Per-node tracing and metrics for the LangGraph graphs.
+
+`GraphInstrumentation` is a LangChain callback handler. When instrumentation is enabled
+it is registered as a configure hook, so it sees every run in the process without
+callers passing it in the run config; runs of graphs registered with `instrument_graph`
+are traced node by node, including the nodes added by `add_tag_generation_flow`.
+For each node invocation it records:
+
+- wall time
+- queue wait: time between the first node of the same superstep starting and this
+  node starting, plus time async LLM calls waited for a provider slot (see `llm.ainvoke_llm`)
+- LLM calls and input / cached input / output tokens from the provider's usage metadata
+- retries: repeated attempts of the node within a superstep, plus `on_retry` events
+- payload sizes: characters of prompt sent to LLMs and bytes of the node's state update
+- message compaction: prompt characters before and after `message_compaction` was applied
+
+Each graph run is exported as one trace of OpenTelemetry-compatible spans (a graph
+span with one child span per node invocation) appended as an OTLP/JSON line to
+`spans_path`, and also emitted through the OpenTelemetry API when it is installed.
+Aggregated metrics are written to `metrics_path` in the Prometheus text format and can
+be served over HTTP at `/metrics` on `metrics_port`.
+
+Configured in the `instrumentation` section of config.yaml.
+"""
+
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+from llm import LLM_QUEUE_WAIT_METADATA_KEY
+from message_compaction import COMPACTION_EVENT
+from paths import ROOT_DIR
+from token_usage import is_local_cache_hit, read_generation_usage
+from utils import load_config
+
+SERVICE_NAME = "rt-agentic-authoring-assistant"
+METRIC_PREFIX = "graph_node"
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+_instrumentation: Optional["GraphInstrumentation"] = None
+_instrumentation_loaded = False
+_instrumentation_lock = threading.Lock()
+
+
+class NodeSpan:
+    """Measurements of one node invocation."""
+
+    def __init__(self, run_id: UUID, graph_name: str, node: str, step: Optional[int]):
+        self.run_id = run_id
+        self.graph_name = graph_name
+        self.node = node
+        self.step = step
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_OK
+        self.error: Optional[str] = None
+        self.attempt = 1
+        self.schedule_wait_seconds = 0.0
+        self.llm_queue_wait_seconds = 0.0
+        self.retries = 0
+        self.llm_calls = 0
+        self.local_cache_hits = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self.output_tokens = 0
+        self.prompt_chars = 0
+        self.output_bytes = 0
+        self.compaction_chars_before = 0
+        self.compaction_chars_after = 0
+
+    @property
+    def duration_seconds(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    @property
+    def queue_wait_seconds(self) -> float:
+        return self.schedule_wait_seconds + self.llm_queue_wait_seconds
+
+    @property
+    def compaction_ratio(self) -> float:
+        if not self.compaction_chars_before:
+            return 1.0
+        return self.compaction_chars_after / self.compaction_chars_before
+
+    def attributes(self) -> Dict[str, Any]:
+        return {
+            "langgraph.node": self.node,
+            "langgraph.step": self.step if self.step is not None else -1,
+            "node.attempt": self.attempt,
+            "node.retries": self.retries,
+            "node.queue_wait_seconds": round(self.queue_wait_seconds, 6),
+            "node.schedule_wait_seconds": round(self.schedule_wait_seconds, 6),
+            "llm.queue_wait_seconds": round(self.llm_queue_wait_seconds, 6),
+            "llm.calls": self.llm_calls,
+            "llm.local_cache_hits": self.local_cache_hits,
+            "llm.input_tokens": self.input_tokens,
+            "llm.cached_input_tokens": self.cached_input_tokens,
+            "llm.output_tokens": self.output_tokens,
+            "payload.prompt_chars": self.prompt_chars,
+            "payload.output_bytes": self.output_bytes,
+            "payload.compaction_ratio": round(self.compaction_ratio, 4),
+        }
+
+
+class GraphRun:
+    """The root span of one graph invocation and its node spans."""
+
+    def __init__(self, run_id: UUID, graph_name: str):
+        self.run_id = run_id
+        self.graph_name = graph_name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_OK
+        self.error: Optional[str] = None
+        self.nodes: List[NodeSpan] = []
+        self.step_started_at: Dict[Any, float] = {}
+        self.attempts: Dict[Tuple[Any, str], int] = defaultdict(int)
+
+
+class PrometheusMetrics:
+    """Thread-safe counters rendered in the Prometheus text exposition format."""
+
+    COUNTERS = {
+        "invocations_total": "Node invocations.",
+        "errors_total": "Node invocations that raised.",
+        "retries_total": "Node retries.",
+        "duration_seconds_sum": "Total node wall time in seconds.",
+        "queue_wait_seconds_sum": "Total time nodes waited to be scheduled or for an LLM slot.",
+        "llm_calls_total": "LLM calls made by the node.",
+        "llm_local_cache_hits_total": "LLM calls answered by the local response cache.",
+        "llm_input_tokens_total": "LLM input tokens.",
+        "llm_cached_input_tokens_total": "LLM input tokens served from the provider's prompt cache.",
+        "llm_output_tokens_total": "LLM output tokens.",
+        "prompt_chars_total": "Characters of prompt sent to LLMs.",
+        "output_bytes_total": "Bytes of state updates returned by the node.",
+        "compaction_chars_before_total": "Message history characters before compaction.",
+        "compaction_chars_after_total": "Message history characters after compaction.",
+    }
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, str, str], float] = defaultdict(float)
+
+    def record(self, span: NodeSpan) -> None:
+        values = {
+            "invocations_total": 1,
+            "errors_total": 1 if span.status == STATUS_ERROR else 0,
+            "retries_total": span.retries,
+            "duration_seconds_sum": span.duration_seconds,
+            "queue_wait_seconds_sum": span.queue_wait_seconds,
+            "llm_calls_total": span.llm_calls,
+            "llm_local_cache_hits_total": span.local_cache_hits,
+            "llm_input_tokens_total": span.input_tokens,
+            "llm_cached_input_tokens_total": span.cached_input_tokens,
+            "llm_output_tokens_total": span.output_tokens,
+            "prompt_chars_total": span.prompt_chars,
+            "output_bytes_total": span.output_bytes,
+            "compaction_chars_before_total": span.compaction_chars_before,
+            "compaction_chars_after_total": span.compaction_chars_after,
+        }
+        with self._lock:
+            for name, value in values.items():
+                self._values[(name, span.graph_name, span.node)] += value
+
+    def render(self) -> str:
+        with self._lock:
+            values = dict(self._values)
+        lines = []
+        for name, help_text in self.COUNTERS.items():
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (value_name, graph_name, node), value in sorted(values.items()):
+                if value_name == name:
+                    lines.append(
+                        f'{metric}{{graph="{graph_name}",node="{node}"}} {value:g}'
+                    )
+        metric = f"{METRIC_PREFIX}_compaction_ratio"
+        lines.append(
+            f"# HELP {metric} Message history characters kept by compaction (after / before)."
+        )
+        lines.append(f"# TYPE {metric} gauge")
+        for (value_name, graph_name, node), before in sorted(values.items()):
+            if value_name == "compaction_chars_before_total" and before:
+                after = values.get(
+                    ("compaction_chars_after_total", graph_name, node), 0.0
+                )
+                lines.append(
+                    f'{metric}{{graph="{graph_name}",node="{node}"}} {after / before:.4g}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def _otlp_status(status: str, error: Optional[str]) -> Dict[str, Any]:
+    if status == STATUS_ERROR:
+        return {"code": 2, "message": error or ""}
+    return {"code": 1}
+
+
+def graph_run_to_otlp(run: GraphRun) -> Dict[str, Any]:
+    """Converts a finished graph run into an OTLP/JSON `ExportTraceServiceRequest`."""
+    trace_id = run.run_id.hex
+    root_span_id = run.run_id.hex[:16]
+    spans = [
+        {
+            "traceId": trace_id,
+            "spanId": root_span_id,
+            "name": run.graph_name,
+            "kind": 1,
+            "startTimeUnixNano": str(run.start_ns),
+            "endTimeUnixNano": str(run.end_ns),
+            "attributes": _otlp_attributes(
+                {"langgraph.graph": run.graph_name, "node.count": len(run.nodes)}
+            ),
+            "status": _otlp_status(run.status, run.error),
+        }
+    ]
+    for span in run.nodes:
+        spans.append(
+            {
+                "traceId": trace_id,
+                "spanId": span.run_id.hex[:16],
+                "parentSpanId": root_span_id,
+                "name": span.node,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes()),
+                "status": _otlp_status(span.status, span.error),
+            }
+        )
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": SERVICE_NAME})
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def _emit_opentelemetry(run: GraphRun) -> None:
+    """Re-emits a finished graph run through the OpenTelemetry API, if it is installed."""
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return
+    tracer = trace.get_tracer(__name__)
+    root = tracer.start_span(
+        run.graph_name,
+        start_time=run.start_ns,
+        attributes={"langgraph.graph": run.graph_name},
+    )
+    context = trace.set_span_in_context(root)
+    for span in run.nodes:
+        child = tracer.start_span(
+            span.node,
+            context=context,
+            start_time=span.start_ns,
+            attributes=span.attributes(),
+        )
+        if span.status == STATUS_ERROR:
+            child.set_status(trace.Status(trace.StatusCode.ERROR, span.error))
+        child.end(end_time=span.end_ns)
+    if run.status == STATUS_ERROR:
+        root.set_status(trace.Status(trace.StatusCode.ERROR, run.error))
+    root.end(end_time=run.end_ns)
+
+
+class GraphInstrumentation(BaseCallbackHandler):
+    """Callback handler that turns graph runs into node spans and metrics.
+
+    Args:
+        spans_path: OTLP/JSON lines file that each finished graph run is appended to.
+        metrics_path: Prometheus text file rewritten after each finished graph run.
+        use_opentelemetry: Also emit spans through the OpenTelemetry API if installed.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        spans_path: Optional[str] = None,
+        metrics_path: Optional[str] = None,
+        use_opentelemetry: bool = True,
+    ):
+        self.spans_path = spans_path
+        self.metrics_path = metrics_path
+        self.use_opentelemetry = use_opentelemetry
+        self.metrics = PrometheusMetrics()
+        self.graph_names: set = set()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._runs: Dict[UUID, GraphRun] = {}
+        self._spans: Dict[UUID, NodeSpan] = {}
+        # Run id of every nested run -> the node span it belongs to.
+        self._owners: Dict[UUID, Optional[UUID]] = {}
+
+    # ---------------------------------------------------------------------------
+    # Chain (graph and node) callbacks
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            if parent_run_id is None:
+                if kwargs.get("name") in self.graph_names:
+                    self._runs[run_id] = GraphRun(run_id, kwargs["name"])
+                return
+
+            node = (metadata or {}).get("langgraph_node")
+            run = self._runs.get(parent_run_id)
+            if run is None or node is None or kwargs.get("name") != node:
+                # A runnable nested inside a node, or outside any traced graph.
+                owner = self._owners.get(parent_run_id)
+                if owner is not None:
+                    self._owners[run_id] = owner
+                return
+
+            step = (metadata or {}).get("langgraph_step")
+            span = NodeSpan(run_id, run.graph_name, node, step)
+            now = time.perf_counter()
+            step_started_at = run.step_started_at.setdefault(step, now)
+            span.schedule_wait_seconds = now - step_started_at
+            run.attempts[(step, node)] += 1
+            span.attempt = run.attempts[(step, node)]
+            span.retries = span.attempt - 1
+            run.nodes.append(span)
+            self._spans[run_id] = span
+            self._owners[run_id] = run_id
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_chain(run_id, outputs=outputs)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._finish_chain(run_id, error=error)
+
+    def _finish_chain(
+        self,
+        run_id: UUID,
+        outputs: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        finished_run = None
+        with self._lock:
+            self._owners.pop(run_id, None)
+            span = self._spans.pop(run_id, None)
+            if span is not None:
+                span.end_ns = time.time_ns()
+                if error is not None:
+                    span.status = STATUS_ERROR
+                    span.error = f"{type(error).__name__}: {error}"
+                else:
+                    span.output_bytes = len(
+                        json.dumps(outputs, default=str).encode("utf-8")
+                    )
+            run = self._runs.get(run_id)
+            if run is not None:
+                run.end_ns = time.time_ns()
+                if error is not None:
+                    run.status = STATUS_ERROR
+                    run.error = f"{type(error).__name__}: {error}"
+                finished_run = self._runs.pop(run_id)
+        if span is not None:
+            self.metrics.record(span)
+        if finished_run is not None:
+            self._export(finished_run)
+
+    def on_retry(
+        self, retry_state: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any
+    ) -> None:
+        with self._lock:
+            owner = self._owners.get(run_id) or self._owners.get(parent_run_id)
+            span = self._spans.get(owner) if owner else None
+            if span is not None:
+                span.retries += 1
+
+    def on_custom_event(
+        self, name: str, data: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        if name != COMPACTION_EVENT:
+            return
+        with self._lock:
+            owner = self._owners.get(run_id)
+            span = self._spans.get(owner) if owner else None
+            if span is not None:
+                span.compaction_chars_before += data["chars_before"]
+                span.compaction_chars_after += data["chars_after"]
+
+    # ---------------------------------------------------------------------------
+    # LLM callbacks
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        with self._lock:
+            owner = self._owners.get(parent_run_id)
+            span = self._spans.get(owner) if owner else None
+            if span is None:
+                return
+            self._owners[run_id] = owner
+            span.llm_calls += 1
+            span.llm_queue_wait_seconds += (metadata or {}).get(
+                LLM_QUEUE_WAIT_METADATA_KEY, 0.0
+            )
+            span.prompt_chars += sum(
+                len(str(message.content)) for batch in messages for message in batch
+            )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            owner = self._owners.pop(run_id, None)
+            span = self._spans.get(owner) if owner else None
+            if span is None:
+                return
+            for generations in response.generations:
+                for generation in generations:
+                    if is_local_cache_hit(generation):
+                        span.local_cache_hits += 1
+                        continue
+                    usage = read_generation_usage(generation)
+                    if usage is None:
+                        continue
+                    span.input_tokens += usage["input_tokens"]
+                    span.cached_input_tokens += usage["cached_input_tokens"]
+                    span.output_tokens += usage["output_tokens"]
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        with self._lock:
+            self._owners.pop(run_id, None)
+
+    # ---------------------------------------------------------------------------
+    # Export
+
+    def _export(self, run: GraphRun) -> None:
+        try:
+            with self._file_lock:
+                if self.spans_path:
+                    os.makedirs(os.path.dirname(self.spans_path), exist_ok=True)
+                    with open(self.spans_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(graph_run_to_otlp(run)) + "\n")
+                if self.metrics_path:
+                    os.makedirs(os.path.dirname(self.metrics_path), exist_ok=True)
+                    tmp_path = f"{self.metrics_path}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write(self.metrics.render())
+                    os.replace(tmp_path, self.metrics_path)
+            if self.use_opentelemetry:
+                _emit_opentelemetry(run)
+        except Exception as e:
+            # Telemetry must never fail a graph run.
+            print(f"⚠️ Could not export telemetry: {e}")
+
+
+def serve_metrics(metrics: PrometheusMetrics, port: int, host: str = "127.0.0.1"):
+    """Serves `metrics` at http://<host>:<port>/metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Serving metrics at http://{host}:{port}/metrics")
+    return server
+
+
+def _resolve_path(path: Optional[str]) -> Optional[str]:
+    if not path:
+        return None
+    return path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
+
+
+def get_instrumentation() -> Optional[GraphInstrumentation]:
+    """
+    Returns the process-wide instrumentation from the `instrumentation` config section.
+
+    Returns None if instrumentation is disabled. The metrics endpoint, if configured,
+    is started on first use.
+    """
+    global _instrumentation, _instrumentation_loaded
+    with _instrumentation_lock:
+        if not _instrumentation_loaded:
+            config = load_config().get("instrumentation", {}) or {}
+            if config.get("enabled", False):
+                _instrumentation = GraphInstrumentation(
+                    spans_path=_resolve_path(config.get("spans_path")),
+                    metrics_path=_resolve_path(config.get("metrics_path")),
+                    use_opentelemetry=config.get("use_opentelemetry", True),
+                )
+                # Graph-level callbacks are replaced by run-level ones, so hook into
+                # callback configuration instead to see every run.
+                register_configure_hook(
+                    ContextVar("graph_instrumentation", default=_instrumentation),
+                    inheritable=True,
+                )
+                if config.get("metrics_port"):
+                    serve_metrics(
+                        _instrumentation.metrics,
+                        int(config["metrics_port"]),
+                        host=config.get("metrics_host", "127.0.0.1"),
+                    )
+            _instrumentation_loaded = True
+    return _instrumentation
+
+
+def instrument_graph(compiled_graph: Any) -> Any:
+    """
+    Registers a compiled graph for tracing, keyed by its name.
+
+    Every node the graph runs is then traced, whichever way the graph is invoked and
+    whatever callbacks the caller passes. Does nothing when instrumentation is disabled.
+
+    Returns:
+        The graph, unchanged.
+    """
+    instrumentation = get_instrumentation()
+    if instrumentation is not None:
+        with instrumentation._lock:
+            instrumentation.graph_names.add(compiled_graph.get_name())
+    return compiled_graph
@@ -1,10 +1,21 @@
-from typing import Callable, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Any, Hashable, Optional, TypeVar
 from langgraph.graph import StateGraph
+from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.runnables.graph import MermaidDrawMethod
 import os
 
 from llm import get_llm
 from paths import OUTPUTS_DIR
+from utils import config_hash
+
+T = TypeVar("T")
+
+# Compiled graphs kept by `get_cached_graph`, least recently used first.
+GRAPH_CACHE_MAX_SIZE = 16
+_graph_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+_graph_cache_lock = threading.Lock()
 
 
 def with_llm_node(
@@ -25,18 +36,134 @@ def with_llm_node(
     return handler_factory(llm)
 
 
+def as_graph_node(
+    func: Callable[[Dict[str, Any]], Dict[str, Any]],
+    afunc: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+) -> Runnable:
+    """
+    Combines the sync and async implementations of a node into one LangGraph node.
+
+    The node runs `func` when the graph is driven with `invoke`/`stream`, and `afunc`
+    when it is driven with `ainvoke`/`astream`.
+
+    Args:
+        func: The synchronous node function.
+        afunc: The asynchronous node function.
+
+    Returns:
+        A runnable that can be passed to `StateGraph.add_node`.
+    """
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
+def lazy_resource(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Wraps a resource factory so that the resource is built on first use.
+
+    Node factories use it for LLM clients, search backends and matchers, so building a
+    graph does not construct (or import the libraries of) anything a run never touches.
+    The returned getter is thread-safe and builds the resource at most once.
+
+    Args:
+        factory: A no-argument function that builds the resource.
+
+    Returns:
+        A no-argument function returning the resource.
+    """
+    lock = threading.Lock()
+    resource = []
+
+    def get() -> T:
+        if not resource:
+            with lock:
+                if not resource:
+                    resource.append(factory())
+        return resource[0]
+
+    return get
+
+
+def get_cached_graph(
+    name: str,
+    config: Dict[str, Any],
+    build: Callable[[], Any],
+    extra_key: Optional[Hashable] = None,
+) -> Any:
+    """
+    Returns the compiled graph built by `build` for this config, building it once.
+
+    Graphs are cached per process, keyed on `name`, the hash of `config` and
+    `extra_key` (e.g. the checkpointer), so callers that build the same graph for every
+    document or request compile it only once. A changed config builds a new graph.
+
+    Args:
+        name: The graph name.
+        config: The config the graph is built from.
+        build: Builds and compiles the graph.
+        extra_key: Anything else the built graph depends on.
+    """
+    key = (name, config_hash(config), extra_key)
+    with _graph_cache_lock:
+        graph = _graph_cache.get(key)
+        if graph is not None:
+            _graph_cache.move_to_end(key)
+            return graph
+        graph = build()
+        _graph_cache[key] = graph
+        while len(_graph_cache) > GRAPH_CACHE_MAX_SIZE:
+            _graph_cache.popitem(last=False)
+        return graph
+
+
+def clear_graph_cache() -> None:
+    """Drops every graph cached by `get_cached_graph`."""
+    with _graph_cache_lock:
+        _graph_cache.clear()
+
+
 def save_graph_visualization(
     graph: StateGraph,
     save_dir: str = OUTPUTS_DIR,
     graph_name: str = "graph",
+    image_format: str = "mermaid",
 ):
-    """Render and save the LangGraph structure as a Mermaid-based PNG image."""
+    """
+    Saves the LangGraph structure.
+
+    By default the Mermaid source is written to `<graph_name>.mmd`, which needs no
+    network access. With `image_format="png"` the diagram is rendered to a PNG by the
+    mermaid.ink web API.
+    """
     try:
-        png = graph.get_graph().draw_mermaid_png(draw_method=MermaidDrawMethod.API)
         os.makedirs(save_dir, exist_ok=True)
-        save_path = os.path.join(save_dir, f"{graph_name}.png")
+        if image_format == "png":
+            data = graph.get_graph().draw_mermaid_png(
+                draw_method=MermaidDrawMethod.API
+            )
+            save_path = os.path.join(save_dir, f"{graph_name}.png")
+        else:
+            data = graph.get_graph().draw_mermaid().encode("utf-8")
+            save_path = os.path.join(save_dir, f"{graph_name}.mmd")
         with open(save_path, "wb") as f:
-            f.write(png)
+            f.write(data)
         print(f"✅ Graph saved to {save_path}")
     except Exception as e:
         print(f"⚠️ Could not save graph image: {e}")
+
+
+def maybe_save_graph_visualization(
+    graph: StateGraph,
+    graph_name: str,
+    visualization_config: Optional[Dict[str, Any]],
+) -> None:
+    """
+    Saves the graph visualization if the `graph_visualization` config section enables it.
+    """
+    visualization_config = visualization_config or {}
+    if not visualization_config.get("enabled", False):
+        return
+    save_graph_visualization(
+        graph,
+        graph_name=graph_name,
+        image_format=visualization_config.get("format", "mermaid"),
+    )
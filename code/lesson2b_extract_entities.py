@@ -1,22 +1,22 @@
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
 
 from pprint import pprint
 
 from states.tag_generation_state import (
-    initialize_tag_generation_state,
+    initialize_tag_generation_state_from_config,
 )
-from graphs.tag_generation_graph import build_tag_generation_graph
+from graphs.tag_generation_graph import get_tag_generation_graph
 from utils import load_publication_example, load_config
-from langgraph_utils import save_graph_visualization
-
-from consts import (
-    LLM_TAGS_GENERATOR,
-    TAG_TYPE_ASSIGNER,
-    TAGS_SELECTOR,
-)
+from langgraph_utils import maybe_save_graph_visualization
+from llm import get_llm_cache
+from llm_cache import format_cache_stats
+from token_usage import TokenUsageTracker
 
 
-def run_tag_generation_graph(text: str) -> Dict[str, Any]:
+def run_tag_generation_graph(
+    text: str, token_usage: Optional[TokenUsageTracker] = None
+) -> Dict[str, Any]:
     """
     Runs the A3 agentic authoring graph with the provided LLM and configurations.
 
@@ -30,28 +30,49 @@ def run_tag_generation_graph(text: str) -> Dict[str, Any]:
     config = load_config()["tags_generation"]
 
     # # Initialize state
-    initial_state = initialize_tag_generation_state(
-        input_text=text,
-        llm_tags_generator_prompt_cfg=config["agents"][LLM_TAGS_GENERATOR][
-            "prompt_config"
-        ],
-        tag_type_assigner_prompt_cfg=config["agents"][TAG_TYPE_ASSIGNER][
-            "prompt_config"
-        ],
-        tags_selector_prompt_cfg=config["agents"][TAGS_SELECTOR]["prompt_config"],
-        tag_types=config["tag_types"],
-        max_tags=config["max_tags"],
-    )
+    initial_state = initialize_tag_generation_state_from_config(text, config)
 
     # Build the graph
-    graph = build_tag_generation_graph(config)
-    save_graph_visualization(graph, graph_name="tag_generation")
+    graph = get_tag_generation_graph(config)
+    maybe_save_graph_visualization(
+        graph, "tag_generation", load_config().get("graph_visualization")
+    )
 
     # Run the graph
-    final_state = graph.invoke(initial_state)
+    callbacks = [token_usage] if token_usage else []
+    final_state = graph.invoke(initial_state, config={"callbacks": callbacks})
     return final_state
 
 
+async def arun_tag_generation_graphs(
+    texts: Sequence[str],
+    max_concurrency: int = 32,
+    token_usage: Optional[TokenUsageTracker] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs many documents through one compiled tag generation graph on the current event loop.
+
+    Args:
+        texts: The input texts to process.
+        max_concurrency: Maximum number of documents in flight at once.
+        token_usage: Optional tracker collecting per-node token counts across all documents.
+
+    Returns:
+        List[Dict[str, Any]]: The final state for each document, in input order.
+    """
+    config = load_config()["tags_generation"]
+    graph = get_tag_generation_graph(config)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    callbacks = [token_usage] if token_usage else []
+
+    async def run_one(text: str) -> Dict[str, Any]:
+        async with semaphore:
+            initial_state = initialize_tag_generation_state_from_config(text, config)
+            return await graph.ainvoke(initial_state, config={"callbacks": callbacks})
+
+    return await asyncio.gather(*(run_one(text) for text in texts))
+
+
 if __name__ == "__main__":
 
     # ⚠️⚠️⚠️ CAUTION: LONG + POTENTIALLY EXPENSIVE INPUTS ⚠️⚠️⚠️
@@ -68,7 +89,8 @@ if __name__ == "__main__":
     # Example usage
     sample_text = load_publication_example(1)  # ⚠️ CAUTION: SEE NOTE ABOVE
 
-    response = run_tag_generation_graph(sample_text)
+    token_usage = TokenUsageTracker()
+    response = run_tag_generation_graph(sample_text, token_usage=token_usage)
 
     print("=" * 80)
     print("🔍 MULTI-METHOD ENTITY EXTRACTION DEMO")
@@ -90,4 +112,6 @@ if __name__ == "__main__":
     print("=" * 80)
     print(f"\nTotal unique tags extracted: {len(response['selected_tags'])}")
     print("✅ Tag generation completed successfully.")
+    print(format_cache_stats(get_llm_cache()))
+    print(token_usage.format_report())
     # -------------------------------------------------------------------------------
@@ -1,68 +1,125 @@
-from typing import Any, Dict, Sequence
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
 import os
+import sys
 from pprint import pprint
 
-from graphs.a3_graph import build_a3_graph
-from states.a3_state import initialize_a3_state
-from utils import load_publication_example, load_config
-from langgraph_utils import save_graph_visualization
-from consts import (
-    MANAGER,
-    LLM_TAGS_GENERATOR,
-    TAG_TYPE_ASSIGNER,
-    TAGS_SELECTOR,
-    TLDR_GENERATOR,
-    TITLE_GENERATOR,
-    REFERENCES_GENERATOR,
-    REFERENCES_SELECTOR,
-    REVIEWER,
+from checkpointing import (
+    get_checkpointer,
+    has_unfinished_run,
+    new_thread_id,
+    resume_run,
+    thread_config,
 )
+from graphs.a3_graph import get_a3_graph
+from document_digest import aprepare_a3_state, prepare_a3_state
+from utils import load_publication_example, load_config
+from langgraph_utils import maybe_save_graph_visualization
+from llm import get_llm_cache
+from llm_cache import format_cache_stats
+from token_usage import TokenUsageTracker
+
 
+def _finish_thread(
+    a3_config: Dict[str, Any], checkpointer: Any, thread_id: str
+) -> None:
+    if checkpointer is not None and not a3_config["checkpointing"].get(
+        "keep_completed", False
+    ):
+        checkpointer.delete_thread(thread_id)
 
-def run_a3_graph(text: str) -> Dict[str, Any]:
+
+def run_a3_graph(
+    text: str,
+    token_usage: Optional[TokenUsageTracker] = None,
+    thread_id: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Runs the A3 agentic authoring graph with the provided LLM and configurations.
+
+    With checkpointing enabled, each superstep is saved under `thread_id`. Calling this
+    again with the thread id of a failed run resumes it instead of starting over.
     """
 
     # Load configurations
     a3_config = load_config()["a3_system"]
-
-    # # Initialize state
-    initial_state = initialize_a3_state(
-        input_text=text,
-        manager_prompt_cfg=a3_config["agents"][MANAGER]["prompt_config"],
-        llm_tags_generator_prompt_cfg=a3_config["agents"][LLM_TAGS_GENERATOR][
-            "prompt_config"
-        ],
-        tag_type_assigner_prompt_cfg=a3_config["agents"][TAG_TYPE_ASSIGNER][
-            "prompt_config"
-        ],
-        tags_selector_prompt_cfg=a3_config["agents"][TAGS_SELECTOR]["prompt_config"],
-        tag_types=a3_config["tag_types"],
-        max_tags=a3_config["max_tags"],
-        title_gen_prompt_cfg=a3_config["agents"][TITLE_GENERATOR]["prompt_config"],
-        tldr_gen_prompt_cfg=a3_config["agents"][TLDR_GENERATOR]["prompt_config"],
-        references_gen_prompt_cfg=a3_config["agents"][REFERENCES_GENERATOR][
-            "prompt_config"
-        ],
-        max_search_queries=a3_config["max_search_queries"],
-        references_selector_prompt_cfg=a3_config["agents"][REFERENCES_SELECTOR][
-            "prompt_config"
-        ],
-        max_references=a3_config["max_references"],
-        reviewer_prompt_cfg=a3_config["agents"][REVIEWER]["prompt_config"],
-        max_revisions=a3_config["max_revisions"],
-    )
+    checkpointer = get_checkpointer(a3_config.get("checkpointing", {}))
+    thread_id = thread_id or new_thread_id()
 
     # # Build the graph
-    graph = build_a3_graph(a3_config)
-    save_graph_visualization(graph, graph_name="a3_system")
+    graph = get_a3_graph(a3_config, checkpointer=checkpointer)
+    maybe_save_graph_visualization(
+        graph, "a3_system", load_config().get("graph_visualization")
+    )
 
     # Run the graph
-    final_state = graph.invoke(initial_state)
+    callbacks = [token_usage] if token_usage else []
+    config = {"callbacks": callbacks}
+    if checkpointer is None:
+        return graph.invoke(prepare_a3_state(text, a3_config), config=config)
+
+    try:
+        if has_unfinished_run(graph, thread_id):
+            final_state = resume_run(graph, thread_id, config)
+        else:
+            # # Initialize state (full text, or a digest for long publications)
+            initial_state = prepare_a3_state(text, a3_config)
+            final_state = graph.invoke(
+                initial_state, config=thread_config(thread_id, config)
+            )
+    except Exception:
+        print(f"💾 Run saved as thread {thread_id}; pass it again to resume.")
+        raise
+    _finish_thread(a3_config, checkpointer, thread_id)
     return final_state
 
 
+async def arun_a3_graphs(
+    texts: Sequence[str],
+    max_concurrency: int = 32,
+    token_usage: Optional[TokenUsageTracker] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs many documents through one compiled A3 graph on the current event loop.
+
+    Nodes use their async variants (`ainvoke`), so in-flight LLM calls do not hold an OS
+    thread each. Calls to each LLM provider are additionally capped by the
+    `llm_concurrency` config section.
+
+    Args:
+        texts: The publications to process.
+        max_concurrency: Maximum number of documents in flight at once.
+        token_usage: Optional tracker collecting per-node token counts across all documents.
+
+    Returns:
+        List[Dict[str, Any]]: The final state for each document, in input order.
+    """
+    a3_config = load_config()["a3_system"]
+    checkpointer = get_checkpointer(a3_config.get("checkpointing", {}))
+    graph = get_a3_graph(a3_config, checkpointer=checkpointer)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    callbacks = [token_usage] if token_usage else []
+
+    async def run_one(text: str) -> Dict[str, Any]:
+        async with semaphore:
+            initial_state = await aprepare_a3_state(text, a3_config)
+            if checkpointer is None:
+                return await graph.ainvoke(
+                    initial_state, config={"callbacks": callbacks}
+                )
+            thread_id = new_thread_id()
+            config = thread_config(thread_id, {"callbacks": callbacks})
+            try:
+                final_state = await graph.ainvoke(initial_state, config=config)
+            except Exception:
+                print(f"💾 Run saved as thread {thread_id}; resume with aresume_run.")
+                raise
+            _finish_thread(a3_config, checkpointer, thread_id)
+            return final_state
+
+    return await asyncio.gather(*(run_one(text) for text in texts))
+
+
 if __name__ == "__main__":
 
     # ⚠️⚠️⚠️ CAUTION: LONG + EXPENSIVE INPUTS ⚠️⚠️⚠️
@@ -80,7 +137,11 @@ if __name__ == "__main__":
     # Example usage
     sample_text = load_publication_example(1)  # ⚠️ CAUTION: SEE NOTE ABOVE
 
-    response = run_a3_graph(sample_text)
+    # Pass the thread id printed by a failed run to resume it: python lesson3b_a3_system.py <thread_id>
+    thread_id = sys.argv[1] if len(sys.argv) > 1 else None
+
+    token_usage = TokenUsageTracker()
+    response = run_a3_graph(sample_text, token_usage=token_usage, thread_id=thread_id)
 
     print("=" * 80)
     print("🔍 A3-SYSTEM DEMO")
@@ -107,3 +168,5 @@ if __name__ == "__main__":
         print(f"URL: {ref['url']}")
         print("-" * 40)
     print("=" * 80)
+    print(format_cache_stats(get_llm_cache()))
+    print(token_usage.format_report())
@@ -1,22 +1,54 @@
 """
-Stdio wrapper for the MCP Entity Extraction Server
-This version uses stdio transport for Claude Desktop compatibility.
+MCP repository-information server.
+
+Besides the GitHub tools, `extract_tags` runs the tag extraction pipeline on the
+server, with one warm tag graph per process shared by all clients (see
+`tag_extraction_service`).
+
+By default it uses the stdio transport for Claude Desktop compatibility. With
+`--transport streamable-http` it serves MCP over HTTP at `/mcp`, with `/health`
+(liveness), `/ready` (readiness) and `/metrics` (Prometheus) endpoints, in one or more
+uvicorn worker processes:
+
+    python code/lesson4_mcp.py --transport streamable-http --port 8000 --workers 4
+
+Defaults come from the `mcp_server` section of `config/config.yaml`.
 """
 
-import logging
-import base64
+import argparse
 import asyncio
-from typing import Optional
+import contextlib
+import logging
+import json
+import os
+from typing import AsyncIterator, List, Optional, Sequence
 from mcp.server import FastMCP
-from github import Github
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from github_client import GITHUB_API_URL_ENV, cap_text_results, get_github_pool
+from utils import load_config
 
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create MCP server instance
-mcp = FastMCP("repository-information")
+TRANSPORTS = ("stdio", "streamable-http")
+server_config = load_config().get("mcp_server", {}) or {}
+
+# Create MCP server instance. Stateless HTTP sessions let any worker process serve
+# any request, so the server can run behind several uvicorn workers.
+mcp = FastMCP(
+    "repository-information",
+    host=server_config.get("host", "127.0.0.1"),
+    port=server_config.get("port", 8000),
+    stateless_http=server_config.get("stateless", True),
+    json_response=server_config.get("json_response", True),
+)
+_ready = False
+_tag_extraction_service = None
 
 
 @mcp.tool()
@@ -35,23 +67,8 @@ async def get_github_readme(repo_name: str, github_token: Optional[str] = None)
     Raises:
         Exception: If the repository is not found or README doesn't exist
     """
-
-    # Initialize GitHub client
-    if github_token:
-        g = Github(github_token)
-    else:
-        g = Github()
-
-    # Get the repository
-    repo = g.get_repo(repo_name)
-
-    # Try to get README file (GitHub automatically detects README files)
-    readme = repo.get_readme()
-
-    # Decode the content from base64
-    content = base64.b64decode(readme.content).decode("utf-8")
-
-    return content
+    # GitHub detects the README file; the blocking call runs in the GitHub worker pool
+    return await get_github_pool().aget_readme(repo_name, github_token)
 
 
 @mcp.tool()
@@ -72,30 +89,9 @@ async def get_github_owner_info(
     Raises:
         Exception: If the user/organization is not found
     """
-    import json
-
-    # Initialize GitHub client
-    if github_token:
-        g = Github(github_token)
-    else:
-        g = Github()
-
     try:
-        # Try to get user first
-        user = g.get_user(owner_name)
-
-        # Collect public information
-        owner_info = {
-            "login": user.login,
-            "name": user.name,
-            "type": user.type,
-            "bio": user.bio,
-            "company": user.company,
-            "location": user.location,
-            "email": user.email,
-            "followers": user.followers,
-            "following": user.following,
-        }
+        # Collect public information (users and organizations share this endpoint)
+        owner_info = await get_github_pool().aget_owner_info(owner_name, github_token)
 
         return json.dumps(owner_info, indent=2)
 
@@ -103,5 +99,220 @@ async def get_github_owner_info(
         raise Exception(f"Error fetching owner information: {str(e)}")
 
 
+def _batch_config() -> dict:
+    return load_config().get("github", {}).get("batch", {}) or {}
+
+
+def _check_batch_size(names: List[str], batch_config: dict) -> None:
+    max_items = batch_config.get("max_items", 100)
+    if len(set(names)) > max_items:
+        raise ValueError(f"At most {max_items} names per call, got {len(set(names))}")
+
+
+@mcp.tool()
+async def get_github_readmes(
+    repo_names: List[str], github_token: Optional[str] = None
+) -> str:
+    """
+    Fetch the README content of many GitHub repositories in one call.
+
+    Args:
+        repo_names (list): Repository names in format 'owner/repo'
+        github_token (str, optional): GitHub personal access token for authentication.
+                                    If None, uses unauthenticated requests (rate limited)
+
+    Returns:
+        str: JSON object mapping each repository name to either
+            {"result": <README text>, "chars": <full length>, "truncated": <bool>}
+            or {"error": <message>}. Long READMEs are truncated; use
+            get_github_readme to fetch one in full.
+    """
+    batch_config = _batch_config()
+    _check_batch_size(repo_names, batch_config)
+    pool = get_github_pool()
+    results = await pool.afetch_many(
+        repo_names,
+        pool.aget_readme,
+        github_token,
+        batch_config.get("max_concurrency", 8),
+    )
+    results = cap_text_results(
+        results,
+        max_chars=batch_config.get("max_readme_chars", 20_000),
+        max_total_chars=batch_config.get("max_total_chars", 200_000),
+    )
+    return json.dumps(results, indent=2)
+
+
+@mcp.tool()
+async def get_github_owners(
+    owner_names: List[str], github_token: Optional[str] = None
+) -> str:
+    """
+    Fetch public information about many GitHub users or organizations in one call.
+
+    Args:
+        owner_names (list): GitHub usernames or organization names
+        github_token (str, optional): GitHub personal access token for authentication.
+                                    If None, uses unauthenticated requests (rate limited)
+
+    Returns:
+        str: JSON object mapping each owner name to either {"result": <owner info>}
+            or {"error": <message>}
+    """
+    batch_config = _batch_config()
+    _check_batch_size(owner_names, batch_config)
+    pool = get_github_pool()
+    results = await pool.afetch_many(
+        owner_names,
+        pool.aget_owner_info,
+        github_token,
+        batch_config.get("max_concurrency", 8),
+    )
+    return json.dumps(results, indent=2)
+
+
+def get_tag_extraction_service():
+    """Returns this process's tag extraction service, creating it on first use."""
+    global _tag_extraction_service
+    if _tag_extraction_service is None:
+        from tag_extraction_service import TagExtractionService
+
+        _tag_extraction_service = TagExtractionService(
+            load_config()["tags_generation"],
+            server_config.get("tag_extraction", {}),
+        )
+    return _tag_extraction_service
+
+
+@mcp.tool()
+async def extract_tags(
+    text: Optional[str] = None,
+    repo_name: Optional[str] = None,
+    github_token: Optional[str] = None,
+) -> str:
+    """
+    Extract tags (e.g. algorithms, datasets, tools, tasks) from a text or from the
+    README of a GitHub repository.
+
+    Args:
+        text (str, optional): The text to tag
+        repo_name (str, optional): A repository in format 'owner/repo' whose README is
+                                   tagged instead of `text`
+        github_token (str, optional): GitHub personal access token used to fetch the README
+
+    Returns:
+        str: JSON list of tags, each with a "name" and a "type"
+
+    Raises:
+        ValueError: If neither or both of `text` and `repo_name` are given
+    """
+    if (text is None) == (repo_name is None):
+        raise ValueError("Pass exactly one of text or repo_name")
+    if repo_name is not None:
+        text = await get_github_pool().aget_readme(repo_name, github_token)
+    tags = await get_tag_extraction_service().extract_tags(text)
+    return json.dumps(tags, indent=2)
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health(request: Request) -> JSONResponse:
+    """Liveness: the worker process is up."""
+    return JSONResponse({"status": "ok"})
+
+
+@mcp.custom_route("/ready", methods=["GET"])
+async def ready(request: Request) -> JSONResponse:
+    """Readiness: the MCP session manager is running and the GitHub pool is set up."""
+    if not _ready:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return JSONResponse({"status": "ready", "github": get_github_pool().stats()})
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    """Tag extraction queue and batch metrics, plus graph node metrics if enabled."""
+    text = ""
+    if _tag_extraction_service is not None:
+        text += _tag_extraction_service.render_metrics()
+    from instrumentation import get_instrumentation
+
+    instrumentation = get_instrumentation()
+    if instrumentation is not None:
+        text += instrumentation.metrics.render()
+    return PlainTextResponse(text)
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(app: Starlette) -> AsyncIterator[None]:
+    global _ready
+    async with mcp.session_manager.run():
+        get_github_pool()
+        if server_config.get("tag_extraction", {}).get("preload", True):
+            try:
+                await asyncio.to_thread(get_tag_extraction_service().preload)
+            except Exception as e:
+                # The GitHub tools still work; extract_tags reports the error per call.
+                logger.warning(f"Could not preload tag extraction: {e}")
+        _ready = True
+        try:
+            yield
+        finally:
+            _ready = False
+
+
+def create_http_app() -> Starlette:
+    """Returns the streamable HTTP app (the uvicorn app factory of each worker)."""
+    app = mcp.streamable_http_app()
+    app.router.lifespan_context = _lifespan
+    return app
+
+
+def run_http_server(host: str, port: int, workers: int = 1) -> None:
+    """Serves MCP over streamable HTTP with `workers` uvicorn worker processes."""
+    import uvicorn
+
+    if workers > 1 and not mcp.settings.stateless_http:
+        raise ValueError("Multiple workers require mcp_server.stateless: true")
+    print(f"🚀 MCP server on http://{host}:{port}{mcp.settings.streamable_http_path}")
+    uvicorn.run(
+        "lesson4_mcp:create_http_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        log_level=mcp.settings.log_level.lower(),
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="MCP repository-information server")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=server_config.get("transport", "stdio"),
+    )
+    parser.add_argument("--host", default=mcp.settings.host)
+    parser.add_argument("--port", type=int, default=mcp.settings.port)
+    parser.add_argument(
+        "--workers", type=int, default=server_config.get("workers", 1)
+    )
+    parser.add_argument(
+        "--github-base-url",
+        default=None,
+        help="GitHub API base URL, e.g. a local stub server (overrides github.base_url)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.github_base_url:
+        # Set in the environment so that worker processes see it too.
+        os.environ[GITHUB_API_URL_ENV] = args.github_base_url
+    if args.transport == "stdio":
+        mcp.run("stdio")
+    else:
+        run_http_server(args.host, args.port, args.workers)
+
+
 if __name__ == "__main__":
-    asyncio.run(mcp.run("stdio"))
+    main()
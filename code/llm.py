@@ -1,18 +1,266 @@
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
+import asyncio
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple, Type
+
+from langchain_core.runnables import Runnable
+from langchain_core.runnables.config import ensure_config
 from langchain_core.language_models.chat_models import BaseChatModel
-from dotenv import load_dotenv
+from pydantic import BaseModel
 
+from llm_cache import LLMResponseCache, build_llm_cache
+from utils import load_config, load_env
 
-load_dotenv()
+if TYPE_CHECKING:
+    import httpx
 
+# The provider SDKs (langchain_openai, langchain_groq, httpx) are imported when the
+# first client of that provider is created, so importing this module stays cheap.
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_loaded = False
 
-def get_llm(model_name: str, temperature: float = 0.7) -> BaseChatModel:
-    if model_name == "gpt-4o-mini":
-        return ChatOpenAI(model="gpt-4o-mini", temperature=temperature)
-    elif model_name == "gpt-4o":
-        return ChatOpenAI(model="gpt-4o", temperature=temperature)
+MODEL_PROVIDERS = {
+    "gpt-4o-mini": "openai",
+    "gpt-4o": "openai",
+    "llama3-8b-8192": "groq",
+}
+DEFAULT_PROVIDER_CONCURRENCY = 16
+# Run metadata key carrying the time an async call waited for a provider slot.
+LLM_QUEUE_WAIT_METADATA_KEY = "llm_queue_wait_seconds"
+
+# asyncio.Semaphore is bound to the event loop it is first used on, so keep one set
+# of provider semaphores per running loop.
+_provider_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_provider_limits: Optional[Dict[str, int]] = None
+
+# Model name -> factory(temperature) overriding the built-in providers, e.g. the fake
+# chat model used by the benchmarks.
+_registered_llms: Dict[str, Callable[[float], BaseChatModel]] = {}
+
+# Process-wide model registry. Chat models are keyed by (provider, model, temperature)
+# and structured-output runnables by (provider, model, temperature, schema), so every
+# node shares one client, one connection pool and one converted schema per key.
+_models: Dict[Tuple[str, str, float], BaseChatModel] = {}
+_structured_models: Dict[Tuple[str, str, float, Type[BaseModel]], Runnable] = {}
+_models_lock = threading.RLock()
+
+# Provider -> (sync, async) HTTP clients handed to every model of that provider.
+_http_clients: Dict[str, Tuple["httpx.Client", "httpx.AsyncClient"]] = {}
+_http_settings: Optional[Dict[str, Any]] = None
+
+# Pooled async connections belong to the event loop that opened them, so, like the
+# provider semaphores, the async clients that actually send requests are kept per
+# running loop.
+_loop_http_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Returns the process-wide LLM response cache configured in `llm_cache`, if enabled."""
+    global _llm_cache, _llm_cache_loaded
+    if not _llm_cache_loaded:
+        _llm_cache = build_llm_cache(load_config().get("llm_cache", {}))
+        _llm_cache_loaded = True
+    return _llm_cache
+
+
+def register_llm(
+    model_name: str,
+    factory: Callable[[float], BaseChatModel],
+    provider: Optional[str] = None,
+) -> None:
+    """
+    Makes `get_llm(model_name)` return `factory(temperature)` instead of a provider client.
+
+    Args:
+        model_name: The model name used in the config (may shadow a built-in model).
+        factory: Called with the requested temperature; returns the chat model.
+        provider: Provider whose concurrency limit applies to the model's async calls.
+            Defaults to the model's existing provider, or "default" for new names.
+    """
+    with _models_lock:
+        _registered_llms[model_name] = factory
+        if provider is not None:
+            MODEL_PROVIDERS[model_name] = provider
+        _evict_models(model_name)
+
+
+def _evict_models(model_name: str) -> None:
+    for registry in (_models, _structured_models):
+        for key in [key for key in registry if key[1] == model_name]:
+            del registry[key]
+
+
+def _get_http_settings() -> Dict[str, Any]:
+    import httpx
+
+    global _http_settings
+    if _http_settings is None:
+        http_config = load_config().get("llm_http", {}) or {}
+        http2 = http_config.get("http2", True)
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️ h2 is not installed; using HTTP/1.1 for LLM calls")
+                http2 = False
+        _http_settings = {
+            "http2": http2,
+            "limits": httpx.Limits(
+                max_connections=http_config.get("max_connections", 100),
+                max_keepalive_connections=http_config.get(
+                    "max_keepalive_connections", 20
+                ),
+                keepalive_expiry=http_config.get("keepalive_expiry_seconds", 30),
+            ),
+            "timeout": httpx.Timeout(http_config.get("timeout_seconds", 60)),
+        }
+    return _http_settings
+
+
+def get_loop_http_client(provider: str) -> "httpx.AsyncClient":
+    """
+    Returns the async HTTP client of `provider` for the running event loop.
+
+    Clients of loops that have been closed are dropped, so a new `asyncio.run(...)`
+    in the same process opens new connections instead of reusing dead ones.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    with _models_lock:
+        for closed in [other for other in _loop_http_clients if other.is_closed()]:
+            del _loop_http_clients[closed]
+        clients = _loop_http_clients.setdefault(loop, {})
+        if provider not in clients:
+            clients[provider] = httpx.AsyncClient(**_get_http_settings())
+        return clients[provider]
+
+
+def get_http_clients(provider: str) -> Tuple["httpx.Client", "httpx.AsyncClient"]:
+    """
+    Returns the sync and async HTTP clients shared by all models of `provider`.
+
+    The async client only holds the settings: it sends each request through
+    `get_loop_http_client`, so connections are pooled per event loop. Pool sizes,
+    keep-alive and timeouts come from the `llm_http` config section. HTTP/2 is used
+    when enabled and the `h2` package is installed.
+    """
+    import httpx
+
+    class LoopHTTPClient(httpx.AsyncClient):
+        async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+            return await get_loop_http_client(provider).send(request, **kwargs)
+
+    with _models_lock:
+        if provider not in _http_clients:
+            settings = _get_http_settings()
+            _http_clients[provider] = (
+                httpx.Client(**settings),
+                LoopHTTPClient(**settings),
+            )
+        return _http_clients[provider]
+
+
+def _create_llm(model_name: str, temperature: float) -> BaseChatModel:
+    if model_name in _registered_llms:
+        return _registered_llms[model_name](temperature)
+    load_env()
+    cache = get_llm_cache()
+    if model_name in ("gpt-4o-mini", "gpt-4o"):
+        from langchain_openai import ChatOpenAI
+
+        http_client, http_async_client = get_http_clients("openai")
+        return ChatOpenAI(
+            model=model_name,
+            temperature=temperature,
+            cache=cache,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
     elif model_name == "llama3-8b-8192":
-        return ChatGroq(model="llama3-8b-8192", temperature=temperature)
+        from langchain_groq import ChatGroq
+
+        http_client, http_async_client = get_http_clients("groq")
+        return ChatGroq(
+            model=model_name,
+            temperature=temperature,
+            cache=cache,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
     else:
         raise ValueError(f"Unknown model name: {model_name}")
+
+
+def get_llm(model_name: str, temperature: float = 0.7) -> BaseChatModel:
+    """
+    Returns the shared chat model for `model_name` at `temperature`.
+
+    Models are created once per (provider, model, temperature) and reused, so calls share
+    the provider's HTTP connection pool.
+
+    Raises:
+        ValueError: If the model name is unknown.
+    """
+    key = (get_llm_provider(model_name), model_name, temperature)
+    with _models_lock:
+        if key not in _models:
+            _models[key] = _create_llm(model_name, temperature)
+        return _models[key]
+
+
+def get_structured_llm(
+    model_name: str, schema: Type[BaseModel], temperature: float = 0.7
+) -> Runnable:
+    """
+    Returns the shared `get_llm(...).with_structured_output(schema)` runnable.
+
+    The schema is converted and bound once per (provider, model, temperature, schema).
+    """
+    key = (get_llm_provider(model_name), model_name, temperature, schema)
+    with _models_lock:
+        if key not in _structured_models:
+            llm = get_llm(model_name, temperature)
+            _structured_models[key] = llm.with_structured_output(schema)
+        return _structured_models[key]
+
+
+def get_llm_provider(model_name: str) -> str:
+    """Returns the provider serving `model_name` (e.g. "openai" or "groq")."""
+    return MODEL_PROVIDERS.get(model_name, "default")
+
+
+def get_provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """
+    Returns the semaphore limiting concurrent async LLM calls to `provider`.
+
+    Limits come from the `llm_concurrency` config section and are shared by every node
+    running on the current event loop.
+    """
+    global _provider_limits
+    if _provider_limits is None:
+        _provider_limits = load_config().get("llm_concurrency", {}) or {}
+    loop = asyncio.get_running_loop()
+    semaphores = _provider_semaphores.setdefault(loop, {})
+    if provider not in semaphores:
+        limit = _provider_limits.get(
+            provider, _provider_limits.get("default", DEFAULT_PROVIDER_CONCURRENCY)
+        )
+        semaphores[provider] = asyncio.Semaphore(limit)
+    return semaphores[provider]
+
+
+async def ainvoke_llm(llm: Runnable, messages: Any, model_name: str) -> Any:
+    """
+    Calls `llm.ainvoke(messages)` under the concurrency limit of the model's provider.
+
+    The time spent waiting for a free slot is attached to the call's run metadata, so
+    callback handlers (see `instrumentation`) can report it as queue wait.
+    """
+    queued_at = time.perf_counter()
+    async with get_provider_semaphore(get_llm_provider(model_name)):
+        queue_wait = time.perf_counter() - queued_at
+        metadata = dict(ensure_config().get("metadata") or {})
+        metadata[LLM_QUEUE_WAIT_METADATA_KEY] = queue_wait
+        return await llm.ainvoke(messages, config={"metadata": metadata})
@@ -0,0 +1,146 @@
+"""
+Content-addressed cache for chat model responses.
+
+Plugs into LangChain's cache hook (`BaseChatModel(cache=...)`), so every `invoke`,
+`ainvoke` and `with_structured_output(...)` call made through `get_llm` is looked up
+before a request is sent. The cache key is a SHA-256 hash of LangChain's `llm_string`
+(model name, temperature and any bound tools / structured-output schema) and the
+serialized prompt messages, so identical requests are answered locally.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from kv_cache import LRUCache, SQLiteCache, TieredCache
+from paths import ROOT_DIR, LLM_CACHE_DB_PATH
+
+# Set in `generation_info` of generations served from this cache.
+LOCAL_CACHE_HIT_KEY = "llm_cache_hit"
+
+
+def make_cache_key(prompt: str, llm_string: str) -> str:
+    """Returns the content address of a (prompt, model configuration) pair."""
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def serialize_generations(generations: RETURN_VAL_TYPE) -> str:
+    """Serializes cached generations to JSON, dropping per-run message ids."""
+    records = []
+    for generation in generations:
+        if isinstance(generation, ChatGeneration):
+            message = message_to_dict(generation.message)
+            # Cached messages must not share ids across runs; LangGraph's
+            # `add_messages` reducer would treat them as the same message.
+            message["data"]["id"] = None
+            records.append(
+                {"message": message, "generation_info": generation.generation_info}
+            )
+        else:
+            records.append(
+                {"text": generation.text, "generation_info": generation.generation_info}
+            )
+    return json.dumps(records)
+
+
+def deserialize_generations(value: str) -> RETURN_VAL_TYPE:
+    """Inverse of `serialize_generations`. Marks each generation as a local cache hit."""
+    generations = []
+    for record in json.loads(value):
+        generation_info = {
+            **(record.get("generation_info") or {}),
+            LOCAL_CACHE_HIT_KEY: True,
+        }
+        if "message" in record:
+            generations.append(
+                ChatGeneration(
+                    message=messages_from_dict([record["message"]])[0],
+                    generation_info=generation_info,
+                )
+            )
+        else:
+            generations.append(
+                Generation(text=record["text"], generation_info=generation_info)
+            )
+    return generations
+
+
+class LLMResponseCache(BaseCache):
+    """LangChain cache adapter over a `TieredCache`.
+
+    Args:
+        store: The tiered key-value store holding serialized generations.
+    """
+
+    def __init__(self, store: TieredCache):
+        self.store = store
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.store.get(make_cache_key(prompt, llm_string))
+        if value is None:
+            return None
+        return deserialize_generations(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.store.set(
+            make_cache_key(prompt, llm_string), serialize_generations(return_val)
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters for the cache."""
+        return self.store.stats()
+
+
+def build_llm_cache(cache_config: Dict[str, Any]) -> Optional[LLMResponseCache]:
+    """
+    Builds the LLM response cache from the `llm_cache` config section.
+
+    Args:
+        cache_config: Dictionary with `enabled`, `ttl_seconds`, `memory_max_entries`,
+            `disk_enabled`, `disk_path` and `disk_max_entries`.
+
+    Returns:
+        LLMResponseCache or None if caching is disabled.
+    """
+    if not cache_config.get("enabled", False):
+        return None
+
+    ttl_seconds = cache_config.get("ttl_seconds")
+    memory = LRUCache(
+        max_entries=cache_config.get("memory_max_entries", 1024),
+        ttl_seconds=ttl_seconds,
+    )
+    disk = None
+    if cache_config.get("disk_enabled", True):
+        disk_path = cache_config.get("disk_path") or LLM_CACHE_DB_PATH
+        if not os.path.isabs(disk_path):
+            disk_path = os.path.join(ROOT_DIR, disk_path)
+        disk = SQLiteCache(
+            disk_path,
+            max_entries=cache_config.get("disk_max_entries", 50_000),
+            ttl_seconds=ttl_seconds,
+        )
+    return LLMResponseCache(TieredCache(memory, disk))
+
+
+def format_cache_stats(cache: Optional[LLMResponseCache]) -> str:
+    """Returns a one-line summary of cache effectiveness."""
+    if cache is None:
+        return "LLM cache: disabled"
+    stats = cache.stats()
+    return (
+        f"LLM cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+        f"{stats['misses']} misses (hit rate {stats['hit_rate']:.0%})"
+    )
@@ -0,0 +1,166 @@
+"""
+Compaction of the message history that generator nodes resend in revision rounds.
+
+Every revision round adds the generator's request and answer to its message channel,
+so without compaction each round resends every earlier round as well. Before a node
+calls its LLM, `compact_messages` keeps the channel's context (system prompts, the
+publication and the manager brief) and applies the channel's policy to the history
+that follows it:
+
+- `full`: the whole history is sent (the previous behavior);
+- `keep_last`: only the last `keep_last` history messages are sent;
+- `summarize`: the last `keep_last` messages are sent verbatim and the older answers
+  are folded into one short note, with the first `summary_chars` characters of each
+  and at most `max_summary_chars` in total (the most recent answers first).
+
+The state keeps the full history; only the prompts are compacted. Each prompt (also
+one with nothing to drop, and every prompt under `full`) is reported as a
+`message_compaction` callback event, which `instrumentation` turns into per-node
+compaction metrics. Configured in the `message_compaction` section of the A3 system
+config, with per-channel overrides under `channels`.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks.manager import dispatch_custom_event
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+STRATEGY_FULL = "full"
+STRATEGY_KEEP_LAST = "keep_last"
+STRATEGY_SUMMARIZE = "summarize"
+STRATEGIES = (STRATEGY_FULL, STRATEGY_KEEP_LAST, STRATEGY_SUMMARIZE)
+
+DEFAULT_KEEP_LAST = 4
+DEFAULT_SUMMARY_CHARS = 200
+DEFAULT_MAX_SUMMARY_CHARS = 1000
+COMPACTION_EVENT = "message_compaction"
+
+
+def get_compaction_policy(
+    compaction_config: Optional[Dict[str, Any]], channel: str
+) -> Dict[str, Any]:
+    """
+    Returns the policy of a message channel: the `default` policy updated with the
+    channel's entry under `channels`. Without a config the policy is `full`.
+
+    Raises:
+        ValueError: If the policy names an unknown strategy.
+    """
+    compaction_config = compaction_config or {}
+    policy = {
+        "strategy": STRATEGY_FULL,
+        "keep_last": DEFAULT_KEEP_LAST,
+        "summary_chars": DEFAULT_SUMMARY_CHARS,
+        "max_summary_chars": DEFAULT_MAX_SUMMARY_CHARS,
+        **(compaction_config.get("default") or {}),
+        **((compaction_config.get("channels") or {}).get(channel) or {}),
+    }
+    if policy["strategy"] not in STRATEGIES:
+        raise ValueError(
+            f"Unknown message compaction strategy: {policy['strategy']}. "
+            f"Expected one of {STRATEGIES}"
+        )
+    return policy
+
+
+def _content_chars(messages: Sequence[BaseMessage]) -> int:
+    return sum(len(str(message.content)) for message in messages)
+
+
+def _context_length(
+    messages: Sequence[BaseMessage], manager_brief: Optional[str]
+) -> int:
+    # The context is the leading system messages, extended through the manager brief.
+    length = 0
+    while length < len(messages) and isinstance(messages[length], SystemMessage):
+        length += 1
+    if manager_brief:
+        for i in range(len(messages) - 1, length - 1, -1):
+            if messages[i].content == manager_brief:
+                return i + 1
+    return length
+
+
+def _summarize(
+    messages: Sequence[BaseMessage], summary_chars: int, max_summary_chars: int
+) -> Optional[HumanMessage]:
+    # Only earlier answers are summarized; requests repeat the same instructions.
+    lines: List[str] = []
+    used = 0
+    for message in reversed(messages):
+        if not isinstance(message, AIMessage):
+            continue
+        text = " ".join(str(message.content).split())
+        if len(text) > summary_chars:
+            text = text[:summary_chars].rstrip() + "..."
+        if lines and used + len(text) > max_summary_chars:
+            break
+        lines.insert(0, f"- {text}")
+        used += len(text)
+    if not lines:
+        return None
+    return HumanMessage(
+        "Your earlier answers (superseded by the messages that follow):\n"
+        + "\n".join(lines)
+    )
+
+
+def compact_messages(
+    messages: Sequence[BaseMessage],
+    policy: Dict[str, Any],
+    manager_brief: Optional[str] = None,
+    channel: str = "",
+) -> List[BaseMessage]:
+    """
+    Applies a compaction policy to a message channel.
+
+    Args:
+        messages: The channel's messages.
+        policy: The channel's policy (see `get_compaction_policy`).
+        manager_brief: Content of the manager brief message; it and everything before
+            it are always kept.
+        channel: The channel name, used in the reported event.
+
+    Returns:
+        List[BaseMessage]: The messages to send: the context, then the compacted
+        history.
+    """
+    messages = list(messages)
+    if policy["strategy"] == STRATEGY_FULL:
+        report_compaction(channel, messages, messages)
+        return messages
+    context_length = _context_length(messages, manager_brief)
+    context, history = messages[:context_length], messages[context_length:]
+    keep_last = max(0, int(policy["keep_last"]))
+    compacted = messages
+    if len(history) > keep_last:
+        kept = history[len(history) - keep_last :] if keep_last else []
+        older = history[: len(history) - keep_last]
+        if policy["strategy"] == STRATEGY_SUMMARIZE:
+            summary = _summarize(
+                older, int(policy["summary_chars"]), int(policy["max_summary_chars"])
+            )
+            kept = ([summary] if summary else []) + kept
+        compacted = context + kept
+    report_compaction(channel, messages, compacted)
+    return compacted
+
+
+def report_compaction(
+    channel: str,
+    messages: Sequence[BaseMessage],
+    compacted: Sequence[BaseMessage],
+) -> None:
+    """Dispatches a `message_compaction` event to the callbacks of the current run."""
+    data = {
+        "channel": channel,
+        "messages_before": len(messages),
+        "messages_after": len(compacted),
+        "chars_before": _content_chars(messages),
+        "chars_after": _content_chars(compacted),
+    }
+    try:
+        dispatch_custom_event(COMPACTION_EVENT, data)
+    except RuntimeError:
+        # Called outside a run (e.g. a node function invoked directly).
+        pass
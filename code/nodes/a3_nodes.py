@@ -1,9 +1,19 @@
-from typing import Any, Callable, Dict, Literal
+from typing import Any, Dict, List, Optional
 from langchain_core.messages import HumanMessage
-from langchain_tavily import TavilySearch
+from langchain_core.runnables import Runnable
 
 from states.a3_state import A3SystemState
-from llm import get_llm
+from llm import get_llm, get_structured_llm, ainvoke_llm
+from langgraph_utils import as_graph_node, lazy_resource
+from message_compaction import compact_messages, get_compaction_policy
+from search import (
+    SearchBackend,
+    build_search_backend,
+    run_searches,
+    arun_searches,
+    DEFAULT_TIMEOUT_SECONDS,
+    DEFAULT_MAX_CONCURRENCY,
+)
 
 from consts import (
     MANAGER_MESSAGES,
@@ -32,25 +42,59 @@ from consts import (
     TITLE_FEEDBACK,
     TLDR_FEEDBACK,
     REFERENCES_FEEDBACK,
+    TITLE_ROUND,
+    TLDR_ROUND,
+    REFERENCES_ROUND,
+    PENDING_COMPONENTS,
     REFERENCES_GENERATOR,
     TITLE_GENERATOR,
     TLDR_GENERATOR,
 )
 from .output_types import SearchQueries, References, ReviewOutput
 
+# (generator node, approval key, generation round key) for each reviewed component.
+# A component is sent back to its generator only while it is not approved.
+REVIEWED_COMPONENTS = [
+    (TITLE_GENERATOR, TITLE_APPROVED, TITLE_ROUND),
+    (TLDR_GENERATOR, TLDR_APPROVED, TLDR_ROUND),
+    (REFERENCES_GENERATOR, REFERENCES_APPROVED, REFERENCES_ROUND),
+]
+TLDR_DIGEST_CHARS = 200
+REFERENCE_CONTENT_CHARS = 5000
+
+
+def get_pending_components(state: A3SystemState) -> List[str]:
+    """
+    Returns the generators whose component has not been produced for the current round yet.
+
+    Approved components are never pending. A rejected component is pending until its
+    generator writes the current `revision_round` to the component's round key.
+    """
+    revision_round = state.get(REVISION_ROUND, 0)
+    return [
+        generator
+        for generator, approved_key, round_key in REVIEWED_COMPONENTS
+        if not state.get(approved_key, False)
+        and state.get(round_key) != revision_round
+    ]
+
+
+def get_rejected_components(state: A3SystemState) -> List[str]:
+    """Returns the generators whose component is not approved."""
+    return [
+        generator
+        for generator, approved_key, _ in REVIEWED_COMPONENTS
+        if not state.get(approved_key, False)
+    ]
 
-def make_manager_node(llm_model: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+
+def make_manager_node(llm_model: str) -> Runnable:
     """
     Returns a LangGraph-compatible node that wraps a manager node.
     """
-    llm = get_llm(llm_model)
+    llm = lazy_resource(lambda: get_llm(llm_model))
 
-    def manager_node(state: A3SystemState) -> Dict[str, Any]:
-        """
-        Manager node that processes the input text and generates messages.
-        """
-        # Prepare the input for the LLM
-        ai_response = llm.invoke(state[MANAGER_MESSAGES])
+    def handle_response(ai_response) -> Dict[str, Any]:
         content = f"This is your manager's brief for your review:\n\n{ai_response.content.strip()}\n\n"
         human_message = HumanMessage(content)
         return {
@@ -64,319 +108,559 @@ def make_manager_node(llm_model: str) -> Callable[[Dict[str, Any]], Dict[str, An
             REVIEWER_MESSAGES: [human_message],
         }
 
-    return manager_node
+    def manager_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Manager node that processes the input text and generates messages.
+        """
+        # Prepare the input for the LLM
+        ai_response = llm().invoke(state[MANAGER_MESSAGES])
+        return handle_response(ai_response)
+
+    async def amanager_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Async variant of `manager_node`.
+        """
+        ai_response = await ainvoke_llm(
+            llm(), state[MANAGER_MESSAGES], llm_model
+        )
+        return handle_response(ai_response)
+
+    return as_graph_node(manager_node, amanager_node)
 
 
 def make_title_generator_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    compaction_config: Optional[Dict[str, Any]] = None,
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that wraps a title generator node.
+
+    The message history of earlier rounds is compacted per `compaction_config` (see
+    `message_compaction`).
     """
-    llm = get_llm(llm_model)
+    llm = lazy_resource(lambda: get_llm(llm_model))
+    compaction_policy = get_compaction_policy(compaction_config, TITLE_GEN_MESSAGES)
 
-    def title_generator_node(state: A3SystemState) -> Dict[str, Any]:
-        """
-        Title generator node that processes the input text and generates messages.
-        """
+    def prepare_messages(state: A3SystemState) -> Optional[List[Any]]:
         # Check if this component needs revision (skip if already approved)
         if state[TITLE_APPROVED] is True:
             print("🎯 Title Generator: Already approved, skipping...")
-            return {}
+            return None
 
         print("🎯 Title Generator: Creating title...")
-        messages = state[TITLE_GEN_MESSAGES]
+        messages = compact_messages(
+            state[TITLE_GEN_MESSAGES],
+            compaction_policy,
+            manager_brief=state.get(MANAGER_BRIEF),
+            channel=TITLE_GEN_MESSAGES,
+        )
+        feedback = state.get(TITLE_FEEDBACK, "No feedback provided")
         reviewer_message = HumanMessage(
-            f"Following is the review from your reviewer:\n\n {state.get(TITLE_FEEDBACK, "No feedback provided")}\n\n"
+            f"Following is the review from your reviewer:\n\n {feedback}\n\n"
         )
-        messages += [reviewer_message] + [
+        return messages + [
+            reviewer_message,
             HumanMessage(
                 "Proceed with your title generation using latest feedback (if any)."
-            )
+            ),
         ]
-        ai_response = llm.invoke(messages)
+
+    def handle_response(
+        state: A3SystemState, messages: List[Any], ai_response
+    ) -> Dict[str, Any]:
         content = ai_response.content.strip()
 
         return {
             TITLE_GEN_MESSAGES: [messages[-1], ai_response],
             TITLE: content,
             TITLE_FEEDBACK: "",
+            TITLE_ROUND: state.get(REVISION_ROUND, 0),
         }
 
-    return title_generator_node
+    def title_generator_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Title generator node that processes the input text and generates messages.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        ai_response = llm().invoke(messages)
+        return handle_response(state, messages, ai_response)
+
+    async def atitle_generator_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Async variant of `title_generator_node`.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        ai_response = await ainvoke_llm(llm(), messages, llm_model)
+        return handle_response(state, messages, ai_response)
+
+    return as_graph_node(title_generator_node, atitle_generator_node)
 
 
 def make_tldr_generator_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    compaction_config: Optional[Dict[str, Any]] = None,
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that wraps a TL;DR generator.
+
+    The message history of earlier rounds is compacted per `compaction_config`.
     """
-    llm = get_llm(llm_model)
+    llm = lazy_resource(lambda: get_llm(llm_model))
+    compaction_policy = get_compaction_policy(compaction_config, TLDR_GEN_MESSAGES)
 
-    def tldr_generator_node(state: A3SystemState) -> Dict[str, Any]:
-        """
-        TL;DR generator node that processes the input text and generates a summary.
-        """
+    def prepare_messages(state: A3SystemState) -> Optional[List[Any]]:
         # Check if this component needs revision (skip if already approved)
         if state[TLDR_APPROVED] is True:
             print("📝 TL;DR Generator: Already approved, skipping...")
-            return {}
+            return None
         print("🎯 TL;DR Generator: Creating TL;DR...")
+        feedback = state.get(TLDR_FEEDBACK, "No feedback provided")
         reviewer_message = HumanMessage(
-            "Following is the review from your reviewer:\n\n"
-            f"{state.get(TLDR_FEEDBACK, "No feedback provided")}\n\n"
+            f"Following is the review from your reviewer:\n\n{feedback}\n\n"
+        )
+        messages = compact_messages(
+            state[TLDR_GEN_MESSAGES],
+            compaction_policy,
+            manager_brief=state.get(MANAGER_BRIEF),
+            channel=TLDR_GEN_MESSAGES,
         )
-        messages = state[TLDR_GEN_MESSAGES] + [
+        return messages + [
             reviewer_message,
             HumanMessage(
                 "Proceed with your TL;DR generation using latest feedback (if any)."
             ),
         ]
-        ai_response = llm.invoke(messages)
+
+    def handle_response(
+        state: A3SystemState, messages: List[Any], ai_response
+    ) -> Dict[str, Any]:
         content = ai_response.content.strip()
 
-        return {TLDR_GEN_MESSAGES: [messages[-1], ai_response], TLDR: content}
+        return {
+            TLDR_GEN_MESSAGES: [messages[-1], ai_response],
+            TLDR: content,
+            TLDR_ROUND: state.get(REVISION_ROUND, 0),
+        }
 
-    return tldr_generator_node
+    def tldr_generator_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        TL;DR generator node that processes the input text and generates a summary.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        ai_response = llm().invoke(messages)
+        return handle_response(state, messages, ai_response)
+
+    async def atldr_generator_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Async variant of `tldr_generator_node`.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        ai_response = await ainvoke_llm(llm(), messages, llm_model)
+        return handle_response(state, messages, ai_response)
+
+    return as_graph_node(tldr_generator_node, atldr_generator_node)
 
 
 def make_references_generator_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    search_config: Dict[str, Any],
+    search_backend: Optional[SearchBackend] = None,
+    compaction_config: Optional[Dict[str, Any]] = None,
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that wraps a references generator.
-    """
-    llm = get_llm(llm_model)
 
-    def references_generator_node(state: A3SystemState) -> Dict[str, Any]:
-        """
-        References generator node that processes the input text and generates references.
-        """
+    Args:
+        llm_model: The LLM that writes the search queries.
+        search_config: The `search` config section (backend, timeouts, concurrency, cache).
+        search_backend: Overrides the backend described by `search_config`.
+        compaction_config: The `message_compaction` config section.
+    """
+    structured_llm = lazy_resource(
+        lambda: get_structured_llm(llm_model, SearchQueries)
+    )
+    compaction_policy = get_compaction_policy(
+        compaction_config, REFERENCES_GEN_MESSAGES
+    )
+    backend = lazy_resource(
+        lambda: search_backend or build_search_backend(search_config)
+    )
+    timeout_seconds = search_config.get("timeout_seconds", DEFAULT_TIMEOUT_SECONDS)
+    max_concurrency = search_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+
+    def prepare_messages(state: A3SystemState) -> Optional[List[Any]]:
         # Check if this component needs revision (skip if already approved)
         if state.get(REFERENCES_APPROVED, False):
             print("📚 References Generator: Already approved, skipping...")
-            return {}
+            return None
 
         print("📚 References Generator: Extracting references...")
+        feedback = state.get(REFERENCES_FEEDBACK, "No feedback provided")
         reviewer_message = HumanMessage(
-            "Following is the review from your reviewer:\n"
-            f"{state.get(REFERENCES_FEEDBACK, "No feedback provided")}\n"
+            f"Following is the review from your reviewer:\n{feedback}\n"
+        )
+        messages = compact_messages(
+            state[REFERENCES_GEN_MESSAGES],
+            compaction_policy,
+            manager_brief=state.get(MANAGER_BRIEF),
+            channel=REFERENCES_GEN_MESSAGES,
         )
-        messages = state[REFERENCES_GEN_MESSAGES] + [
+        return messages + [
             reviewer_message,
             HumanMessage(
                 "Proceed with your search query generation using latest feedback (if any)."
             ),
         ]
+
+    def collect_results(outcomes) -> List[Dict[str, Any]]:
+        search_results = []
+        for query, results, error in outcomes:
+            if error is not None:
+                print(f"❌ Error executing query '{query}': {error}")
+                continue
+            search_results.extend(results)
+            print(f"✅ Successfully executed query: {query}")
+        return search_results
+
+    def handle_results(
+        messages: List[Any], queries: List[str], search_results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        candidate_references = [
+            {
+                "url": search_result["url"],
+                "title": search_result["title"],
+                "page_content": search_result["content"],
+            }
+            for search_result in search_results
+            if search_result["content"]  # Ensure content is not empty
+        ]
+
+        formatted_references = "\n\n".join(
+            f"- Title: {ref['title']}\n  URL: {ref['url']}\n  Content:\n{ref.get('page_content', '')[:REFERENCE_CONTENT_CHARS]}"
+            for ref in candidate_references
+        )
+        message_to_selector = HumanMessage(
+            f"Here are the candidate references:\n\n{formatted_references}"
+        )
+        return {
+            REFERENCES_GEN_MESSAGES: [messages[-1]],
+            REFERENCE_SEARCH_QUERIES: queries,
+            CANDIDATE_REFERENCES: candidate_references,
+            REFERENCES_SELECTOR_MESSAGES: [message_to_selector],
+        }
+
+    def handle_failure(e: Exception) -> RuntimeError:
+        print(f"❌ References extraction failed: {e}")
+        return RuntimeError(
+            "References extraction failed. Please check your LLM configuration or input text."
+        )
+
+    def references_generator_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        References generator node that processes the input text and generates references.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
         try:
-            queries = llm.with_structured_output(SearchQueries).invoke(messages).queries
+            queries = structured_llm().invoke(messages).queries
             print(f"✅ Queries to be executed: {queries}")
 
-            search_results = []
-            for query in queries:
-                print(f"🔍 Executing query: {query}")
-                try:
-                    result = TavilySearch(max_results=3).invoke(query)["results"]
-                except Exception as e:
-                    print(f"❌ Error executing query: {e}")
-                    continue
-                search_results.extend(result)
-                print(f"✅ Successfully executed query: {query}")
-
-            candidate_references = [
-                {
-                    "url": search_result["url"],
-                    "title": search_result["title"],
-                    "page_content": search_result["content"],
-                }
-                for search_result in search_results
-                if search_result["content"]  # Ensure content is not empty
-            ]
-
-            formatted_references = "\n\n".join(
-                f"- Title: {ref['title']}\n  URL: {ref['url']}\n  Content:\n{ref.get('page_content', '')[:5000]}"
-                for ref in candidate_references
+            print(f"🔍 Executing {len(queries)} queries in parallel")
+            outcomes = run_searches(
+                backend(), queries, timeout_seconds, max_concurrency
             )
-            message_to_selector = HumanMessage(
-                f"Here are the candidate references:\n\n{formatted_references}"
+            search_results = collect_results(outcomes)
+
+            return handle_results(messages, queries, search_results)
+        except Exception as e:
+            raise handle_failure(e) from e
+
+    async def areferences_generator_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Async variant of `references_generator_node`.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        try:
+            response = await ainvoke_llm(structured_llm(), messages, llm_model)
+            queries = response.queries
+            print(f"✅ Queries to be executed: {queries}")
+
+            print(f"🔍 Executing {len(queries)} queries in parallel")
+            outcomes = await arun_searches(
+                backend(), queries, timeout_seconds, max_concurrency
             )
-            return {
-                REFERENCES_GEN_MESSAGES: [messages[-1]],
-                REFERENCE_SEARCH_QUERIES: queries,
-                CANDIDATE_REFERENCES: candidate_references,
-                REFERENCES_SELECTOR_MESSAGES: [message_to_selector],
-            }
+            search_results = collect_results(outcomes)
+
+            return handle_results(messages, queries, search_results)
         except Exception as e:
-            print(f"❌ References extraction failed: {e}")
-            raise RuntimeError(
-                "References extraction failed. Please check your LLM configuration or input text."
-            ) from e
+            raise handle_failure(e) from e
 
-    return references_generator_node
+    return as_graph_node(references_generator_node, areferences_generator_node)
 
 
 def make_references_selector_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    compaction_config: Optional[Dict[str, Any]] = None,
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that wraps a references selector.
-    """
-    llm = get_llm(llm_model)
 
-    def references_selector_node(state: A3SystemState) -> Dict[str, Any]:
-        """
-        References selector node that processes the input text and selects references.
-        """
+    The candidate references of earlier rounds are compacted per `compaction_config`.
+    """
+    structured_llm = lazy_resource(
+        lambda: get_structured_llm(llm_model, References)
+    )
+    compaction_policy = get_compaction_policy(
+        compaction_config, REFERENCES_SELECTOR_MESSAGES
+    )
+
+    def prepare_messages(state: A3SystemState) -> Optional[List[Any]]:
         if state.get(REFERENCES_APPROVED, False):
             print("📚 References Selector: Already approved, skipping...")
-            return {}
+            return None
 
         print("📚 References Selector: Selecting references...")
 
-        messages = state[REFERENCES_SELECTOR_MESSAGES] + [
+        messages = compact_messages(
+            state[REFERENCES_SELECTOR_MESSAGES],
+            compaction_policy,
+            manager_brief=state.get(MANAGER_BRIEF),
+            channel=REFERENCES_SELECTOR_MESSAGES,
+        )
+        return messages + [
             HumanMessage(
                 "Proceed with your references selection using latest feedback (if any)."
             ),
         ]
-        selected_references = (
-            llm.with_structured_output(References).invoke(messages).references
-        )
+
+    def handle_response(
+        state: A3SystemState, messages: List[Any], response: References
+    ) -> Dict[str, Any]:
         selected_references = [
             {
                 "url": ref.url,
                 "title": ref.title,
                 "page_content": ref.page_content,
             }
-            for ref in selected_references
+            for ref in response.references
         ]
         return {
             SELECTED_REFERENCES: selected_references,
             REFERENCES_SELECTOR_MESSAGES: [messages[-1]],
+            REFERENCES_ROUND: state.get(REVISION_ROUND, 0),
         }
 
-    return references_selector_node
+    def references_selector_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        References selector node that processes the input text and selects references.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        response = structured_llm().invoke(messages)
+        return handle_response(state, messages, response)
+
+    async def areferences_selector_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Async variant of `references_selector_node`.
+        """
+        messages = prepare_messages(state)
+        if messages is None:
+            return {}
+        response = await ainvoke_llm(structured_llm(), messages, llm_model)
+        return handle_response(state, messages, response)
+
+    return as_graph_node(references_selector_node, areferences_selector_node)
 
 
 def make_reviewer_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that wraps a reviewer node.
-    """
-    llm = get_llm(llm_model)
 
-    def reviewer_node(state: A3SystemState) -> Dict[str, Any]:
-        """
-        Reviewer node that processes the input text and generates feedback.
-        """
+    The reviewer runs once every component sent out for (re)generation has reported
+    back. It sees the components that changed this round in full and the approved ones
+    as a compact digest. Approvals are sticky: an approved component stays approved.
+    """
+    structured_llm = lazy_resource(
+        lambda: get_structured_llm(llm_model, ReviewOutput)
+    )
 
+    def max_revisions_reached(state: A3SystemState) -> bool:
         # Force approval if we've reached max revisions to prevent infinite loops
-        revision_round = state.get(REVISION_ROUND, 0)
-        max_revisions = state[MAX_REVISIONS]
-        if revision_round >= max_revisions:
-            overall_approved = True  # Force approve all remaining components
-            print(
-                "🔒 Reviewer: Maximum revisions reached, forcing approval for all components."
-            )
-            return {
-                NEEDS_REVISION: False,
-                TITLE_APPROVED: True,
-                TLDR_APPROVED: True,
-                REFERENCES_APPROVED: True,
-            }
+        return state.get(REVISION_ROUND, 0) >= state[MAX_REVISIONS]
 
-        print("📝 Reviewer: Generating feedback...")
-        title = state.get(TITLE, "Not generated")
-        tldr = state.get(TLDR, "Not generated")
+    def force_approval() -> Dict[str, Any]:
+        print(
+            "🔒 Reviewer: Maximum revisions reached, forcing approval for all components."
+        )
+        return {
+            NEEDS_REVISION: False,
+            PENDING_COMPONENTS: [],
+            TITLE_APPROVED: True,
+            TLDR_APPROVED: True,
+            REFERENCES_APPROVED: True,
+        }
+
+    def format_title(state: A3SystemState) -> str:
+        title = state.get(TITLE) or "Not generated"
+        if state.get(TITLE_APPROVED):
+            return f"# Title (approved, for context only):\n {title}"
+        return f"# Title(s):\n {title}"
+
+    def format_tldr(state: A3SystemState) -> str:
+        tldr = state.get(TLDR) or "Not generated"
+        if state.get(TLDR_APPROVED):
+            if len(tldr) > TLDR_DIGEST_CHARS:
+                tldr = tldr[:TLDR_DIGEST_CHARS].rstrip() + "..."
+            return f"# TLDR (approved, for context only):\n {tldr}"
+        return f"# TLDR(s):\n {tldr}"
+
+    def format_references(state: A3SystemState) -> str:
         selected_references = state.get(SELECTED_REFERENCES, [])
+        if state.get(REFERENCES_APPROVED):
+            formatted_references = "\n".join(
+                f"- {ref['title']} ({ref['url']})" for ref in selected_references
+            )
+            return (
+                "# References (approved, for context only):\n"
+                f" {formatted_references}"
+            )
         formatted_references = "\n".join(
-            f"- Title: {ref['title']}\n  URL: {ref['url']}\n  Content:\n{ref.get('page_content', '')[:5000]}"
+            f"- Title: {ref['title']}\n  URL: {ref['url']}\n  Content:\n{ref.get('page_content', '')[:REFERENCE_CONTENT_CHARS]}"
             for ref in selected_references
         )
+        return f"# References:\n {formatted_references}"
 
-        # Build comprehensive input data for review
-        review_input = f"""
-        # Title(s):\n {title} \n ------------- \n
-        # TLDR(s):\n {tldr} \n ------------- \n
-        # References:\n {formatted_references} \n ------------- \n
-        """
-        messages = state[REVIEWER_MESSAGES] + [
+    def prepare_messages(state: A3SystemState) -> List[Any]:
+        print("📝 Reviewer: Generating feedback...")
+
+        # Components under review come first and in full; approved ones as a digest.
+        sections = [
+            (state.get(TITLE_APPROVED), format_title(state)),
+            (state.get(TLDR_APPROVED), format_tldr(state)),
+            (state.get(REFERENCES_APPROVED), format_references(state)),
+        ]
+        sections.sort(key=lambda section: bool(section[0]))
+        review_input = " \n ------------- \n".join(text for _, text in sections)
+        return state[REVIEWER_MESSAGES] + [
             HumanMessage(
                 f"Please review the following content and provide feedback:\n\n{review_input}\n\n"
-                "If you have any specific feedback for the TL;DR, title, or references, please include it."
+                "If you have any specific feedback for the TL;DR, title, or references, please include it. "
+                "Components marked as approved have already passed review and stay approved."
             )
         ]
-        response = llm.with_structured_output(ReviewOutput).invoke(messages)
-        revision_round += 1
-
-        # Handle individual component approvals
-        overall_approved = (
-            response.title_approved
-            and response.tldr_approved
-            and response.references_approved
+
+    def handle_response(state: A3SystemState, response: ReviewOutput) -> Dict[str, Any]:
+        revision_round = state.get(REVISION_ROUND, 0) + 1
+
+        # Approvals are sticky: a component approved in an earlier round stays approved.
+        tldr_approved = bool(state.get(TLDR_APPROVED)) or response.tldr_approved
+        title_approved = bool(state.get(TITLE_APPROVED)) or response.title_approved
+        references_approved = (
+            bool(state.get(REFERENCES_APPROVED)) or response.references_approved
         )
+        overall_approved = title_approved and tldr_approved and references_approved
 
         print(f"✅ Review completed: approved = {overall_approved}")
         print(f"📋 Feedback: {response.model_dump()}")
 
         # Show individual component status
         components_status = [
-            f"TLDR: {'✅' if response.tldr_approved else '❌'}",
-            f"Title: {'✅' if response.title_approved else '❌'}",
-            f"References: {'✅' if response.references_approved else '❌'}",
+            f"TLDR: {'✅' if tldr_approved else '❌'}",
+            f"Title: {'✅' if title_approved else '❌'}",
+            f"References: {'✅' if references_approved else '❌'}",
         ]
         print(f"📊 Component Status: {' | '.join(components_status)}")
 
         if not overall_approved:
             needs_revision_list = []
-            if not response.tldr_approved:
+            if not tldr_approved:
                 needs_revision_list.append("TLDR")
-            if not response.title_approved:
+            if not title_approved:
                 needs_revision_list.append("Title")
-            if not response.references_approved:
+            if not references_approved:
                 needs_revision_list.append("References")
 
             print(f"🔄 Components needing revision: {', '.join(needs_revision_list)}")
-
-            return {
-                NEEDS_REVISION: True,
-                REVISION_ROUND: revision_round,
-                TLDR_FEEDBACK: response.tldr_feedback,
-                TITLE_FEEDBACK: response.title_feedback,
-                REFERENCES_FEEDBACK: response.references_feedback,
-                TLDR_APPROVED: response.tldr_approved,
-                TITLE_APPROVED: response.title_approved,
-                REFERENCES_APPROVED: response.references_approved,
-            }
         else:
             print("✅ All components approved - proceeding to final output")
 
-            return {
-                NEEDS_REVISION: False,
-                REVISION_ROUND: revision_round,
-                TLDR_FEEDBACK: response.tldr_feedback,
-                TITLE_FEEDBACK: response.title_feedback,
-                REFERENCES_FEEDBACK: response.references_feedback,
-                TLDR_APPROVED: response.tldr_approved,
-                TITLE_APPROVED: response.title_approved,
-                REFERENCES_APPROVED: response.references_approved,
-            }
+        return {
+            NEEDS_REVISION: not overall_approved,
+            PENDING_COMPONENTS: [],
+            REVISION_ROUND: revision_round,
+            TLDR_FEEDBACK: "" if tldr_approved else response.tldr_feedback,
+            TITLE_FEEDBACK: "" if title_approved else response.title_feedback,
+            REFERENCES_FEEDBACK: (
+                "" if references_approved else response.references_feedback
+            ),
+            TLDR_APPROVED: tldr_approved,
+            TITLE_APPROVED: title_approved,
+            REFERENCES_APPROVED: references_approved,
+        }
 
-    return reviewer_node
+    def reviewer_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Reviewer node that processes the input text and generates feedback.
+        """
+        pending = get_pending_components(state)
+        if pending:
+            print(f"⏳ Reviewer: Waiting for {', '.join(pending)}...")
+            return {PENDING_COMPONENTS: pending}
+        if max_revisions_reached(state):
+            return force_approval()
+        messages = prepare_messages(state)
+        response = structured_llm().invoke(messages)
+        return handle_response(state, response)
+
+    async def areviewer_node(state: A3SystemState) -> Dict[str, Any]:
+        """
+        Async variant of `reviewer_node`.
+        """
+        pending = get_pending_components(state)
+        if pending:
+            print(f"⏳ Reviewer: Waiting for {', '.join(pending)}...")
+            return {PENDING_COMPONENTS: pending}
+        if max_revisions_reached(state):
+            return force_approval()
+        messages = prepare_messages(state)
+        response = await ainvoke_llm(structured_llm(), messages, llm_model)
+        return handle_response(state, response)
+
+    return as_graph_node(reviewer_node, areviewer_node)
 
 
 def route_from_reviewer(
     state: A3SystemState,
-) -> Literal["revision_dispatcher", "end"]:
+) -> List[str]:
     """
-    Conditional routing function that determines whether to dispatch revisions or end.
+    Conditional routing function that sends rejected components back to their generators.
+
+    Returns no destination while the reviewer is still waiting for components of the
+    current round, and "end" once everything is approved. Approved components are never
+    routed to, so their generators are not re-invoked.
     """
-    needs_revision = state.get(NEEDS_REVISION, False)
+    if state.get(PENDING_COMPONENTS):
+        # The reviewer is still waiting; the pending generators will trigger it again.
+        return []
 
-    if not needs_revision:
+    if not state.get(NEEDS_REVISION, False):
         print("✅ All components approved - routing to END")
-        return "end"
-    else:
-        print("🔄 Some components need revision - routing to revision dispatcher")
-        return [TLDR_GENERATOR, TITLE_GENERATOR, REFERENCES_GENERATOR]
+        return ["end"]
+
+    rejected = get_rejected_components(state)
+    print(f"🔄 Routing revisions to: {', '.join(rejected)}")
+    return rejected
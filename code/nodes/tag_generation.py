@@ -1,12 +1,14 @@
+import asyncio
 from typing import Any, Callable, Dict
-import spacy
-import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import Runnable
 
 from states.tag_generation_state import TagGenerationState
-from llm import get_llm
+from llm import get_structured_llm, ainvoke_llm
+from langgraph_utils import as_graph_node, lazy_resource
+from utils import load_config
 
 from consts import (
     LLM_TAGS_GEN_MESSAGES,
@@ -15,143 +17,221 @@ from consts import (
     INPUT_TEXT,
     LLM_TAGS,
     SPACY_TAGS,
+    PRECOMPUTED_SPACY_TAGS,
+    PRECOMPUTED_LLM_TAGS,
     GAZETTEER_TAGS,
     CANDIDATE_TAGS,
+    RANKED_TAGS,
+    TAGS_RANKING_CONFIDENT,
     SELECTED_TAGS,
 )
 from paths import GAZETTEER_ENTITIES_FILE_PATH
-from utils import load_config
+from gazetteer_matcher import load_gazetteer_matcher
+from spacy_ner import extract_entities
+from tag_normalization import TagIndex
+from tag_type_classifier import TagTypeClassifier
+from tag_ranking import (
+    DEFAULT_TOP_K,
+    SELECTOR_MODE_AUTO,
+    SELECTOR_MODE_LLM,
+    format_candidate_lines,
+    is_confident,
+    rank_candidates,
+    validate_selector_mode,
+)
 from .output_types import Entities
 
-EXCLUDED_SPACY_ENTITY_TYPES = {"DATE", "CARDINAL"}
-
 
 def make_llm_tag_generator_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that extracts tags from the input text.
     """
-    llm = get_llm(llm_model)
+    structured_llm = lazy_resource(lambda: get_structured_llm(llm_model, Entities))
+
+    def handle_response(response: Entities) -> Dict[str, Any]:
+        tags = response.model_dump()["entities"]
+        for tag in tags:
+            tag["name"] = tag["name"].lower().strip()
+            tag["type"] = tag["type"].lower().strip()
+        return {LLM_TAGS: tags}
 
     def llm_tag_generator_node(state: TagGenerationState) -> Dict[str, Any]:
         """
         Extracts tags from the input text using the LLM.
+
+        Tags extracted upstream (e.g. per chunk by the document digest stage) are
+        reused as-is.
         """
-        tags = (
-            llm.with_structured_output(Entities)
-            .invoke(state[LLM_TAGS_GEN_MESSAGES])
-            .model_dump()["entities"]
-        )
+        precomputed = state.get(PRECOMPUTED_LLM_TAGS)
+        if precomputed is not None:
+            return {LLM_TAGS: precomputed}
+        response = structured_llm().invoke(state[LLM_TAGS_GEN_MESSAGES])
+        return handle_response(response)
 
-        for tag in tags:
-            tag["name"] = tag["name"].lower().strip()
-            tag["type"] = tag["type"].lower().strip()
-        return {LLM_TAGS: tags}
+    async def allm_tag_generator_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Async variant of `llm_tag_generator_node`.
+        """
+        precomputed = state.get(PRECOMPUTED_LLM_TAGS)
+        if precomputed is not None:
+            return {LLM_TAGS: precomputed}
+        response = await ainvoke_llm(
+            structured_llm(), state[LLM_TAGS_GEN_MESSAGES], llm_model
+        )
+        return handle_response(response)
 
-    return llm_tag_generator_node
+    return as_graph_node(llm_tag_generator_node, allm_tag_generator_node)
 
 
-def make_spacy_tag_generator_node() -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+def make_spacy_tag_generator_node(
+    spacy_config: Dict[str, Any],
+) -> Runnable:
     """
-    Returns a LangGraph-compatible node that extracts tags using a pre-loaded spaCy model.
+    Returns a LangGraph-compatible node that extracts tags using spaCy.
+
+    The spaCy model(s) named in `spacy_config` are loaded lazily on the node's first
+    call and shared process-wide, so building the graph does not load spaCy.
+
+    Args:
+        spacy_config: The `spacy_ner` config section (model, batching and fast-path settings).
     """
-    model = spacy.load("en_core_web_trf")
 
     def spacy_tag_generator_node(state: TagGenerationState) -> Dict[str, Any]:
         """
         Extracts unique named entities from the input text using spaCy.
+
+        If the entities were already extracted upstream (e.g. by the batch runner,
+        which pipes many documents through spaCy at once), they are reused as-is.
         """
-        doc = model(state[INPUT_TEXT])
-        seen = set()
-        entities = []
-        for ent in doc.ents:
-            if ent.label_ in EXCLUDED_SPACY_ENTITY_TYPES:
-                continue
-            key = (ent.text.lower(), ent.label_)
-            if key not in seen:
-                seen.add(key)
-                entities.append(
-                    {
-                        "name": ent.text.lower().strip(),
-                        "type": ent.label_.strip(),
-                    }
-                )
+        precomputed = state.get(PRECOMPUTED_SPACY_TAGS)
+        if precomputed is not None:
+            return {SPACY_TAGS: precomputed}
+
+        [entities] = extract_entities([state[INPUT_TEXT]], spacy_config)
         return {SPACY_TAGS: entities}
 
-    return spacy_tag_generator_node
+    async def aspacy_tag_generator_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Async variant of `spacy_tag_generator_node`; runs spaCy off the event loop.
+        """
+        return await asyncio.to_thread(spacy_tag_generator_node, state)
+
+    return as_graph_node(spacy_tag_generator_node, aspacy_tag_generator_node)
 
 
 def make_gazetteer_tag_generator_node() -> Callable[[Dict[str, Any]], Dict[str, Any]]:
     """
     Returns a LangGraph-compatible node that extracts tags using a predefined gazetteer.
+
+    The gazetteer is compiled once into an Aho-Corasick automaton (loaded from the
+    on-disk cache when the gazetteer file is unchanged) on the node's first call, so
+    each call is a single pass over the input text regardless of the number of
+    gazetteer entries.
     """
-    gazetteer = load_config(GAZETTEER_ENTITIES_FILE_PATH)
+    matcher = lazy_resource(
+        lambda: load_gazetteer_matcher(GAZETTEER_ENTITIES_FILE_PATH)
+    )
 
     def gazetteer_tag_generator_node(state: TagGenerationState) -> Dict[str, Any]:
         """
-        Extracts unique entities from the input text using a regex-based gazetteer.
+        Extracts unique entities from the input text using the gazetteer automaton.
         """
         text = state.get(INPUT_TEXT, "")
         if not text:
             return {GAZETTEER_TAGS: []}
 
-        seen = set()
-        entities = []
-
-        for entity_name, entity_type in gazetteer.items():
-            pattern = r"\b" + re.escape(entity_name) + r"\b"
-            try:
-                for _ in re.finditer(pattern, text, re.IGNORECASE):
-                    key = (entity_name.lower(), entity_type)
-                    if key not in seen:
-                        seen.add(key)
-                        entities.append(
-                            {
-                                "name": entity_name.lower().strip(),
-                                "type": entity_type.strip(),
-                            }
-                        )
-            except re.error as e:
-                print(f"Regex error for entity '{entity_name}': {e}")
-                continue
-
-        return {GAZETTEER_TAGS: entities}
+        return {GAZETTEER_TAGS: matcher().extract(text)}
 
     return gazetteer_tag_generator_node
 
 
 def make_tag_type_assigner_node(
     llm_model: str,
-) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    tag_types: Optional[List[Dict[str, str]]] = None,
+    classifier_config: Optional[Dict[str, Any]] = None,
+) -> Runnable:
     """
     Returns a LangGraph-compatible node that assigns tag types to extracted tags.
-    """
-    llm = get_llm(llm_model)
 
-    def tag_type_assigner_node(state: TagGenerationState) -> Dict[str, Any]:
-        """
-        Assigns tag types to extracted tags using the LLM.
-        """
-        spacy_tags = "\n".join(
-            [tag["name"].strip() for tag in state.get(SPACY_TAGS, [])]
+    With `tag_type_classifier.enabled`, a local classifier (see `tag_type_classifier`)
+    types the tags it is confident about; only the remaining tags go to the LLM, and
+    its assignments are learned by the classifier. Without uncertain tags, no LLM call
+    is made.
+
+    Args:
+        llm_model: The LLM used for the tags the classifier is not confident about.
+        tag_types: The configured tag types. Required when the classifier is enabled.
+        classifier_config: The `tag_type_classifier` config section.
+    """
+    structured_llm = lazy_resource(lambda: get_structured_llm(llm_model, Entities))
+    classifier_config = classifier_config or {}
+    use_classifier = classifier_config.get("enabled", False)
+    classifier = lazy_resource(
+        lambda: TagTypeClassifier(
+            tag_types=tag_types or [],
+            gazetteer=load_config(GAZETTEER_ENTITIES_FILE_PATH) or {},
+            classifier_config=classifier_config,
         )
-        messages = state[TAG_TYPE_ASSIGNER_MESSAGES]
-        messages.append(
+    )
+
+    def split_tags(
+        state: TagGenerationState,
+    ) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        spacy_tags = state.get(SPACY_TAGS, [])
+        if not use_classifier:
+            return [], spacy_tags
+        return classifier().split(spacy_tags)
+
+    def prepare_messages(
+        state: TagGenerationState, tags: List[Dict[str, str]]
+    ) -> List[Any]:
+        spacy_tags = "\n".join([tag["name"].strip() for tag in tags])
+        return state[TAG_TYPE_ASSIGNER_MESSAGES] + [
             HumanMessage(
                 content=f"Assign tag types to the following tags:\n {spacy_tags}\n"
             )
-        )
-        updated_spacy_tags = (
-            llm.with_structured_output(Entities)
-            .invoke(messages)
-            .model_dump()["entities"]
-        )
+        ]
+
+    def handle_response(
+        response: Entities,
+        typed_tags: List[Dict[str, str]],
+        uncertain_tags: List[Dict[str, str]],
+    ) -> Dict[str, Any]:
+        updated_spacy_tags = response.model_dump()["entities"]
         for tag in updated_spacy_tags:
             tag["type"] = tag["type"].lower().strip()
-        return {SPACY_TAGS: updated_spacy_tags}
+        if use_classifier:
+            classifier().learn(
+                updated_spacy_tags,
+                labels={tag["name"]: tag.get("type") for tag in uncertain_tags},
+            )
+        return {SPACY_TAGS: typed_tags + updated_spacy_tags}
 
-    return tag_type_assigner_node
+    def tag_type_assigner_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Assigns tag types to extracted tags using the classifier and the LLM.
+        """
+        typed_tags, uncertain_tags = split_tags(state)
+        if use_classifier and not uncertain_tags:
+            return {SPACY_TAGS: typed_tags}
+        messages = prepare_messages(state, uncertain_tags)
+        response = structured_llm().invoke(messages)
+        return handle_response(response, typed_tags, uncertain_tags)
+
+    async def atag_type_assigner_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Async variant of `tag_type_assigner_node`.
+        """
+        typed_tags, uncertain_tags = split_tags(state)
+        if use_classifier and not uncertain_tags:
+            return {SPACY_TAGS: typed_tags}
+        messages = prepare_messages(state, uncertain_tags)
+        response = await ainvoke_llm(structured_llm(), messages, llm_model)
+        return handle_response(response, typed_tags, uncertain_tags)
+
+    return as_graph_node(tag_type_assigner_node, atag_type_assigner_node)
 
 
 def aggregate_tags_node(state: TagGenerationState) -> Dict[str, Any]:
@@ -179,43 +259,168 @@ def aggregate_tags_node(state: TagGenerationState) -> Dict[str, Any]:
     return {CANDIDATE_TAGS: deduped}
 
 
-def make_tag_selector_node(
-    llm_model: str, max_tags: int
+def make_tags_aggregator_node(
+    tag_types: List[Dict[str, str]],
+    normalization_config: Optional[Dict[str, Any]] = None,
 ) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Returns a LangGraph-compatible node that aggregates tags from all sources.
+
+    With `tag_normalization.enabled`, near-duplicate tags ("transformer", "Transformers",
+    "Transformer model") collapse into one canonical tag that records how often each
+    source produced it (see `tag_normalization`). Otherwise this is `aggregate_tags_node`.
+
+    Args:
+        tag_types: The configured tag types, preferred when merged tags disagree on type.
+        normalization_config: The `tag_normalization` config section.
+    """
+    normalization_config = normalization_config or {}
+    if not normalization_config.get("enabled", False):
+        return aggregate_tags_node
+
+    tag_index = lazy_resource(
+        lambda: TagIndex(
+            gazetteer=load_config(GAZETTEER_ENTITIES_FILE_PATH) or {},
+            tag_types=[tag_type["name"] for tag_type in tag_types],
+            normalization_config=normalization_config,
+        )
+    )
+
+    def tags_aggregator_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Aggregates tags from LLM, spaCy, and Gazetteer into canonical, deduplicated tags.
+        """
+        candidates = tag_index().collapse(
+            {
+                "llm": state.get(LLM_TAGS, []),
+                "spacy": state.get(SPACY_TAGS, []),
+                "gazetteer": state.get(GAZETTEER_TAGS, []),
+            },
+            text=state.get(INPUT_TEXT, ""),
+        )
+        return {CANDIDATE_TAGS: candidates}
+
+    return tags_aggregator_node
+
+
+def make_tags_ranker_node(
+    max_tags: int, ranking_config: Optional[Dict[str, Any]] = None
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Returns a LangGraph-compatible node that ranks the candidate tags locally.
+
+    The node keeps the best `top_k` candidates for the tag selector. With
+    `selector_mode: auto` it also flags confident rankings, for which the selector
+    takes the top `max_tags` candidates without calling the LLM (see `tag_ranking`).
+
+    Args:
+        max_tags: Maximum number of tags allowed in the final selection.
+        ranking_config: The `tag_ranking` config section.
+    """
+    ranking_config = ranking_config or {}
+    top_k = max(ranking_config.get("top_k", DEFAULT_TOP_K), max_tags)
+    selector_mode = validate_selector_mode(
+        ranking_config.get("selector_mode", SELECTOR_MODE_LLM)
+    )
+
+    def tags_ranker_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Scores the candidate tags and keeps the top-ranked ones.
+        """
+        ranked = rank_candidates(
+            state.get(CANDIDATE_TAGS, []),
+            state.get(INPUT_TEXT, ""),
+            [
+                state.get(LLM_TAGS, []),
+                state.get(SPACY_TAGS, []),
+                state.get(GAZETTEER_TAGS, []),
+            ],
+            ranking_config,
+        )
+        confident = selector_mode == SELECTOR_MODE_AUTO and is_confident(
+            ranked, max_tags, ranking_config
+        )
+        return {RANKED_TAGS: ranked[:top_k], TAGS_RANKING_CONFIDENT: confident}
+
+    return tags_ranker_node
+
+
+def make_tag_selector_node(llm_model: str, max_tags: int) -> Runnable:
     """
     Returns a LangGraph-compatible node that selects the most relevant tags using an LLM.
 
+    If the tags ranker ran, the LLM sees only its top-ranked candidates, one
+    `name | type` line each, and a confident ranking is used without an LLM call.
+
     Args:
         llm_model: The LLM to use for tag selection.
         max_tags: Maximum number of tags allowed in the final selection.
 
     Returns:
-        A function that selects tags and updates the SELECTED_TAGS key in the state.
+        A node that selects tags and updates the SELECTED_TAGS key in the state.
     """
-    llm = get_llm(llm_model)
+    structured_llm = lazy_resource(lambda: get_structured_llm(llm_model, Entities))
+
+    def select_locally(state: TagGenerationState) -> Optional[Dict[str, Any]]:
+        if not state.get(TAGS_RANKING_CONFIDENT):
+            return None
+        print("🏷️ Tags Selector: Local ranking is confident, skipping the LLM")
+        tags = [
+            {"name": tag["name"], "type": tag["type"]}
+            for tag in state[RANKED_TAGS][:max_tags]
+        ]
+        return {SELECTED_TAGS: tags}
 
-    def tag_selector_node(state: TagGenerationState) -> Dict[str, Any]:
-        """
-        Uses the LLM to select the most important tags from the candidate list.
-        """
-        candidate_tags = state.get(CANDIDATE_TAGS, [])
+    def prepare_messages(state: TagGenerationState) -> List[Any]:
         base_messages = state.get(TAGS_SELECTOR_MESSAGES, [])
+        ranked_tags = state.get(RANKED_TAGS)
+        if ranked_tags is None:
+            candidate_tags = state.get(CANDIDATE_TAGS, [])
+            candidates = (
+                f"Here is the list of candidate tags (name and type):\n{candidate_tags}"
+            )
+        else:
+            candidates = (
+                "Here are the candidate tags, best-ranked first, one per line as "
+                f"`name | type`:\n{format_candidate_lines(ranked_tags)}"
+            )
 
         selection_instruction = HumanMessage(
             content=(
-                f"Here is the list of candidate tags (name and type):\n{candidate_tags}\n\n"
+                f"{candidates}\n\n"
                 f"Please return a refined list of the most important tags (maximum {max_tags})."
             )
         )
-        full_prompt = base_messages + [selection_instruction]
-
-        response = llm.with_structured_output(Entities).invoke(full_prompt).model_dump()
+        return base_messages + [selection_instruction]
 
-        tags = response.get("entities", [])
+    def handle_response(response: Entities) -> Dict[str, Any]:
+        tags = response.model_dump().get("entities", [])
         for tag in tags:
             tag["name"] = tag["name"].lower().strip()
             tag["type"] = tag["type"].lower().strip()
 
         return {SELECTED_TAGS: tags}
 
-    return tag_selector_node
+    def tag_selector_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Uses the LLM to select the most important tags from the candidate list.
+        """
+        local_selection = select_locally(state)
+        if local_selection is not None:
+            return local_selection
+        full_prompt = prepare_messages(state)
+        response = structured_llm().invoke(full_prompt)
+        return handle_response(response)
+
+    async def atag_selector_node(state: TagGenerationState) -> Dict[str, Any]:
+        """
+        Async variant of `tag_selector_node`.
+        """
+        local_selection = select_locally(state)
+        if local_selection is not None:
+            return local_selection
+        full_prompt = prepare_messages(state)
+        response = await ainvoke_llm(structured_llm(), full_prompt, llm_model)
+        return handle_response(response)
+
+    return as_graph_node(tag_selector_node, atag_selector_node)
@@ -15,4 +15,16 @@ PROMPT_CONFIG_FILE_PATH = os.path.join(CONFIG_DIR, "prompt_config.yaml")
 
 GAZETTEER_ENTITIES_FILE_PATH = os.path.join(CONFIG_DIR, "gazetteer_entities.yaml")
 
-MCP_SERVER_PATH = os.path.join(ROOT_DIR, "code", "lesson3_mcp.py")
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+
+GAZETTEER_AUTOMATON_CACHE_PATH = os.path.join(CACHE_DIR, "gazetteer_automaton.pkl")
+
+LLM_CACHE_DB_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite")
+
+SEARCH_CACHE_DB_PATH = os.path.join(CACHE_DIR, "search_cache.sqlite")
+
+TAG_TYPE_ASSIGNMENTS_PATH = os.path.join(CACHE_DIR, "tag_type_assignments.json")
+
+CHECKPOINT_DB_PATH = os.path.join(CACHE_DIR, "a3_checkpoints.db")
+
+MCP_SERVER_PATH = os.path.join(ROOT_DIR, "code", "lesson4_mcp.py")
@@ -1,11 +1,32 @@
 """
 Prompt template construction functions for building modular prompts.
+
+System prompts are compiled once per process into `PromptTemplate`s, keyed by the
+content of their prompt config, and each template keeps a prebuilt `SystemMessage`.
+State initialization reuses these messages, so per document only the messages that
+carry the input text are built. A config object is hashed the first time it is seen
+and looked up by identity afterwards, so configs are treated as read-only: load a new
+copy (`load_config`) rather than editing one in place.
 """
 
-from typing import Union, List, Optional, Dict, Any
-from utils import load_config
+import hashlib
+from typing import Union, List, NamedTuple, Optional, Dict, Any, Callable, TypeVar
+
+from langchain_core.messages import SystemMessage
+
+from kv_cache import LRUCache
+from utils import config_hash, load_config
 from paths import REASONING_CONFIG_FILE_PATH
 
+T = TypeVar("T")
+
+# Compiled prompts keyed by (kind, config hash), and by (kind, config object id) with
+# the config kept alive so that its id is not reused.
+PROMPT_CACHE_MAX_SIZE = 256
+_compiled_by_content = LRUCache(PROMPT_CACHE_MAX_SIZE)
+_compiled_by_object = LRUCache(PROMPT_CACHE_MAX_SIZE)
+_instruction_messages = LRUCache(PROMPT_CACHE_MAX_SIZE)
+
 
 def lowercase_first_char(text: str) -> str:
     """Lowercases the first character of a string.
@@ -36,9 +57,17 @@ def format_prompt_section(lead_in: str, value: Union[str, List[str]]) -> str:
     return f"{lead_in}\n{formatted_value}"
 
 
-reasoning_strategies = load_config(REASONING_CONFIG_FILE_PATH).get(
-    "reasoning_strategies", {}
-)
+_reasoning_strategies: Optional[Dict[str, str]] = None
+
+
+def get_reasoning_strategies() -> Dict[str, str]:
+    """Returns the reasoning strategy prompts from `reasoning.yaml`, loaded on first use."""
+    global _reasoning_strategies
+    if _reasoning_strategies is None:
+        _reasoning_strategies = load_config(REASONING_CONFIG_FILE_PATH).get(
+            "reasoning_strategies", {}
+        )
+    return _reasoning_strategies
 
 
 def build_prompt_body(
@@ -122,7 +151,7 @@ def build_prompt_body(
         )
 
     if reasoning := prompt_config.get("reasoning_strategy"):
-        strategy_prompt = reasoning_strategies.get(reasoning, "")
+        strategy_prompt = get_reasoning_strategies().get(reasoning, "")
         if strategy_prompt:
             prompt_parts.append(strategy_prompt.strip())
 
@@ -142,8 +171,112 @@ def build_one_shot_prompt(
 def build_system_prompt_message(
     config: Dict[str, Any],
 ) -> str:
-    """Returns a system message dict for message-based LLM interfaces."""
-    return build_prompt_body(config, input_data="", finalize=False)
+    """Returns the system prompt text for message-based LLM interfaces."""
+    return get_prompt_template(config).text
+
+
+class PromptTemplate(NamedTuple):
+    """A system prompt compiled from an agent's `prompt_config`.
+
+    Attributes:
+        key: Hash of the prompt config the template was compiled from.
+        text: The system prompt.
+        message: The prebuilt system message, shared by every state that uses it.
+    """
+
+    key: str
+    text: str
+    message: SystemMessage
+
+
+def compile_once(kind: str, config: Any, compile_: Callable[[str], T]) -> T:
+    """
+    Returns `compile_(config_hash)` for a config, compiling it once per config content.
+
+    Args:
+        kind: Namespace of the compiled value (e.g. "system_prompt").
+        config: The (JSON-like) config the value is compiled from.
+        compile_: Builds the value; receives the hash of `config`.
+    """
+    object_key = (kind, id(config))
+    entry = _compiled_by_object.get(object_key)
+    if entry is not None and entry[0] is config:
+        return entry[1]
+    key = config_hash(config)
+    value = _compiled_by_content.get((kind, key))
+    if value is None:
+        value = compile_(key)
+        _compiled_by_content.set((kind, key), value)
+    _compiled_by_object.set(object_key, (config, value))
+    return value
+
+
+def get_prompt_template(prompt_config: Dict[str, Any]) -> PromptTemplate:
+    """Returns the compiled system prompt template for `prompt_config`."""
+
+    def compile_(key: str) -> PromptTemplate:
+        text = build_prompt_body(prompt_config, input_data="", finalize=False)
+        return PromptTemplate(key, text, _shared_system_message(text, key))
+
+    return compile_once("system_prompt", prompt_config, compile_)
+
+
+def get_system_prompt_message(prompt_config: Dict[str, Any]) -> SystemMessage:
+    """Returns the prebuilt system message of an agent's `prompt_config`."""
+    return get_prompt_template(prompt_config).message
+
+
+def get_instruction_message(text: str) -> SystemMessage:
+    """
+    Returns a prebuilt system message for an instruction that does not depend on the
+    document (e.g. the tag types or the maximum number of tags).
+    """
+    message = _instruction_messages.get(text)
+    if message is None:
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        message = _shared_system_message(text, key)
+        _instruction_messages.set(text, message)
+    return message
+
+
+def _shared_system_message(text: str, key: str) -> SystemMessage:
+    # `add_messages` gives messages without an id a random one, in place; a fixed id
+    # keeps the shared instance unchanged.
+    return SystemMessage(text, id=f"prompt-{key[:16]}")
+
+
+def clear_prompt_cache() -> None:
+    """Drops every compiled prompt template and instruction message."""
+    _compiled_by_content.clear()
+    _compiled_by_object.clear()
+    _instruction_messages.clear()
+
+
+PROMPT_LAYOUT_PER_AGENT = "per_agent"
+PROMPT_LAYOUT_SHARED_PREFIX = "shared_prefix"
+PROMPT_LAYOUTS = (PROMPT_LAYOUT_PER_AGENT, PROMPT_LAYOUT_SHARED_PREFIX)
+
+
+def build_shared_document_message(input_text: str) -> str:
+    """Returns the document block that leads every agent's messages in the shared-prefix layout.
+
+    The block must be byte-identical for all agents working on the same document, so
+    that providers with prompt caching can reuse the cached prefix across agents.
+    """
+    return (
+        "Here is the publication that all agents are working on:\n"
+        "<<<BEGIN CONTENT>>>\n"
+        "```\n" + input_text.strip() + "\n```\n<<<END CONTENT>>>"
+    )
+
+
+def validate_prompt_layout(prompt_layout: str) -> str:
+    """Returns `prompt_layout` or raises ValueError if it is not a known layout."""
+    if prompt_layout not in PROMPT_LAYOUTS:
+        raise ValueError(
+            f"Unknown prompt layout: {prompt_layout}. Expected one of {PROMPT_LAYOUTS}"
+        )
+    return prompt_layout
 
 
 def print_prompt_preview(prompt: str, max_length: int = 500) -> None:
@@ -0,0 +1,321 @@
+"""
+Web search backends used by the references generator.
+
+- `SearchBackend`: the interface. `search`/`asearch` return a list of result dicts with
+  `url`, `title` and `content` keys.
+- `TavilySearchBackend`: Tavily web search through one shared, reused client.
+- `FileSearchBackend`: serves canned results from a JSON fixture file, for tests and
+  benchmarks that must not hit the network.
+- `CachedSearchBackend`: wraps another backend with a query -> results cache (TTL, memory
+  tier plus optional SQLite tier). Queries are normalized before lookup, so queries that
+  differ only in case, punctuation or spacing share an entry.
+
+`run_searches` / `arun_searches` fan a list of queries out concurrently with a per-query
+timeout. Backends are created from the `search` config section with `build_search_backend`.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from kv_cache import LRUCache, SQLiteCache, TieredCache
+from paths import ROOT_DIR, SEARCH_CACHE_DB_PATH
+from utils import load_env
+
+DEFAULT_MAX_RESULTS = 3
+DEFAULT_TIMEOUT_SECONDS = 15.0
+DEFAULT_MAX_CONCURRENCY = 8
+
+SearchResults = List[Dict[str, Any]]
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases a query, strips punctuation and collapses whitespace."""
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class SearchBackend:
+    """Interface for web search backends."""
+
+    name = "base"
+
+    def search(self, query: str) -> SearchResults:
+        raise NotImplementedError
+
+    async def asearch(self, query: str) -> SearchResults:
+        """Async variant of `search`. Runs `search` in a worker thread by default."""
+        return await asyncio.to_thread(self.search, query)
+
+
+class TavilySearchBackend(SearchBackend):
+    """Tavily web search. The client is created once and reused for every query.
+
+    Args:
+        max_results: Maximum number of results per query.
+    """
+
+    name = "tavily"
+
+    def __init__(self, max_results: int = DEFAULT_MAX_RESULTS):
+        self.max_results = max_results
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from langchain_tavily import TavilySearch
+
+                    load_env()
+                    self._client = TavilySearch(max_results=self.max_results)
+        return self._client
+
+    def search(self, query: str) -> SearchResults:
+        return self.client.invoke(query)["results"]
+
+    async def asearch(self, query: str) -> SearchResults:
+        return (await self.client.ainvoke(query))["results"]
+
+
+class FileSearchBackend(SearchBackend):
+    """Serves search results from a JSON fixture file.
+
+    The file maps queries to lists of results. Keys are matched after `normalize_query`;
+    the optional `"*"` key holds the results returned for unknown queries.
+
+    Args:
+        path: Path to the JSON fixture file.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            fixtures = json.load(f)
+        self.fixtures = {
+            key if key == "*" else normalize_query(key): results
+            for key, results in fixtures.items()
+        }
+
+    def search(self, query: str) -> SearchResults:
+        return self.fixtures.get(normalize_query(query), self.fixtures.get("*", []))
+
+    async def asearch(self, query: str) -> SearchResults:
+        return self.search(query)
+
+
+class CachedSearchBackend(SearchBackend):
+    """Caches the results of another backend, keyed by the normalized query.
+
+    Args:
+        backend: The backend to query on a cache miss.
+        cache: The key-value store holding JSON-serialized results.
+        namespace: Prefix separating entries of differently configured backends.
+    """
+
+    def __init__(self, backend: SearchBackend, cache: TieredCache, namespace: str):
+        self.backend = backend
+        self.cache = cache
+        self.namespace = namespace
+        self.name = backend.name
+
+    def _key(self, query: str) -> str:
+        return f"{self.namespace}:{normalize_query(query)}"
+
+    def _lookup(self, query: str) -> Optional[SearchResults]:
+        value = self.cache.get(self._key(query))
+        return None if value is None else json.loads(value)
+
+    def _store(self, query: str, results: SearchResults) -> None:
+        self.cache.set(self._key(query), json.dumps(results))
+
+    def search(self, query: str) -> SearchResults:
+        results = self._lookup(query)
+        if results is None:
+            results = self.backend.search(query)
+            self._store(query, results)
+        return results
+
+    async def asearch(self, query: str) -> SearchResults:
+        results = self._lookup(query)
+        if results is None:
+            results = await self.backend.asearch(query)
+            self._store(query, results)
+        return results
+
+
+def _unique_queries(queries: List[str]) -> List[str]:
+    """Drops queries that are equivalent after normalization, keeping the first spelling."""
+    seen = set()
+    unique = []
+    for query in queries:
+        key = normalize_query(query)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+def run_searches(
+    backend: SearchBackend,
+    queries: List[str],
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[Tuple[str, Optional[SearchResults], Optional[Exception]]]:
+    """
+    Runs the queries concurrently in a thread pool.
+
+    Each query's timeout starts when its search starts. A search that times out is
+    abandoned and frees its slot for the next query.
+
+    Args:
+        backend: The search backend.
+        queries: The queries to run. Normalized duplicates are searched once.
+        timeout_seconds: How long to wait for each search before giving up on it.
+        max_concurrency: Maximum number of searches in flight.
+
+    Returns:
+        List of `(query, results, error)` tuples in query order. Exactly one of
+        `results` and `error` is set.
+    """
+    queries = _unique_queries(queries)
+    if not queries:
+        return []
+    # One thread per query, so abandoned searches never hold back queued ones; at most
+    # `max_concurrency` searches are started and not yet finished or timed out.
+    executor = ThreadPoolExecutor(max_workers=len(queries))
+    outcomes: Dict[int, Tuple[str, Optional[SearchResults], Optional[Exception]]] = {}
+    running: Dict[Future, Tuple[int, float]] = {}
+    next_index = 0
+    try:
+        while len(outcomes) < len(queries):
+            while next_index < len(queries) and len(running) < max_concurrency:
+                future = executor.submit(backend.search, queries[next_index])
+                running[future] = (next_index, time.monotonic() + timeout_seconds)
+                next_index += 1
+            first_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(
+                running,
+                timeout=max(0.0, first_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED,
+            )
+            now = time.monotonic()
+            for future, (index, deadline) in list(running.items()):
+                query = queries[index]
+                if future in done:
+                    error = future.exception()
+                    results = None if error is not None else future.result()
+                    outcomes[index] = (query, results, error)
+                elif deadline <= now:
+                    error = TimeoutError(f"Search timed out after {timeout_seconds}s")
+                    outcomes[index] = (query, None, error)
+                else:
+                    continue
+                del running[future]
+        return [outcomes[index] for index in range(len(queries))]
+    finally:
+        # Do not block on searches that timed out.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def arun_searches(
+    backend: SearchBackend,
+    queries: List[str],
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[Tuple[str, Optional[SearchResults], Optional[Exception]]]:
+    """Async variant of `run_searches`. Each query gets its own timeout."""
+    queries = _unique_queries(queries)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(query: str):
+        try:
+            async with semaphore:
+                results = await asyncio.wait_for(
+                    backend.asearch(query), timeout=timeout_seconds
+                )
+        except asyncio.TimeoutError:
+            error = TimeoutError(f"Search timed out after {timeout_seconds}s")
+            return query, None, error
+        except Exception as e:
+            return query, None, e
+        return query, results, None
+
+    return list(await asyncio.gather(*(run_one(query) for query in queries)))
+
+
+def _build_tavily_backend(search_config: Dict[str, Any]) -> SearchBackend:
+    return TavilySearchBackend(
+        max_results=search_config.get("max_results", DEFAULT_MAX_RESULTS)
+    )
+
+
+def _build_file_backend(search_config: Dict[str, Any]) -> SearchBackend:
+    path = search_config["fixture_path"]
+    if not os.path.isabs(path):
+        path = os.path.join(ROOT_DIR, path)
+    return FileSearchBackend(path)
+
+
+SEARCH_BACKENDS: Dict[str, Callable[[Dict[str, Any]], SearchBackend]] = {
+    "tavily": _build_tavily_backend,
+    "file": _build_file_backend,
+}
+
+
+def register_search_backend(
+    name: str, factory: Callable[[Dict[str, Any]], SearchBackend]
+) -> None:
+    """Makes a backend available as `search.backend: <name>` in the config."""
+    SEARCH_BACKENDS[name] = factory
+
+
+def build_search_backend(search_config: Dict[str, Any]) -> SearchBackend:
+    """
+    Builds the search backend described by the `search` config section.
+
+    Args:
+        search_config: Dictionary with `backend`, `max_results`, `fixture_path` and a
+            `cache` block (`enabled`, `ttl_seconds`, `memory_max_entries`,
+            `disk_enabled`, `disk_path`, `disk_max_entries`).
+
+    Returns:
+        SearchBackend: The backend, wrapped in a `CachedSearchBackend` if caching is enabled.
+    """
+    backend_name = search_config.get("backend", "tavily")
+    if backend_name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown search backend: {backend_name}")
+    backend = SEARCH_BACKENDS[backend_name](search_config)
+
+    cache_config = search_config.get("cache", {})
+    if not cache_config.get("enabled", False):
+        return backend
+
+    ttl_seconds = cache_config.get("ttl_seconds")
+    memory = LRUCache(
+        max_entries=cache_config.get("memory_max_entries", 2048),
+        ttl_seconds=ttl_seconds,
+    )
+    disk = None
+    if cache_config.get("disk_enabled", True):
+        disk_path = cache_config.get("disk_path") or SEARCH_CACHE_DB_PATH
+        if not os.path.isabs(disk_path):
+            disk_path = os.path.join(ROOT_DIR, disk_path)
+        disk = SQLiteCache(
+            disk_path,
+            max_entries=cache_config.get("disk_max_entries", 50_000),
+            ttl_seconds=ttl_seconds,
+        )
+    max_results = search_config.get("max_results", DEFAULT_MAX_RESULTS)
+    return CachedSearchBackend(
+        backend, TieredCache(memory, disk), namespace=f"{backend_name}:{max_results}"
+    )
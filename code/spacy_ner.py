@@ -0,0 +1,363 @@
+"""
+Batched spaCy named-entity extraction.
+
+Documents are split into paragraph-sized chunks, streamed through `nlp.pipe` with only
+the components NER depends on enabled, and the per-chunk entities are merged back into
+one deduplicated list per document. Both the single-document spaCy node and the batch
+corpus runner use this path.
+
+Models are selected per deployment in the `spacy_ner` config section and loaded lazily
+into a process-wide registry on first use, so building a graph never pays for spaCy
+until an entity is actually extracted. An optional fast path runs a small model first
+and sends only the sentences holding low-confidence entity spans to the accurate model.
+"""
+
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from spacy.language import Language
+
+# NER only needs the shared token-to-vector layer (`tok2vec` for the CNN models,
+# `transformer` for en_core_web_trf) and the `ner` component itself.
+NER_PIPE_COMPONENTS = {"transformer", "tok2vec", "ner"}
+
+EXCLUDED_SPACY_ENTITY_TYPES = {"DATE", "CARDINAL"}
+
+DEFAULT_MODEL = "en_core_web_trf"
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_N_PROCESS = 1
+DEFAULT_MAX_CHUNK_CHARS = 2000
+
+DEFAULT_FAST_PATH_MODEL = "en_core_web_sm"
+DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+DEFAULT_BEAM_WIDTH = 16
+# Beam candidates below this probability are noise, not ambiguity.
+MIN_CANDIDATE_PROBABILITY = 0.05
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+_SENTENCE_OR_LINE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_models: Dict[str, "Language"] = {}
+_models_lock = threading.Lock()
+
+
+def get_spacy_model(model_name: str) -> "Language":
+    """
+    Returns the spaCy pipeline `model_name`, loading it on first use.
+
+    Loaded pipelines are kept in a process-wide registry and shared by every graph
+    instance and the batch runner.
+    """
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                import spacy
+
+                print(f"⏳ Loading spaCy model '{model_name}'...")
+                model = spacy.load(model_name)
+                _models[model_name] = model
+    return model
+
+
+def _split_long_text(text: str, max_chunk_chars: int) -> List[str]:
+    """Splits text that exceeds `max_chunk_chars` on sentence boundaries, then hard-wraps."""
+    pieces = []
+    for sentence in _SENTENCE_BREAK.split(text):
+        while len(sentence) > max_chunk_chars:
+            pieces.append(sentence[:max_chunk_chars])
+            sentence = sentence[max_chunk_chars:]
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def split_into_chunks(text: str, max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Splits a document into chunks of at most `max_chunk_chars` characters.
+
+    Paragraphs are packed greedily into chunks; paragraphs that are too long on their
+    own are split on sentence boundaries.
+
+    Args:
+        text: The document text.
+        max_chunk_chars: Maximum chunk length in characters.
+
+    Returns:
+        List[str]: The chunks, in document order.
+    """
+    chunks: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _split_long_text(paragraph, max_chunk_chars):
+            if current and len(current) + len(piece) + 2 > max_chunk_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_entities(entity_lists: Iterable[Iterable[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """Merges per-chunk entities into one list, deduplicated on (name, type)."""
+    seen = set()
+    merged = []
+    for entities in entity_lists:
+        for entity in entities:
+            key = (entity["name"], entity["type"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(entity)
+    return merged
+
+
+def _doc_entities(doc) -> List[Dict[str, str]]:
+    return [
+        {"name": ent.text.lower().strip(), "type": ent.label_.strip()}
+        for ent in doc.ents
+        if ent.label_ not in EXCLUDED_SPACY_ENTITY_TYPES
+    ]
+
+
+def _ner_disabled_components(model: "Language") -> List[str]:
+    return [name for name in model.pipe_names if name not in NER_PIPE_COMPONENTS]
+
+
+def extract_entities_batch(
+    model: "Language",
+    texts: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    n_process: int = DEFAULT_N_PROCESS,
+    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+) -> List[List[Dict[str, str]]]:
+    """
+    Extracts unique named entities from each text using `nlp.pipe`.
+
+    Args:
+        model: A loaded spaCy pipeline.
+        texts: The documents to process.
+        batch_size: Number of chunks per `nlp.pipe` batch.
+        n_process: Number of worker processes used by `nlp.pipe`.
+        max_chunk_chars: Maximum chunk length; longer documents are split and merged back.
+
+    Returns:
+        List[List[Dict[str, str]]]: One list of `{"name", "type"}` entities per input text.
+    """
+    chunk_inputs = [
+        (chunk, doc_index)
+        for doc_index, text in enumerate(texts)
+        for chunk in split_into_chunks(text, max_chunk_chars)
+    ]
+    disabled = _ner_disabled_components(model)
+
+    per_doc_chunks: List[List[List[Dict[str, str]]]] = [[] for _ in texts]
+    for doc, doc_index in model.pipe(
+        chunk_inputs,
+        as_tuples=True,
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=disabled,
+    ):
+        per_doc_chunks[doc_index].append(_doc_entities(doc))
+
+    return [merge_entities(chunks) for chunks in per_doc_chunks]
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """Returns the character spans of the sentences (or lines) in `text`."""
+    spans = []
+    start = 0
+    for match in _SENTENCE_OR_LINE_BREAK.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def extract_entities_fast_path(
+    fast_model: "Language",
+    accurate_model: "Language",
+    texts: Sequence[str],
+    confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD,
+    beam_width: int = DEFAULT_BEAM_WIDTH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    n_process: int = DEFAULT_N_PROCESS,
+    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+) -> List[List[Dict[str, str]]]:
+    """
+    Extracts entities with a fast model, re-running only uncertain sentences on an accurate model.
+
+    The fast model's NER beam gives a probability for every candidate entity span. A
+    sentence is uncertain if any candidate span in it scores between
+    `MIN_CANDIDATE_PROBABILITY` and `confidence_threshold`. Entities from certain
+    sentences are kept from the fast model; uncertain sentences are sent to the
+    accurate model and its entities are used instead.
+
+    Args:
+        fast_model: A small pipeline with a beam-capable `ner` component (e.g. en_core_web_sm).
+        accurate_model: The pipeline used for uncertain sentences (e.g. en_core_web_trf).
+        texts: The documents to process.
+        confidence_threshold: Minimum entity probability to accept the fast model's output.
+        beam_width: Beam width used to score the fast model's entity candidates.
+        batch_size: Number of chunks per `nlp.pipe` batch.
+        n_process: Number of worker processes used by `nlp.pipe`.
+        max_chunk_chars: Maximum chunk length; longer documents are split and merged back.
+
+    Returns:
+        List[List[Dict[str, str]]]: One list of `{"name", "type"}` entities per input text.
+    """
+    chunk_texts: List[str] = []
+    chunk_doc_index: List[int] = []
+    for doc_index, text in enumerate(texts):
+        for chunk in split_into_chunks(text, max_chunk_chars):
+            chunk_texts.append(chunk)
+            chunk_doc_index.append(doc_index)
+
+    fast_docs = list(
+        fast_model.pipe(
+            chunk_texts,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=_ner_disabled_components(fast_model),
+        )
+    )
+    ner = fast_model.get_pipe("ner")
+    span_scores = ner.scored_ents(
+        ner.beam_parse(fast_docs, beam_width=beam_width, beam_density=0.0001)
+    )
+
+    # (chunk index, character offset, entity) so entities can be merged in text order.
+    found: List[Tuple[int, int, Dict[str, str]]] = []
+    rerun_inputs: List[Tuple[str, Tuple[int, int]]] = []
+    for chunk_index, (doc, scores) in enumerate(zip(fast_docs, span_scores)):
+        sentences = _sentence_spans(doc.text)
+
+        def sentence_of(char_offset: int) -> int:
+            for sentence_index, (start, end) in enumerate(sentences):
+                if start <= char_offset < end:
+                    return sentence_index
+            return -1
+
+        uncertain = set()
+        for (start, end, _label), probability in scores.items():
+            if MIN_CANDIDATE_PROBABILITY <= probability < confidence_threshold:
+                uncertain.add(sentence_of(doc[start].idx))
+
+        for ent in doc.ents:
+            if ent.label_ in EXCLUDED_SPACY_ENTITY_TYPES:
+                continue
+            if sentence_of(ent.start_char) in uncertain:
+                continue
+            found.append(
+                (
+                    chunk_index,
+                    ent.start_char,
+                    {"name": ent.text.lower().strip(), "type": ent.label_.strip()},
+                )
+            )
+        for sentence_index in sorted(uncertain - {-1}):
+            start, end = sentences[sentence_index]
+            rerun_inputs.append((doc.text[start:end], (chunk_index, start)))
+
+    if rerun_inputs:
+        for doc, (chunk_index, offset) in accurate_model.pipe(
+            rerun_inputs,
+            as_tuples=True,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=_ner_disabled_components(accurate_model),
+        ):
+            for ent in doc.ents:
+                if ent.label_ in EXCLUDED_SPACY_ENTITY_TYPES:
+                    continue
+                found.append(
+                    (
+                        chunk_index,
+                        offset + ent.start_char,
+                        {"name": ent.text.lower().strip(), "type": ent.label_.strip()},
+                    )
+                )
+
+    per_doc: List[List[Dict[str, str]]] = [[] for _ in texts]
+    for chunk_index, _offset, entity in sorted(found, key=lambda item: item[:2]):
+        per_doc[chunk_doc_index[chunk_index]].append(entity)
+    return [merge_entities([entities]) for entities in per_doc]
+
+
+def extract_entities(
+    texts: Sequence[str], spacy_config: Dict[str, Any]
+) -> List[List[Dict[str, str]]]:
+    """
+    Extracts entities from each text using the models selected in the `spacy_ner` config.
+
+    Args:
+        texts: The documents to process.
+        spacy_config: The `spacy_ner` config section (`model`, `batch_size`, `n_process`,
+            `max_chunk_chars` and an optional `fast_path` block).
+
+    Returns:
+        List[List[Dict[str, str]]]: One list of `{"name", "type"}` entities per input text.
+    """
+    model_name = spacy_config.get("model", DEFAULT_MODEL)
+    batch_size = spacy_config.get("batch_size", DEFAULT_BATCH_SIZE)
+    n_process = spacy_config.get("n_process", DEFAULT_N_PROCESS)
+    max_chunk_chars = spacy_config.get("max_chunk_chars", DEFAULT_MAX_CHUNK_CHARS)
+
+    fast_path = spacy_config.get("fast_path", {})
+    fast_model_name = fast_path.get("model", DEFAULT_FAST_PATH_MODEL)
+    if fast_path.get("enabled", False) and fast_model_name != model_name:
+        return extract_entities_fast_path(
+            get_spacy_model(fast_model_name),
+            get_spacy_model(model_name),
+            texts,
+            confidence_threshold=fast_path.get(
+                "confidence_threshold", DEFAULT_CONFIDENCE_THRESHOLD
+            ),
+            beam_width=fast_path.get("beam_width", DEFAULT_BEAM_WIDTH),
+            batch_size=batch_size,
+            n_process=n_process,
+            max_chunk_chars=max_chunk_chars,
+        )
+
+    return extract_entities_batch(
+        get_spacy_model(model_name),
+        texts,
+        batch_size=batch_size,
+        n_process=n_process,
+        max_chunk_chars=max_chunk_chars,
+    )
+
+
+def extract_entities_or_errors(
+    texts: Sequence[str], spacy_config: Dict[str, Any]
+) -> List[Union[List[Dict[str, str]], Exception]]:
+    """
+    Runs `extract_entities` over all texts, retrying each text alone if that fails.
+
+    One bad document then fails only itself instead of the whole batch.
+
+    Returns:
+        List[Union[List[Dict[str, str]], Exception]]: Per text, its entities or the
+        exception that extraction raised.
+    """
+    try:
+        return extract_entities(texts, spacy_config)
+    except Exception:
+        pass
+    results: List[Union[List[Dict[str, str]], Exception]] = []
+    for text in texts:
+        try:
+            results.extend(extract_entities([text], spacy_config))
+        except Exception as e:
+            results.append(e)
+    return results
@@ -1,4 +1,4 @@
-from typing import List, Optional, TypedDict, Sequence, Dict
+from typing import Any, List, Optional, TypedDict, Sequence, Dict
 from pydantic import BaseModel, Field
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langgraph.graph.message import AnyMessage, add_messages
@@ -6,8 +6,26 @@ from pprint import pprint
 from typing_extensions import Annotated
 
 
-from prompt_builder import build_system_prompt_message
-from states.tag_generation_state import TagGenerationState, generate_tag_types_prompt
+from consts import (
+    MANAGER,
+    LLM_TAGS_GENERATOR,
+    TAG_TYPE_ASSIGNER,
+    TAGS_SELECTOR,
+    TLDR_GENERATOR,
+    TITLE_GENERATOR,
+    REFERENCES_GENERATOR,
+    REFERENCES_SELECTOR,
+    REVIEWER,
+)
+from prompt_builder import (
+    PROMPT_LAYOUT_PER_AGENT,
+    PROMPT_LAYOUT_SHARED_PREFIX,
+    build_shared_document_message,
+    get_instruction_message,
+    get_system_prompt_message,
+    validate_prompt_layout,
+)
+from states.tag_generation_state import TagGenerationState, get_tag_types_message
 
 
 class A3SystemState(TypedDict, TagGenerationState):
@@ -40,6 +58,12 @@ class A3SystemState(TypedDict, TagGenerationState):
     tldr_approved: Optional[bool]
     title_approved: Optional[bool]
     references_approved: Optional[bool]
+    # Revision round in which each component was last (re)generated
+    tldr_round: Optional[int]
+    title_round: Optional[int]
+    references_round: Optional[int]
+    # Generators the reviewer is still waiting on in the current round
+    pending_components: Optional[List[str]]
     max_revisions: Optional[int]
     max_search_queries: Optional[int]
     max_references: Optional[int]
@@ -61,71 +85,221 @@ def initialize_a3_state(
     max_references: int,
     reviewer_prompt_cfg: dict,
     max_revisions: int,
+    prompt_layout: str = PROMPT_LAYOUT_PER_AGENT,
+    document_text: Optional[str] = None,
+    precomputed_llm_tags: Optional[List[Dict[str, str]]] = None,
 ) -> A3SystemState:
-    """Initialize the A3 system state with default values."""
+    """Initialize the A3 system state with default values.
+
+    With `prompt_layout="shared_prefix"`, every agent's messages start with the same
+    document block and the agent's own instructions follow it, so the document is a
+    prefix that providers can serve from their prompt cache.
+
+    `document_text` replaces `input_text` in the agents' prompts (e.g. a digest of a
+    long publication, see `document_digest`); `input_text` is still what spaCy and the
+    gazetteer process. `precomputed_llm_tags` skips the LLM tag generator's call.
+    """
+    prompt_text = input_text if document_text is None else document_text
+    if validate_prompt_layout(prompt_layout) == PROMPT_LAYOUT_SHARED_PREFIX:
+        message_lists = _build_shared_prefix_messages(
+            input_text=prompt_text,
+            manager_prompt_cfg=manager_prompt_cfg,
+            llm_tags_generator_prompt_cfg=llm_tags_generator_prompt_cfg,
+            tag_type_assigner_prompt_cfg=tag_type_assigner_prompt_cfg,
+            tags_selector_prompt_cfg=tags_selector_prompt_cfg,
+            max_tags=max_tags,
+            tag_types=tag_types,
+            title_gen_prompt_cfg=title_gen_prompt_cfg,
+            tldr_gen_prompt_cfg=tldr_gen_prompt_cfg,
+            references_gen_prompt_cfg=references_gen_prompt_cfg,
+            max_search_queries=max_search_queries,
+            references_selector_prompt_cfg=references_selector_prompt_cfg,
+            max_references=max_references,
+            reviewer_prompt_cfg=reviewer_prompt_cfg,
+        )
+    else:
+        message_lists = _build_per_agent_messages(
+            input_text=prompt_text,
+            manager_prompt_cfg=manager_prompt_cfg,
+            llm_tags_generator_prompt_cfg=llm_tags_generator_prompt_cfg,
+            tag_type_assigner_prompt_cfg=tag_type_assigner_prompt_cfg,
+            tags_selector_prompt_cfg=tags_selector_prompt_cfg,
+            max_tags=max_tags,
+            tag_types=tag_types,
+            title_gen_prompt_cfg=title_gen_prompt_cfg,
+            tldr_gen_prompt_cfg=tldr_gen_prompt_cfg,
+            references_gen_prompt_cfg=references_gen_prompt_cfg,
+            max_search_queries=max_search_queries,
+            references_selector_prompt_cfg=references_selector_prompt_cfg,
+            max_references=max_references,
+            reviewer_prompt_cfg=reviewer_prompt_cfg,
+        )
+
+    return A3SystemState(
+        input_text=input_text,
+        manager_brief=None,
+        **message_lists,
+        tldr=None,
+        title=None,
+        llm_tags=[],
+        precomputed_llm_tags=precomputed_llm_tags,
+        spacy_tags=[],
+        gazetteer_tags=[],
+        all_tags=[],
+        selected_tags=[],
+        reference_search_queries=None,
+        candidate_references=[],
+        selected_references=[],
+        revision_round=0,
+        needs_revision=False,
+        tldr_feedback=None,
+        title_feedback=None,
+        references_feedback=None,
+        tldr_approved=False,
+        title_approved=False,
+        references_approved=False,
+        tldr_round=None,
+        title_round=None,
+        references_round=None,
+        pending_components=[],
+        max_revisions=max_revisions,
+        max_tags=max_tags,
+        tag_types=tag_types,
+    )
+
+
+def _build_shared_prefix_messages(
+    input_text: str,
+    manager_prompt_cfg: dict,
+    llm_tags_generator_prompt_cfg: dict,
+    tag_type_assigner_prompt_cfg: dict,
+    tags_selector_prompt_cfg: dict,
+    max_tags: int,
+    tag_types: List[Dict[str, str]],
+    title_gen_prompt_cfg: dict,
+    tldr_gen_prompt_cfg: dict,
+    references_gen_prompt_cfg: dict,
+    max_search_queries: int,
+    references_selector_prompt_cfg: dict,
+    max_references: int,
+    reviewer_prompt_cfg: dict,
+) -> Dict[str, List[BaseMessage]]:
+    """Builds every agent's message list as [shared document block, agent instructions...]."""
+    document_message = SystemMessage(build_shared_document_message(input_text))
+    tag_types_message = get_tag_types_message(tag_types)
+
+    def agent_messages(
+        prompt_cfg: dict, *instructions: SystemMessage
+    ) -> List[BaseMessage]:
+        return [document_message, get_system_prompt_message(prompt_cfg), *instructions]
+
+    return dict(
+        manager_messages=agent_messages(manager_prompt_cfg)
+        + [HumanMessage("Here's your input text: the publication above.")],
+        title_gen_messages=agent_messages(title_gen_prompt_cfg),
+        tldr_gen_messages=agent_messages(tldr_gen_prompt_cfg),
+        llm_tags_gen_messages=agent_messages(llm_tags_generator_prompt_cfg, tag_types_message),
+        tag_type_assigner_messages=agent_messages(tag_type_assigner_prompt_cfg, tag_types_message),
+        tags_selector_messages=agent_messages(
+            tags_selector_prompt_cfg,
+            get_instruction_message(
+                f"Please select at most {max_tags} tags from the generated list."
+            ),
+        ),
+        references_gen_messages=agent_messages(
+            references_gen_prompt_cfg,
+            get_instruction_message(
+                f"Please generate at most {max_search_queries} search queries from the generated list."
+            ),
+        ),
+        references_selector_messages=agent_messages(
+            references_selector_prompt_cfg,
+            get_instruction_message(
+                f"Please select at most {max_references} references from the given list of references."
+            ),
+        ),
+        reviewer_messages=agent_messages(reviewer_prompt_cfg),
+    )
+
+
+def _build_per_agent_messages(
+    input_text: str,
+    manager_prompt_cfg: dict,
+    llm_tags_generator_prompt_cfg: dict,
+    tag_type_assigner_prompt_cfg: dict,
+    tags_selector_prompt_cfg: dict,
+    max_tags: int,
+    tag_types: List[Dict[str, str]],
+    title_gen_prompt_cfg: dict,
+    tldr_gen_prompt_cfg: dict,
+    references_gen_prompt_cfg: dict,
+    max_search_queries: int,
+    references_selector_prompt_cfg: dict,
+    max_references: int,
+    reviewer_prompt_cfg: dict,
+) -> Dict[str, List[BaseMessage]]:
+    """Builds every agent's message list with its own system prompt in front of the text."""
     # manager system prompt
     manager_messages = [
-        SystemMessage(build_system_prompt_message(manager_prompt_cfg)),
+        get_system_prompt_message(manager_prompt_cfg),
         HumanMessage(f"Here's your input text:\n\n{input_text}"),
     ]
 
     title_gen_messages = [
-        SystemMessage(build_system_prompt_message(title_gen_prompt_cfg)),
+        get_system_prompt_message(title_gen_prompt_cfg),
         SystemMessage(f"Here's your input text for title generation:\n\n{input_text}"),
     ]
     tldr_gen_messages = [
-        SystemMessage(build_system_prompt_message(tldr_gen_prompt_cfg)),
+        get_system_prompt_message(tldr_gen_prompt_cfg),
         SystemMessage(f"Here's your input text for TL;DR generation:\n\n{input_text}"),
     ]
     # worker nodes system prompts. we dont add the publication text yet
-    tag_types_prompt = generate_tag_types_prompt(tag_types)
+    tag_types_message = get_tag_types_message(tag_types)
     llm_tags_gen_messages = [
-        SystemMessage(build_system_prompt_message(llm_tags_generator_prompt_cfg)),
-        SystemMessage(f"Here are the tag types you can assign:\n\n{tag_types_prompt}"),
+        get_system_prompt_message(llm_tags_generator_prompt_cfg),
+        tag_types_message,
         SystemMessage(f"Here's your input text for tags generation:\n\n{input_text}"),
     ]
     tag_type_assigner_messages = [
-        SystemMessage(build_system_prompt_message(tag_type_assigner_prompt_cfg)),
-        SystemMessage(f"Here are the tag types you can assign:\n\n{tag_types_prompt}"),
+        get_system_prompt_message(tag_type_assigner_prompt_cfg),
+        tag_types_message,
         SystemMessage(
             f"Here's your input text for tag type assignment:\n\n{input_text}"
         ),
     ]
     tags_selector_messages = [
-        SystemMessage(build_system_prompt_message(tags_selector_prompt_cfg)),
+        get_system_prompt_message(tags_selector_prompt_cfg),
         SystemMessage(
             f"Here's your input text for tag selection reference:\n\n{input_text}"
         ),
-        SystemMessage(
+        get_instruction_message(
             f"Please select at most {max_tags} tags from the generated list."
         ),
     ]
     references_gen_messages = [
-        SystemMessage(build_system_prompt_message(references_gen_prompt_cfg)),
+        get_system_prompt_message(references_gen_prompt_cfg),
         SystemMessage(
             f"Here's your input text for generating search queries:\n\n{input_text}"
         ),
-        SystemMessage(
+        get_instruction_message(
             f"Please generate at most {max_search_queries} search queries from the generated list."
         ),
     ]
     references_selector_messages = [
-        SystemMessage(build_system_prompt_message(references_selector_prompt_cfg)),
+        get_system_prompt_message(references_selector_prompt_cfg),
         SystemMessage(
             f"Here's your input text for selecting appropriate references:\n\n{input_text}"
         ),
-        SystemMessage(
+        get_instruction_message(
             f"Please select at most {max_references} references from the given list of references."
         ),
     ]
     reviewer_messages = [
-        SystemMessage(build_system_prompt_message(reviewer_prompt_cfg)),
+        get_system_prompt_message(reviewer_prompt_cfg),
         SystemMessage(f"Here's your input text for review work:\n\n{input_text}"),
     ]
 
-    return A3SystemState(
-        input_text=input_text,
-        manager_brief=None,
+    return dict(
         manager_messages=manager_messages,
         title_gen_messages=title_gen_messages,
         llm_tags_gen_messages=llm_tags_gen_messages,
@@ -135,25 +309,34 @@ def initialize_a3_state(
         references_gen_messages=references_gen_messages,
         references_selector_messages=references_selector_messages,
         reviewer_messages=reviewer_messages,
-        tldr=None,
-        title=None,
-        llm_tags=[],
-        spacy_tags=[],
-        gazetteer_tags=[],
-        all_tags=[],
-        selected_tags=[],
-        reference_search_queries=None,
-        candidate_references=[],
-        selected_references=[],
-        revision_round=0,
-        needs_revision=False,
-        tldr_feedback=None,
-        title_feedback=None,
-        references_feedback=None,
-        tldr_approved=False,
-        title_approved=False,
-        references_approved=False,
-        max_revisions=max_revisions,
-        max_tags=max_tags,
-        tag_types=tag_types,
+    )
+
+
+def initialize_a3_state_from_config(
+    input_text: str,
+    a3_config: Dict[str, Any],
+    document_text: Optional[str] = None,
+    precomputed_llm_tags: Optional[List[Dict[str, str]]] = None,
+) -> A3SystemState:
+    """Initializes the A3 system state from the `a3_system` config section."""
+    agents = a3_config["agents"]
+    return initialize_a3_state(
+        input_text=input_text,
+        manager_prompt_cfg=agents[MANAGER]["prompt_config"],
+        llm_tags_generator_prompt_cfg=agents[LLM_TAGS_GENERATOR]["prompt_config"],
+        tag_type_assigner_prompt_cfg=agents[TAG_TYPE_ASSIGNER]["prompt_config"],
+        tags_selector_prompt_cfg=agents[TAGS_SELECTOR]["prompt_config"],
+        tag_types=a3_config["tag_types"],
+        max_tags=a3_config["max_tags"],
+        title_gen_prompt_cfg=agents[TITLE_GENERATOR]["prompt_config"],
+        tldr_gen_prompt_cfg=agents[TLDR_GENERATOR]["prompt_config"],
+        references_gen_prompt_cfg=agents[REFERENCES_GENERATOR]["prompt_config"],
+        max_search_queries=a3_config["max_search_queries"],
+        references_selector_prompt_cfg=agents[REFERENCES_SELECTOR]["prompt_config"],
+        max_references=a3_config["max_references"],
+        reviewer_prompt_cfg=agents[REVIEWER]["prompt_config"],
+        max_revisions=a3_config["max_revisions"],
+        prompt_layout=a3_config.get("prompt_layout", PROMPT_LAYOUT_PER_AGENT),
+        document_text=document_text,
+        precomputed_llm_tags=precomputed_llm_tags,
     )
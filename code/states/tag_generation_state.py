@@ -1,9 +1,18 @@
-from typing import Dict, List, TypedDict
+from typing import Any, Dict, List, Optional, TypedDict
 from langgraph.graph.message import AnyMessage, add_messages
 from langchain_core.messages import HumanMessage, SystemMessage
 from typing_extensions import Annotated
 
-from prompt_builder import build_system_prompt_message
+from consts import LLM_TAGS_GENERATOR, TAG_TYPE_ASSIGNER, TAGS_SELECTOR
+from prompt_builder import (
+    PROMPT_LAYOUT_PER_AGENT,
+    PROMPT_LAYOUT_SHARED_PREFIX,
+    build_shared_document_message,
+    compile_once,
+    get_instruction_message,
+    get_system_prompt_message,
+    validate_prompt_layout,
+)
 
 
 class TagGenerationState(TypedDict):
@@ -17,8 +26,12 @@ class TagGenerationState(TypedDict):
 
     llm_tags: List[Dict[str, str]]
     spacy_tags: List[Dict[str, str]]
+    precomputed_spacy_tags: Optional[List[Dict[str, str]]]
+    precomputed_llm_tags: Optional[List[Dict[str, str]]]
     gazetteer_tags: List[Dict[str, str]]
     candidate_tags: List[Dict[str, str]]
+    ranked_tags: Optional[List[Dict[str, Any]]]
+    tags_ranking_confident: Optional[bool]
     selected_tags: List[Dict[str, str]]
     max_tags: int
 
@@ -45,6 +58,22 @@ def generate_tag_types_prompt(tag_types: List[Dict[str, str]]) -> str:
     return "\n".join(lines)
 
 
+def get_tag_types_message(tag_types: List[Dict[str, str]]) -> SystemMessage:
+    """
+    Returns the prebuilt system message listing the tag types the LLM can assign.
+
+    The list is rendered once per tag types config.
+    """
+    return compile_once(
+        "tag_types",
+        tag_types,
+        lambda _: get_instruction_message(
+            "Here are the tag types you can assign:\n\n"
+            + generate_tag_types_prompt(tag_types)
+        ),
+    )
+
+
 def initialize_tag_generation_state(
     input_text: str,
     llm_tags_generator_prompt_cfg: dict,
@@ -52,30 +81,63 @@ def initialize_tag_generation_state(
     tags_selector_prompt_cfg: dict,
     tag_types: List[Dict[str, str]],
     max_tags: int = 10,
+    precomputed_spacy_tags: Optional[List[Dict[str, str]]] = None,
+    prompt_layout: str = PROMPT_LAYOUT_PER_AGENT,
 ) -> TagGenerationState:
-    """Initializes the state for the tag generation graph."""
-    tag_types_prompt = generate_tag_types_prompt(tag_types)
-    llm_tags_gen_messages = [
-        SystemMessage(build_system_prompt_message(llm_tags_generator_prompt_cfg)),
-        SystemMessage(f"Here are the tag types you can assign:\n\n{tag_types_prompt}"),
-        HumanMessage(f"Here's your input text for tags generation:\n\n{input_text}"),
-    ]
-    tag_type_assigner_messages = [
-        SystemMessage(build_system_prompt_message(tag_type_assigner_prompt_cfg)),
-        SystemMessage(f"Here are the tag types you can assign:\n\n{tag_types_prompt}"),
-        SystemMessage(
-            f"Here's your input text for tag type assignment:\n\n{input_text}"
-        ),
-    ]
-    tags_selector_messages = [
-        SystemMessage(build_system_prompt_message(tags_selector_prompt_cfg)),
-        SystemMessage(
-            f"Here's your input text for tag selection reference:\n\n{input_text}"
-        ),
-        SystemMessage(
-            f"Please select at most {max_tags} tags from the generated list."
-        ),
-    ]
+    """Initializes the state for the tag generation graph.
+
+    `precomputed_spacy_tags` lets callers that already ran spaCy over the text (such as
+    the batch runner) skip the extraction inside the graph.
+
+    With `prompt_layout="shared_prefix"`, every agent's messages start with the same
+    document block and the agent's own instructions follow it (see
+    `build_shared_document_message`).
+    """
+    tag_types_message = get_tag_types_message(tag_types)
+    if validate_prompt_layout(prompt_layout) == PROMPT_LAYOUT_SHARED_PREFIX:
+        document_message = SystemMessage(build_shared_document_message(input_text))
+        llm_tags_gen_messages = [
+            document_message,
+            get_system_prompt_message(llm_tags_generator_prompt_cfg),
+            tag_types_message,
+            HumanMessage("Generate tags for the publication above."),
+        ]
+        tag_type_assigner_messages = [
+            document_message,
+            get_system_prompt_message(tag_type_assigner_prompt_cfg),
+            tag_types_message,
+        ]
+        tags_selector_messages = [
+            document_message,
+            get_system_prompt_message(tags_selector_prompt_cfg),
+            get_instruction_message(
+                f"Please select at most {max_tags} tags from the generated list."
+            ),
+        ]
+    else:
+        llm_tags_gen_messages = [
+            get_system_prompt_message(llm_tags_generator_prompt_cfg),
+            tag_types_message,
+            HumanMessage(
+                f"Here's your input text for tags generation:\n\n{input_text}"
+            ),
+        ]
+        tag_type_assigner_messages = [
+            get_system_prompt_message(tag_type_assigner_prompt_cfg),
+            tag_types_message,
+            SystemMessage(
+                f"Here's your input text for tag type assignment:\n\n{input_text}"
+            ),
+        ]
+        tags_selector_messages = [
+            get_system_prompt_message(tags_selector_prompt_cfg),
+            SystemMessage(
+                f"Here's your input text for tag selection reference:\n\n{input_text}"
+            ),
+            get_instruction_message(
+                f"Please select at most {max_tags} tags from the generated list."
+            ),
+        ]
     return TagGenerationState(
         input_text=input_text,
         llm_tags_gen_messages=llm_tags_gen_messages,
@@ -83,7 +145,29 @@ def initialize_tag_generation_state(
         tags_selector_messages=tags_selector_messages,
         llm_tags=[],
         spacy_tags=[],
+        precomputed_spacy_tags=precomputed_spacy_tags,
         gazetteer_tags=[],
         all_tags=[],
         selected_tags=[],
     )
+
+
+def initialize_tag_generation_state_from_config(
+    input_text: str,
+    tag_generation_config: Dict[str, Any],
+    precomputed_spacy_tags: Optional[List[Dict[str, str]]] = None,
+) -> TagGenerationState:
+    """Initializes the tag generation state from the `tags_generation` config section."""
+    agents = tag_generation_config["agents"]
+    return initialize_tag_generation_state(
+        input_text=input_text,
+        llm_tags_generator_prompt_cfg=agents[LLM_TAGS_GENERATOR]["prompt_config"],
+        tag_type_assigner_prompt_cfg=agents[TAG_TYPE_ASSIGNER]["prompt_config"],
+        tags_selector_prompt_cfg=agents[TAGS_SELECTOR]["prompt_config"],
+        tag_types=tag_generation_config["tag_types"],
+        max_tags=tag_generation_config["max_tags"],
+        precomputed_spacy_tags=precomputed_spacy_tags,
+        prompt_layout=tag_generation_config.get(
+            "prompt_layout", PROMPT_LAYOUT_PER_AGENT
+        ),
+    )
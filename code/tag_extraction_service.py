@@ -0,0 +1,220 @@
+"""
+Server-side tag extraction with request micro-batching.
+
+`TagExtractionService` runs the tag generation graph for callers that arrive one
+document at a time (e.g. the `extract_tags` MCP tool). Requests are queued, and a
+background task groups them into batches of up to `max_batch_size` documents, waiting
+at most `max_wait_ms` for a batch to fill. spaCy runs once per batch (`nlp.pipe` over
+all its documents; a document it fails on is retried alone) and each document then
+runs through one shared, compiled tag graph with its entities precomputed. At most
+`max_concurrency` documents run through the graph; while they all do, no new batch is
+collected, so the queue fills up and callers wait once it holds `max_queue_size`. The spaCy models, the gazetteer automaton and the graph
+are loaded once per process, optionally up front (`preload`).
+
+Queue depth, batch sizes, queue wait and errors are exported as Prometheus metrics
+(`render_metrics`). Configured in the `mcp_server.tag_extraction` config section.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from consts import SELECTED_TAGS
+from gazetteer_matcher import load_gazetteer_matcher
+from graphs.tag_generation_graph import get_tag_generation_graph
+from spacy_ner import DEFAULT_MODEL, extract_entities_or_errors, get_spacy_model
+from states.tag_generation_state import initialize_tag_generation_state_from_config
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 20
+DEFAULT_MAX_QUEUE_SIZE = 256
+DEFAULT_MAX_CONCURRENCY = 16
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+METRIC_PREFIX = "tag_extraction"
+
+
+class TagExtractionService:
+    """Queues tag extraction requests and runs them in micro-batches.
+
+    Args:
+        tag_generation_config: The `tags_generation` config section.
+        service_config: The `mcp_server.tag_extraction` config section.
+    """
+
+    def __init__(
+        self,
+        tag_generation_config: Dict[str, Any],
+        service_config: Optional[Dict[str, Any]] = None,
+    ):
+        service_config = service_config or {}
+        self.config = tag_generation_config
+        self.max_batch_size = service_config.get(
+            "max_batch_size", DEFAULT_MAX_BATCH_SIZE
+        )
+        self.max_wait_seconds = (
+            service_config.get("max_wait_ms", DEFAULT_MAX_WAIT_MS) / 1000
+        )
+        self.max_queue_size = service_config.get(
+            "max_queue_size", DEFAULT_MAX_QUEUE_SIZE
+        )
+        self.max_concurrency = service_config.get(
+            "max_concurrency", DEFAULT_MAX_CONCURRENCY
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._lock = threading.Lock()
+        self._counters = {
+            "requests_total": 0,
+            "errors_total": 0,
+            "batches_total": 0,
+            "batch_size_sum": 0,
+            "queue_wait_seconds_sum": 0.0,
+        }
+        self._batch_size_buckets = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self._queue_depth_max = 0
+        self._in_flight = 0
+
+    def preload(self) -> None:
+        """Builds the tag graph and loads the spaCy model(s) and the gazetteer."""
+        get_tag_generation_graph(self.config)
+        load_gazetteer_matcher()
+        spacy_config = self.config.get("spacy_ner", {})
+        get_spacy_model(spacy_config.get("model", DEFAULT_MODEL))
+        fast_path = spacy_config.get("fast_path", {})
+        if fast_path.get("enabled", False) and fast_path.get("model"):
+            get_spacy_model(fast_path["model"])
+
+    async def extract_tags(self, text: str) -> List[Dict[str, str]]:
+        """
+        Queues `text` for extraction and returns its selected tags.
+
+        Waits while the queue is full.
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        with self._lock:
+            self._counters["requests_total"] += 1
+            self._queue_depth_max = max(self._queue_depth_max, self._queue.qsize())
+        return await future
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker and not self._worker.done():
+            return
+        # Queues and tasks are bound to their event loop.
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._worker = loop.create_task(self._run_batches())
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run_batches(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            started = time.perf_counter()
+            queue_wait = sum(started - queued for _, _, queued in batch)
+            self._record_batch(len(batch), queue_wait)
+            texts = [text for text, _, _ in batch]
+            spacy_tags = await asyncio.to_thread(
+                extract_entities_or_errors, texts, self.config.get("spacy_ner", {})
+            )
+            for (text, future, _), tags in zip(batch, spacy_tags):
+                if isinstance(tags, Exception):
+                    self._fail(future, tags)
+                    continue
+                # A slot is taken before the task starts, so the next batch is only
+                # collected once a document can run.
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._run_graph(text, tags, future))
+                self._tasks.add(task)
+                task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._semaphore.release()
+
+    async def _run_graph(
+        self, text: str, spacy_tags: List[Dict[str, str]], future: asyncio.Future
+    ) -> None:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            state = initialize_tag_generation_state_from_config(
+                text, self.config, precomputed_spacy_tags=spacy_tags
+            )
+            final_state = await get_tag_generation_graph(self.config).ainvoke(state)
+            if not future.done():
+                future.set_result(final_state.get(SELECTED_TAGS, []))
+        except Exception as e:
+            self._fail(future, e)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _fail(self, future: asyncio.Future, error: Exception) -> None:
+        with self._lock:
+            self._counters["errors_total"] += 1
+        if not future.done():
+            future.set_exception(error)
+
+    def _record_batch(self, size: int, queue_wait_seconds: float) -> None:
+        with self._lock:
+            self._counters["batches_total"] += 1
+            self._counters["batch_size_sum"] += size
+            self._counters["queue_wait_seconds_sum"] += queue_wait_seconds
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    self._batch_size_buckets[bucket] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Request, batch and queue counters."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+            stats["queue_depth_max"] = self._queue_depth_max
+            stats["in_flight"] = self._in_flight
+            stats["batch_size_buckets"] = dict(self._batch_size_buckets)
+        return stats
+
+    def render_metrics(self) -> str:
+        """Returns the service metrics in the Prometheus text format."""
+        stats = self.stats()
+        lines = []
+        for name, metric_type, help_text in (
+            ("requests_total", "counter", "Tag extraction requests queued."),
+            ("errors_total", "counter", "Tag extraction requests that failed."),
+            ("queue_wait_seconds_sum", "counter", "Time requests waited for a batch."),
+            ("queue_depth", "gauge", "Requests waiting for a batch."),
+            ("queue_depth_max", "gauge", "Largest number of requests waiting at once."),
+            ("in_flight", "gauge", "Documents running through the tag graph."),
+        ):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            lines.append(f"{metric} {stats[name]:g}")
+        metric = f"{METRIC_PREFIX}_batch_size"
+        lines.append(f"# HELP {metric} Documents per spaCy batch.")
+        lines.append(f"# TYPE {metric} histogram")
+        for bucket, count in stats["batch_size_buckets"].items():
+            lines.append(f'{metric}_bucket{{le="{bucket}"}} {count}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {stats["batches_total"]}')
+        lines.append(f"{metric}_sum {stats['batch_size_sum']}")
+        lines.append(f"{metric}_count {stats['batches_total']}")
+        return "\n".join(lines) + "\n"
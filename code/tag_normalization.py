@@ -0,0 +1,367 @@
+"""
+Normalization and near-duplicate collapsing of candidate tags.
+
+The LLM, spaCy and the gazetteer name the same concept in different ways
+("transformer", "Transformers", "Transformer model") and with different type strings
+(`ORG` vs `tool-or-framework`). `TagIndex` folds them into one canonical tag in three
+steps, each cheaper than comparing every pair of tags:
+
+1. a normalized key: lowercased, punctuation and separators unified, each word
+   lemmatized with light suffix rules and generic head nouns ("model", "library")
+   dropped, so inflections and spelling variants share a key. Short words, words
+   ending in "as" ("keras", "pandas") and one-word gazetteer names are kept as is;
+2. an alias table derived from the gazetteer: the normalized key of every entry maps
+   to the entry, and so does the acronym of a multi-word entry ("variational
+   auto-encoders" -> "vae"), but only in a document that defines it ("(VAE)"), so
+   unrelated short entities ("SA", "MID") never become gazetteer concepts;
+3. a MinHash index over character n-grams with LSH banding: a new key only is compared
+   with keys that share a band, so near-duplicates ("scikit learn", "scikitlearn")
+   are found in sub-linear time per tag. Keys whose numbers differ are never merged,
+   so "efficientnet-b0" and "efficientnet-b7" stay apart.
+
+Each canonical tag keeps its provenance: how many times each source produced it, and
+the surface forms that were merged into it. Configured in the `tag_normalization`
+section of the tag generation config.
+"""
+
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_NGRAM_SIZE = 3
+DEFAULT_NUM_PERMUTATIONS = 64
+DEFAULT_BANDS = 16
+DEFAULT_SIMILARITY_THRESHOLD = 0.7
+DEFAULT_MIN_LEMMA_LENGTH = 5
+DEFAULT_GENERIC_HEAD_NOUNS = (
+    "model",
+    "models",
+    "algorithm",
+    "algorithms",
+    "framework",
+    "library",
+    "toolkit",
+    "dataset",
+    "method",
+    "technique",
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_SEPARATORS = re.compile(r"[\s_\-/]+")
+# Keep characters that distinguish names such as "c++", "c#" and ".net".
+_PUNCTUATION = re.compile(r"[^\w\s+#.]")
+_INVARIANT_ENDINGS = ("ss", "us", "is", "as", "ics")
+_NUMBERS = re.compile(r"\d+(?:\.\d+)*")
+_DEFINED_ACRONYM = re.compile(r"\(\s*([A-Za-z][A-Za-z0-9]{2,})\s*\)")
+MIN_ACRONYM_LENGTH = 3
+
+
+def lemmatize_word(
+    word: str,
+    min_length: int = DEFAULT_MIN_LEMMA_LENGTH,
+    protected: Collection[str] = (),
+) -> str:
+    """
+    Reduces an English plural to its singular with suffix rules.
+
+    Words shorter than `min_length`, words in `protected` and words with an invariant
+    ending ("analysis", "keras", "pandas") are returned unchanged.
+    """
+    if (
+        len(word) < min_length
+        or not word.isalpha()
+        or word in protected
+        or word.endswith(_INVARIANT_ENDINGS)
+    ):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "ches", "shes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def _words(name: str) -> List[str]:
+    text = _PUNCTUATION.sub(" ", name.lower()).strip().rstrip(".")
+    return [word for word in _SEPARATORS.split(text) if word]
+
+
+def normalize_tag_name(
+    name: str,
+    generic_head_nouns: Iterable[str] = DEFAULT_GENERIC_HEAD_NOUNS,
+    min_lemma_length: int = DEFAULT_MIN_LEMMA_LENGTH,
+    protected: Collection[str] = (),
+) -> str:
+    """
+    Returns the normalized key of a tag name.
+
+    "Transformer models", "transformers" and "Transformer" all map to "transformer".
+    """
+    words = [lemmatize_word(word, min_lemma_length, protected) for word in _words(name)]
+    generic = set(generic_head_nouns)
+    while len(words) > 1 and words[-1] in generic:
+        words.pop()
+    return " ".join(words)
+
+
+def acronym(name: str) -> Optional[str]:
+    """
+    Returns the acronym of a multi-word name ("generative adversarial network" -> "gan").
+
+    Hyphenated parts count as words only in names of several words ("variational
+    auto-encoders" -> "vae"); a single hyphenated name ("scikit-learn") and acronyms
+    shorter than `MIN_ACRONYM_LENGTH` give None.
+    """
+    if len(name.split()) < 2:
+        return None
+    words = [word for word in _SEPARATORS.split(name.lower()) if word]
+    if not all(word[0].isalpha() for word in words):
+        return None
+    short = "".join(word[0] for word in words)
+    return short if len(short) >= MIN_ACRONYM_LENGTH else None
+
+
+def defined_acronyms(text: str) -> Set[str]:
+    """Returns the lowercased acronyms a text defines in parentheses ("(VAEs)" -> "vae")."""
+    defined = set()
+    for match in _DEFINED_ACRONYM.findall(text):
+        short = match.lower()
+        defined.add(short)
+        if short.endswith("s"):
+            defined.add(short[:-1])
+    return defined
+
+
+def numbers(key: str) -> Tuple[str, ...]:
+    """Returns the numbers in a key ("efficientnet b7" -> ("7",))."""
+    return tuple(_NUMBERS.findall(key))
+
+
+def _shingles(key: str, size: int) -> Set[str]:
+    padded = f" {key.replace(' ', '')} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i : i + size] for i in range(len(padded) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """Returns the Jaccard similarity of two sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashIndex:
+    """LSH index over MinHash signatures of character n-gram sets.
+
+    Args:
+        ngram_size: Length of the character n-grams.
+        num_permutations: Number of hash functions in each signature.
+        bands: Number of LSH bands; `num_permutations` must be divisible by it.
+        threshold: Minimum Jaccard similarity for two keys to be near-duplicates.
+            Keys with different numbers (versions, sizes) are never near-duplicates.
+    """
+
+    def __init__(
+        self,
+        ngram_size: int = DEFAULT_NGRAM_SIZE,
+        num_permutations: int = DEFAULT_NUM_PERMUTATIONS,
+        bands: int = DEFAULT_BANDS,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+    ):
+        if num_permutations % bands:
+            raise ValueError("num_permutations must be divisible by bands")
+        self.ngram_size = ngram_size
+        self.rows = num_permutations // bands
+        self.bands = bands
+        self.threshold = threshold
+        # Fixed coefficients keep signatures stable across processes.
+        self._coefficients = [
+            (2 * i + 1, 7919 * (i + 1)) for i in range(num_permutations)
+        ]
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = defaultdict(list)
+        self._shingles: Dict[str, Set[str]] = {}
+
+    def _signature(self, shingles: Set[str]) -> List[int]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+        return [
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._coefficients
+        ]
+
+    def _bands(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, tuple(signature[band * self.rows : (band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: str) -> None:
+        """Adds `key` to the index."""
+        if key in self._shingles:
+            return
+        shingles = _shingles(key, self.ngram_size)
+        self._shingles[key] = shingles
+        for band in self._bands(self._signature(shingles)):
+            self._buckets[band].append(key)
+
+    def query(self, key: str) -> Optional[str]:
+        """Returns the most similar indexed key at or above the threshold, if any."""
+        shingles = _shingles(key, self.ngram_size)
+        candidates = {
+            other
+            for band in self._bands(self._signature(shingles))
+            for other in self._buckets.get(band, ())
+        }
+        best, best_similarity = None, self.threshold
+        key_numbers = numbers(key)
+        for other in candidates:
+            if numbers(other) != key_numbers:
+                continue
+            similarity = jaccard(shingles, self._shingles[other])
+            if similarity >= best_similarity:
+                best, best_similarity = other, similarity
+        return best
+
+
+class TagIndex:
+    """Collapses tags from several sources into canonical tags with provenance.
+
+    Args:
+        gazetteer: Entity name -> entity type; its entries are the preferred canonical
+            names and types, reachable through their normalized keys and acronyms.
+        tag_types: Valid tag type names; preferred over other type strings (such as
+            spaCy labels) when a canonical tag's sources disagree.
+        normalization_config: The `tag_normalization` config section.
+    """
+
+    def __init__(
+        self,
+        gazetteer: Optional[Dict[str, str]] = None,
+        tag_types: Sequence[str] = (),
+        normalization_config: Optional[Dict[str, Any]] = None,
+    ):
+        config = normalization_config or {}
+        self.generic_head_nouns = config.get(
+            "generic_head_nouns", DEFAULT_GENERIC_HEAD_NOUNS
+        )
+        self.min_lemma_length = config.get("min_lemma_length", DEFAULT_MIN_LEMMA_LENGTH)
+        self.tag_types = {tag_type.lower() for tag_type in tag_types}
+        self.minhash = config.get("minhash", {}) or {}
+        # One-word gazetteer names ("pytorch", "keras") are library and dataset
+        # names, not plurals to lemmatize.
+        self.protected_words = frozenset(
+            words[0] for words in map(_words, gazetteer or {}) if len(words) == 1
+        )
+        self.aliases: Dict[str, Tuple[str, str]] = {}
+        # Acronym -> entry; used only for documents that define the acronym.
+        self.acronyms: Dict[str, Tuple[str, str]] = {}
+        ambiguous: Set[str] = set()
+        for name, tag_type in (gazetteer or {}).items():
+            canonical = (name.lower().strip(), str(tag_type).lower().strip())
+            self.aliases[self.normalize(name)] = canonical
+            short = acronym(name)
+            if short and short in self.acronyms and self.acronyms[short] != canonical:
+                ambiguous.add(short)
+            elif short:
+                self.acronyms[short] = canonical
+        for short in ambiguous:
+            del self.acronyms[short]
+
+    def normalize(self, name: str) -> str:
+        return normalize_tag_name(
+            name, self.generic_head_nouns, self.min_lemma_length, self.protected_words
+        )
+
+    def _new_minhash_index(self) -> MinHashIndex:
+        return MinHashIndex(
+            ngram_size=self.minhash.get("ngram_size", DEFAULT_NGRAM_SIZE),
+            num_permutations=self.minhash.get(
+                "num_permutations", DEFAULT_NUM_PERMUTATIONS
+            ),
+            bands=self.minhash.get("bands", DEFAULT_BANDS),
+            threshold=self.minhash.get("threshold", DEFAULT_SIMILARITY_THRESHOLD),
+        )
+
+    def _pick_type(self, types: Counter, alias_type: Optional[str]) -> str:
+        if alias_type:
+            return alias_type
+        valid = [(count, t) for t, count in types.items() if t in self.tag_types]
+        if valid:
+            return max(valid)[1]
+        return types.most_common(1)[0][0]
+
+    def collapse(
+        self, tags_by_source: Dict[str, Sequence[Dict[str, str]]], text: str = ""
+    ) -> List[Dict[str, Any]]:
+        """
+        Merges the tags of every source into canonical tags.
+
+        Args:
+            tags_by_source: Source name (e.g. "llm") -> tags with `name` and `type` keys.
+            text: The document the tags come from; gazetteer acronyms it defines
+                ("(VAE)") are merged into their entries.
+
+        Returns:
+            List[Dict[str, Any]]: One tag per concept, in first-seen order, with `name`,
+            `type`, `sources` (source -> number of mentions merged) and `variants`
+            (the distinct surface forms merged).
+        """
+        minhash_index = self._new_minhash_index()
+        acronyms = {
+            form: self.acronyms[short]
+            for short in defined_acronyms(text)
+            if short in self.acronyms
+            for form in (short, f"{short}s")
+        }
+        key_to_group: Dict[str, int] = {}
+        groups: List[Dict[str, Any]] = []
+
+        for source, tags in tags_by_source.items():
+            for tag in tags:
+                surface = tag.get("name", "").lower().strip()
+                if not surface:
+                    continue
+                key = self.normalize(surface)
+                alias = self.aliases.get(key) or acronyms.get(key)
+                if alias is not None:
+                    key = self.normalize(alias[0])
+                group_id = key_to_group.get(key)
+                if group_id is None:
+                    similar = minhash_index.query(key)
+                    group_id = key_to_group.get(similar) if similar else None
+                if group_id is None:
+                    group_id = len(groups)
+                    groups.append(
+                        {
+                            "alias": alias,
+                            "names": Counter(),
+                            "types": Counter(),
+                            "sources": Counter(),
+                        }
+                    )
+                    minhash_index.add(key)
+                key_to_group[key] = group_id
+                group = groups[group_id]
+                group["alias"] = group["alias"] or alias
+                group["names"][surface] += 1
+                group["types"][tag.get("type", "").lower().strip()] += 1
+                group["sources"][source] += 1
+
+        collapsed = []
+        for group in groups:
+            alias = group["alias"]
+            name = alias[0] if alias else group["names"].most_common(1)[0][0]
+            collapsed.append(
+                {
+                    "name": name,
+                    "type": self._pick_type(
+                        group["types"], alias[1] if alias else None
+                    ),
+                    "sources": dict(group["sources"]),
+                    "variants": sorted(group["names"]),
+                }
+            )
+        return collapsed
@@ -0,0 +1,230 @@
+"""
+Local ranking of candidate tags.
+
+The tags ranker node scores every aggregated candidate without an LLM call, so only
+the best `top_k` candidates reach the LLM tag selector, in a compact `name | type`
+line format. Each candidate gets a weighted score from:
+
+- frequency: how often the tag name occurs in the input text;
+- position: how early it first occurs (titles and introductions name the main topics);
+- agreement: how many of the tag sources (LLM, spaCy, gazetteer) produced it, taken
+  from the candidate's `sources` provenance when the aggregator recorded it;
+- tf-idf: how characteristic it is of this text compared with a background corpus.
+  When the text itself is one of the corpus documents, it is left out of the document
+  frequencies, so that its own distinctive terms are not down-weighted. A few
+  documents give only a few distinct idf values, so with fewer than
+  `min_background_documents` the tf-idf weight shrinks in proportion; configure a
+  real corpus of the documents being tagged.
+
+Each feature is scaled to [0, 1] before weighting. With `selector_mode: auto`, a ranking
+with a clear gap after the `max_tags`-th candidate is considered confident and the LLM
+selector is skipped. Configured in the `tag_ranking` section of the tag generation config.
+"""
+
+import glob
+import math
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from kv_cache import LRUCache
+from paths import ROOT_DIR
+
+SELECTOR_MODE_LLM = "llm"
+SELECTOR_MODE_AUTO = "auto"
+SELECTOR_MODES = (SELECTOR_MODE_LLM, SELECTOR_MODE_AUTO)
+
+DEFAULT_TOP_K = 25
+DEFAULT_WEIGHTS = {
+    "frequency": 0.3,
+    "position": 0.15,
+    "agreement": 0.3,
+    "tfidf": 0.25,
+}
+DEFAULT_CONFIDENCE_MARGIN = 0.15
+DEFAULT_MIN_CONFIDENT_SCORE = 0.4
+DEFAULT_BACKGROUND_CORPUS = "data/*.md"
+DEFAULT_MIN_BACKGROUND_DOCUMENTS = 20
+# Tag names whose document frequency is memoized per background corpus.
+DOC_FREQ_CACHE_SIZE = 10_000
+
+_WORD = re.compile(r"\w+")
+
+# Background corpus glob -> {"texts": lowercased documents, "documents": the same
+# documents stripped, for lookups of the input text, "doc_freq": LRU cache of tag
+# name -> number of documents containing it}.
+_background_corpora: Dict[str, Dict[str, Any]] = {}
+_background_lock = threading.Lock()
+
+
+def _phrase_pattern(name: str) -> "re.Pattern":
+    return re.compile(r"(?<!\w)" + re.escape(name) + r"(?!\w)")
+
+
+def load_background_corpus(pattern: str) -> Dict[str, Any]:
+    """
+    Returns the background corpus matching `pattern` (relative to the repository root).
+
+    Documents are loaded once per pattern and shared process-wide, together with a
+    bounded memo of the document frequencies of recently ranked tag names.
+    """
+    with _background_lock:
+        if pattern not in _background_corpora:
+            full_pattern = (
+                pattern if os.path.isabs(pattern) else os.path.join(ROOT_DIR, pattern)
+            )
+            texts = []
+            for path in sorted(glob.glob(full_pattern)):
+                with open(path, "r", encoding="utf-8") as f:
+                    texts.append(f.read().lower())
+            _background_corpora[pattern] = {
+                "texts": texts,
+                "documents": {text.strip() for text in texts},
+                "doc_freq": LRUCache(max_entries=DOC_FREQ_CACHE_SIZE),
+            }
+        return _background_corpora[pattern]
+
+
+def _inverse_document_frequency(
+    name: str, background: Dict[str, Any], in_corpus: bool, occurs: bool
+) -> float:
+    """
+    Returns the smoothed idf of `name`.
+
+    With `in_corpus`, the input text is one of the background documents and is left
+    out: it no longer counts as a document, nor towards the frequency of `name` if the
+    name `occurs` in it.
+    """
+    doc_freq = background["doc_freq"].get(name)
+    if doc_freq is None:
+        pattern = _phrase_pattern(name)
+        doc_freq = sum(1 for text in background["texts"] if pattern.search(text))
+        background["doc_freq"].set(name, doc_freq)
+    n_docs = len(background["texts"])
+    if in_corpus:
+        n_docs -= 1
+        doc_freq -= int(occurs)
+    return math.log((1 + n_docs) / (1 + doc_freq)) + 1
+
+
+def _scaled(values: List[float]) -> List[float]:
+    top = max(values, default=0.0)
+    return [value / top if top else 0.0 for value in values]
+
+
+def rank_candidates(
+    candidates: Sequence[Dict[str, str]],
+    text: str,
+    source_tag_lists: Sequence[Sequence[Dict[str, str]]],
+    ranking_config: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Scores candidate tags and returns them best first.
+
+    Args:
+        candidates: Aggregated, deduplicated tags with `name` and `type` keys.
+        text: The input text.
+        source_tag_lists: The tags of each source (LLM, spaCy, gazetteer), used for
+            the agreement feature.
+        ranking_config: The `tag_ranking` config section.
+
+    Returns:
+        List[Dict[str, Any]]: The candidates with an added `score` key, sorted by
+        descending score.
+    """
+    ranking_config = ranking_config or {}
+    weights = {**DEFAULT_WEIGHTS, **(ranking_config.get("weights") or {})}
+    background = load_background_corpus(
+        ranking_config.get("background_corpus", DEFAULT_BACKGROUND_CORPUS)
+    )
+    lowered = text.lower()
+    in_corpus = lowered.strip() in background["documents"]
+    n_background = len(background["texts"]) - int(in_corpus)
+    min_background = ranking_config.get(
+        "min_background_documents", DEFAULT_MIN_BACKGROUND_DOCUMENTS
+    )
+    if min_background and n_background < min_background:
+        weights["tfidf"] *= n_background / min_background
+    n_words = max(1, len(_WORD.findall(lowered)))
+    source_names = [
+        {tag.get("name", "").lower().strip() for tag in tags}
+        for tags in source_tag_lists
+    ]
+    n_sources = max(1, len(source_names))
+
+    frequencies, positions, agreements, tfidfs = [], [], [], []
+    for candidate in candidates:
+        name = candidate["name"]
+        # Merged candidates are counted under all of their surface forms.
+        surface_forms = {name, *candidate.get("variants", ())}
+        matches = sorted(
+            match.start()
+            for form in surface_forms
+            for match in _phrase_pattern(form).finditer(lowered)
+        )
+        frequencies.append(math.log1p(len(matches)))
+        positions.append(1 - matches[0] / len(lowered) if matches else 0.0)
+        if "sources" in candidate:
+            agreement = len(candidate["sources"]) / n_sources
+        else:
+            agreement = sum(name in names for names in source_names) / n_sources
+        agreements.append(min(1.0, agreement))
+        idf = _inverse_document_frequency(
+            name, background, in_corpus, bool(_phrase_pattern(name).search(lowered))
+        )
+        tfidfs.append(len(matches) / n_words * idf)
+
+    ranked = []
+    for candidate, frequency, position, agreement, tfidf in zip(
+        candidates, _scaled(frequencies), positions, agreements, _scaled(tfidfs)
+    ):
+        score = (
+            weights["frequency"] * frequency
+            + weights["position"] * position
+            + weights["agreement"] * agreement
+            + weights["tfidf"] * tfidf
+        ) / (sum(weights.values()) or 1.0)
+        ranked.append({**candidate, "score": round(score, 4)})
+    ranked.sort(key=lambda tag: tag["score"], reverse=True)
+    return ranked
+
+
+def is_confident(
+    ranked: Sequence[Dict[str, Any]],
+    max_tags: int,
+    ranking_config: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Returns True if the top `max_tags` candidates are a clear choice.
+
+    That is the case when the `max_tags`-th candidate scores at least
+    `min_confident_score` and leads the next candidate by `confidence_margin`, or when
+    there are no more than `max_tags` candidates that all score at least
+    `min_confident_score`.
+    """
+    ranking_config = ranking_config or {}
+    margin = ranking_config.get("confidence_margin", DEFAULT_CONFIDENCE_MARGIN)
+    min_score = ranking_config.get("min_confident_score", DEFAULT_MIN_CONFIDENT_SCORE)
+    if not ranked:
+        return False
+    selected = ranked[:max_tags]
+    if selected[-1]["score"] < min_score:
+        return False
+    if len(ranked) <= max_tags:
+        return True
+    return selected[-1]["score"] - ranked[max_tags]["score"] >= margin
+
+
+def format_candidate_lines(ranked: Sequence[Dict[str, Any]]) -> str:
+    """Formats tags as one `name | type` line each."""
+    return "\n".join(f"{tag['name']} | {tag['type']}" for tag in ranked)
+
+
+def validate_selector_mode(selector_mode: str) -> str:
+    """Returns `selector_mode` or raises ValueError if it is not a known mode."""
+    if selector_mode not in SELECTOR_MODES:
+        raise ValueError(
+            f"Unknown tag selector mode: {selector_mode}. Expected one of {SELECTOR_MODES}"
+        )
+    return selector_mode
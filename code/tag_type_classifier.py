@@ -0,0 +1,332 @@
+"""
+Local tag type classifier for spaCy entities.
+
+The tag type assigner maps spaCy entities onto the configured tag types. Most entity
+names are easy to type without an LLM, so `TagTypeClassifier` handles them on CPU:
+
+- every name is compared with the centroids of character n-gram vectors (plus the
+  spaCy label as a feature) of each type, with a softmax over the cosine similarities
+  as the confidence;
+- names it has seen before (gazetteer entries, the examples in the tag type
+  descriptions, past LLM assignments) get their known type, scored the same way, so
+  a known name seen in an unusual context (another spaCy label) can still go to the
+  LLM;
+- "other" is a class of its own, learned from the entities the LLM typed as "other"
+  (dates, people, generic terms), and names unlike every centroid
+  (`min_similarity`) always go to the LLM.
+
+Only entities below `confidence_threshold` go to the LLM. Its assignments, including
+"other", are stored in `TAG_TYPE_ASSIGNMENTS_PATH` and learned, so later runs need the
+LLM less often. `calibrate_threshold` picks the threshold from held-out gazetteer
+entries and past LLM assignments (`python tag_type_classifier.py`). Configured in the
+`tag_type_classifier` section of the tag generation config.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from paths import TAG_TYPE_ASSIGNMENTS_PATH
+
+OTHER_TYPE = "other"
+DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+DEFAULT_MIN_SIMILARITY = 0.2
+DEFAULT_TEMPERATURE = 0.05
+DEFAULT_NGRAM_RANGE = (2, 4)
+# Weight of the spaCy label feature. The name's n-grams carry most of the vector, so
+# the label only decides between types whose names look alike.
+DEFAULT_LABEL_WEIGHT = 0.5
+DEFAULT_FOLDS = 5
+DEFAULT_TARGET_PRECISION = 0.95
+
+_EXAMPLES = re.compile(r"\(e\.g\.,?\s*([^)]*)\)")
+
+Vector = Dict[str, float]
+
+
+def _key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _normalized(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {feature: value / norm for feature, value in vector.items()} if norm else {}
+
+
+def description_examples(tag_types: Sequence[Dict[str, str]]) -> Dict[str, str]:
+    """Returns the "(e.g., ...)" examples of each tag type description as name -> type."""
+    examples = {}
+    for tag_type in tag_types:
+        for match in _EXAMPLES.finditer(tag_type.get("description", "")):
+            for example in match.group(1).split(","):
+                if example.strip():
+                    examples[_key(example)] = tag_type["name"]
+    return examples
+
+
+class TagTypeClassifier:
+    """Nearest-centroid classifier over character n-grams. Thread-safe.
+
+    Args:
+        tag_types: The configured tag types (dicts with `name` and `description`).
+        gazetteer: Entity name -> entity type, used as training examples.
+        classifier_config: The `tag_type_classifier` config section.
+        assignments_path: JSON file of past LLM assignments to learn from and extend.
+            Pass None to keep learned assignments in memory only.
+    """
+
+    def __init__(
+        self,
+        tag_types: Sequence[Dict[str, str]],
+        gazetteer: Optional[Dict[str, str]] = None,
+        classifier_config: Optional[Dict[str, Any]] = None,
+        assignments_path: Optional[str] = TAG_TYPE_ASSIGNMENTS_PATH,
+    ):
+        config = classifier_config or {}
+        self.confidence_threshold = config.get(
+            "confidence_threshold", DEFAULT_CONFIDENCE_THRESHOLD
+        )
+        self.min_similarity = config.get("min_similarity", DEFAULT_MIN_SIMILARITY)
+        self.temperature = config.get("temperature", DEFAULT_TEMPERATURE)
+        self.ngram_range = tuple(config.get("ngram_range", DEFAULT_NGRAM_RANGE))
+        self.label_weight = config.get("label_weight", DEFAULT_LABEL_WEIGHT)
+        self.assignments_path = assignments_path
+        self.tag_types = {tag_type["name"] for tag_type in tag_types} | {OTHER_TYPE}
+        self._lock = threading.Lock()
+        # name -> type of every known example, and per-type sums of example vectors.
+        self._known: Dict[str, str] = {}
+        self._sums: Dict[str, Vector] = {t: defaultdict(float) for t in self.tag_types}
+        self._centroids: Dict[str, Vector] = {}
+        self._learned: Dict[str, Dict[str, str]] = {}
+
+        examples = {**description_examples(tag_types)}
+        for name, tag_type in (gazetteer or {}).items():
+            examples[_key(name)] = str(tag_type).lower().strip()
+        for name, tag_type in examples.items():
+            self._add_example(name, None, tag_type)
+        for record in load_assignments(self.assignments_path):
+            self._learned[record["name"]] = record
+            self._add_example(record["name"], record.get("label"), record["type"])
+        self._refresh_centroids()
+
+    def _features(self, name: str, label: Optional[str]) -> Vector:
+        padded = f" {_key(name)} "
+        features: Vector = defaultdict(float)
+        low, high = self.ngram_range
+        for size in range(low, high + 1):
+            for i in range(len(padded) - size + 1):
+                features[f"c:{padded[i : i + size]}"] += 1.0
+        for word in padded.split():
+            features[f"w:{word}"] += 1.0
+        if label:
+            features[f"l:{label.upper()}"] += self.label_weight
+        return _normalized(features)
+
+    def _add_example(self, name: str, label: Optional[str], tag_type: str) -> None:
+        if tag_type not in self.tag_types:
+            return
+        self._known[_key(name)] = tag_type
+        for feature, value in self._features(name, label).items():
+            self._sums[tag_type][feature] += value
+
+    def _refresh_centroids(self) -> None:
+        self._centroids = {
+            tag_type: _normalized(vector)
+            for tag_type, vector in self._sums.items()
+            if vector
+        }
+
+    def classify(self, name: str, label: Optional[str] = None) -> Tuple[str, float]:
+        """
+        Returns the most likely tag type of an entity and the confidence in [0, 1].
+
+        Known names get their known type with the confidence of that type. Names whose
+        best cosine similarity is below `min_similarity` get a confidence of 0.
+
+        Args:
+            name: The entity name.
+            label: The spaCy entity label (e.g. "ORG"), if known.
+        """
+        with self._lock:
+            known = self._known.get(_key(name))
+            if not self._centroids:
+                return "", 0.0
+            features = self._features(name, label)
+            similarities = {
+                tag_type: sum(
+                    value * centroid.get(feature, 0.0)
+                    for feature, value in features.items()
+                )
+                for tag_type, centroid in self._centroids.items()
+            }
+        top = max(similarities.values())
+        if top < self.min_similarity:
+            return known or max(similarities, key=similarities.get), 0.0
+        weights = {
+            tag_type: math.exp((similarity - top) / self.temperature)
+            for tag_type, similarity in similarities.items()
+        }
+        best = known if known in weights else max(weights, key=weights.get)
+        return best, weights[best] / sum(weights.values())
+
+    def split(
+        self, tags: Iterable[Dict[str, str]]
+    ) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """
+        Types the tags the classifier is confident about.
+
+        Returns:
+            Tuple of (typed tags, tags below the confidence threshold). The uncertain
+            tags keep their original `type` (the spaCy label).
+        """
+        typed, uncertain = [], []
+        for tag in tags:
+            tag_type, confidence = self.classify(tag["name"], tag.get("type"))
+            if confidence >= self.confidence_threshold:
+                typed.append({"name": tag["name"], "type": tag_type})
+            else:
+                uncertain.append(tag)
+        return typed, uncertain
+
+    def learn(
+        self,
+        assignments: Iterable[Dict[str, str]],
+        labels: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Adds LLM type assignments as training examples and persists them.
+
+        Args:
+            assignments: Tags with `name` and their assigned `type`.
+            labels: Entity name -> spaCy label of the entities that were assigned.
+        """
+        labels = {_key(name): label for name, label in (labels or {}).items()}
+        with self._lock:
+            changed = False
+            for tag in assignments:
+                name, tag_type = _key(tag["name"]), tag["type"]
+                if tag_type not in self.tag_types or self._known.get(name) == tag_type:
+                    continue
+                record = {"name": name, "type": tag_type, "label": labels.get(name)}
+                self._learned[name] = record
+                self._add_example(name, record["label"], tag_type)
+                changed = True
+            if not changed:
+                return
+            self._refresh_centroids()
+            # Saved under the lock so a slower writer never replaces a newer file.
+            self._save_assignments(list(self._learned.values()))
+
+    def _save_assignments(self, records: List[Dict[str, str]]) -> None:
+        if not self.assignments_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.assignments_path), exist_ok=True)
+            tmp_path = f"{self.assignments_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=2)
+            os.replace(tmp_path, self.assignments_path)
+        except OSError as e:
+            print(f"⚠️ Could not save learned tag types: {e}")
+
+
+def load_assignments(path: Optional[str]) -> List[Dict[str, str]]:
+    """Returns the persisted LLM assignments (`name`, `type`, `label`) at `path`."""
+    if not path or not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load learned tag types: {e}")
+        return []
+
+
+def calibrate_threshold(
+    tag_types: Sequence[Dict[str, str]],
+    examples: Sequence[Dict[str, Optional[str]]],
+    classifier_config: Optional[Dict[str, Any]] = None,
+    folds: int = DEFAULT_FOLDS,
+    target_precision: float = DEFAULT_TARGET_PRECISION,
+) -> Dict[str, Any]:
+    """
+    Picks the lowest confidence threshold that keeps local assignments precise.
+
+    Each example is classified by a classifier trained on the other folds (plus the
+    tag type description examples, which are not evaluated).
+
+    Args:
+        tag_types: The configured tag types.
+        examples: Labelled entities with `name`, `type` and optionally `label`, such as
+            gazetteer entries and past LLM assignments.
+        classifier_config: The `tag_type_classifier` config section.
+        folds: Number of cross-validation folds.
+        target_precision: Minimum share of correct types among the held-out entities
+            at or above the threshold.
+
+    Returns:
+        Dict[str, Any]: `threshold` (None when no threshold reaches the target),
+        `precision` and `coverage` (share of entities typed locally) at that
+        threshold, and the number of `examples` evaluated.
+    """
+    described = description_examples(tag_types)
+    examples = sorted(
+        (example for example in examples if _key(example["name"]) not in described),
+        key=lambda example: _key(example["name"]),
+    )
+    scored = []
+    for fold in range(folds):
+        classifier = TagTypeClassifier(
+            tag_types, classifier_config=classifier_config, assignments_path=None
+        )
+        train = [example for i, example in enumerate(examples) if i % folds != fold]
+        classifier.learn(
+            train, labels={example["name"]: example.get("label") for example in train}
+        )
+        for example in examples[fold::folds]:
+            tag_type, confidence = classifier.classify(
+                example["name"], example.get("label")
+            )
+            scored.append((confidence, tag_type == example["type"]))
+
+    scored.sort(key=lambda item: -item[0])
+    report = {"threshold": None, "precision": None, "coverage": 0.0}
+    correct = 0
+    for count, (confidence, is_correct) in enumerate(scored, start=1):
+        correct += is_correct
+        next_confidence = scored[count][0] if count < len(scored) else -1.0
+        if confidence <= 0 or next_confidence == confidence:
+            continue
+        if correct / count >= target_precision:
+            report = {
+                "threshold": confidence,
+                "precision": correct / count,
+                "coverage": count / len(scored),
+            }
+    return {**report, "examples": len(scored)}
+
+
+if __name__ == "__main__":
+    from paths import GAZETTEER_ENTITIES_FILE_PATH
+    from utils import load_config
+
+    tags_config = load_config()["tags_generation"]
+    classifier_config = tags_config.get("tag_type_classifier", {})
+    examples = {
+        _key(name): {"name": name, "type": str(tag_type).lower().strip()}
+        for name, tag_type in (load_config(GAZETTEER_ENTITIES_FILE_PATH) or {}).items()
+    }
+    for record in load_assignments(TAG_TYPE_ASSIGNMENTS_PATH):
+        examples[_key(record["name"])] = record
+    print(
+        json.dumps(
+            calibrate_threshold(
+                tags_config["tag_types"], list(examples.values()), classifier_config
+            ),
+            indent=2,
+        )
+    )
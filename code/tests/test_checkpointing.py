@@ -0,0 +1,129 @@
+import asyncio
+import operator
+import time
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+
+from checkpointing import (
+    SQLiteCheckpointSaver,
+    aresume_run,
+    has_unfinished_run,
+    list_checkpoints,
+    replay_from,
+    resume_run,
+    thread_config,
+)
+
+
+class FanOutState(TypedDict):
+    items: List[str]
+    results: Annotated[List[str], operator.add]
+    side_results: Annotated[List[str], operator.add]
+
+
+def build_graph(checkpointer, calls, fail_once, parallel_tasks=0):
+    """start -> (side, Send(work, item) per item) -> done; `work` fails once on `fail_once`.
+
+    With `parallel_tasks`, the failing task first waits for the other tasks of its step
+    to finish: the async runner cancels unfinished tasks when one fails.
+    """
+
+    def start(state):
+        return {}
+
+    def side(state):
+        calls.append("side")
+        return {"side_results": ["side"]}
+
+    def work(state):
+        item = state["item"]
+        calls.append(item)
+        if item in fail_once:
+            fail_once.remove(item)
+            deadline = time.monotonic() + 5
+            while len(calls) < parallel_tasks and time.monotonic() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.1)
+            raise RuntimeError(f"search failed for {item}")
+        return {"results": [item.upper()]}
+
+    def fan_out(state):
+        return ["side"] + [Send("work", {"item": item}) for item in state["items"]]
+
+    builder = StateGraph(FanOutState)
+    builder.add_node("start", start)
+    builder.add_node("side", side)
+    builder.add_node("work", work)
+    builder.add_edge(START, "start")
+    builder.add_conditional_edges("start", fan_out, ["side", "work"])
+    builder.add_edge("side", END)
+    builder.add_edge("work", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def checkpointer(tmp_path):
+    return SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+
+
+def test_resume_reruns_only_failed_sends(checkpointer, tmp_path):
+    calls = []
+    graph = build_graph(checkpointer, calls, fail_once={"b"})
+    initial_state = {"items": ["a", "b", "c"], "results": [], "side_results": []}
+
+    with pytest.raises(RuntimeError):
+        graph.invoke(initial_state, config=thread_config("doc-1"))
+    assert has_unfinished_run(graph, "doc-1")
+
+    # A new saver on the same file, as after a process restart.
+    calls.clear()
+    restarted = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build_graph(restarted, calls, fail_once=set())
+    final_state = resume_run(graph, "doc-1")
+
+    assert calls == ["b"]
+    assert sorted(final_state["results"]) == ["A", "B", "C"]
+    assert final_state["side_results"] == ["side"]
+    assert not has_unfinished_run(graph, "doc-1")
+
+
+def test_aresume_run(checkpointer):
+    calls = []
+    graph = build_graph(checkpointer, calls, fail_once={"a"}, parallel_tasks=3)
+    initial_state = {"items": ["a", "b"], "results": [], "side_results": []}
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.ainvoke(initial_state, config=thread_config("doc-2")))
+    calls.clear()
+    final_state = asyncio.run(aresume_run(graph, "doc-2"))
+
+    assert calls == ["a"]
+    assert sorted(final_state["results"]) == ["A", "B"]
+
+
+def test_replay_from_forks_at_checkpoint(checkpointer):
+    calls = []
+    graph = build_graph(checkpointer, calls, fail_once=set())
+    graph.invoke(
+        {"items": ["a"], "results": [], "side_results": []},
+        config=thread_config("doc-3"),
+    )
+    history = list_checkpoints(graph, "doc-3")
+    fork_point = next(c for c in history if "start" in c["next"])
+
+    calls.clear()
+    final_state = replay_from(graph, "doc-3", fork_point["checkpoint_id"])
+
+    assert sorted(calls) == ["a", "side"]
+    assert final_state["results"] == ["A"]
+    # The original run's checkpoints are kept next to the fork.
+    assert len(list_checkpoints(graph, "doc-3")) > len(history)
+
+
+def test_replay_from_unknown_checkpoint(checkpointer):
+    graph = build_graph(checkpointer, [], fail_once=set())
+    with pytest.raises(ValueError):
+        replay_from(graph, "doc-4", "missing")
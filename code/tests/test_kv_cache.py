@@ -0,0 +1,50 @@
+import pytest
+
+import kv_cache
+from kv_cache import LRUCache, SQLiteCache, TieredCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(kv_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_promoted_entry_expires_with_its_disk_timestamp(clock, tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=10)
+    cache = TieredCache(LRUCache(ttl_seconds=10), disk)
+    disk.set("key", "value")
+
+    clock[0] += 8
+    assert cache.get("key") == "value"
+    assert cache.stats()["disk_hits"] == 1
+
+    # Promotion at t+8 must not restart the TTL: the entry expires at t+10.
+    clock[0] += 4
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_repeated_promotions_do_not_extend_ttl(clock, tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=10)
+    memory = LRUCache(ttl_seconds=10)
+    cache = TieredCache(memory, disk)
+    cache.set("key", "value")
+
+    for _ in range(3):
+        clock[0] += 3
+        memory.clear()
+        assert cache.get("key") == "value"
+    clock[0] += 3
+    assert cache.get("key") is None
+
+
+def test_memory_hit_within_ttl(clock, tmp_path):
+    cache = TieredCache(
+        LRUCache(ttl_seconds=10), SQLiteCache(str(tmp_path / "c.sqlite"))
+    )
+    cache.set("key", "value")
+    clock[0] += 5
+    assert cache.get("key") == "value"
+    assert cache.stats()["memory_hits"] == 1
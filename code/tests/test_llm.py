@@ -0,0 +1,41 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import llm
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_async_http_client_survives_a_new_event_loop(server_url):
+    _, client = llm.get_http_clients("test-provider")
+
+    async def get():
+        response = await client.send(client.build_request("GET", server_url))
+        await response.aread()
+        return response.status_code
+
+    # Keep-alive connections of the first loop must not be reused by the second.
+    assert asyncio.run(get()) == 200
+    assert asyncio.run(get()) == 200
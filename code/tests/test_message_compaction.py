@@ -0,0 +1,59 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+from message_compaction import (
+    COMPACTION_EVENT,
+    STRATEGY_FULL,
+    STRATEGY_KEEP_LAST,
+    compact_messages,
+    get_compaction_policy,
+)
+
+
+class _EventRecorder(BaseCallbackHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_custom_event(self, name, data, **kwargs):
+        if name == COMPACTION_EVENT:
+            self.events.append(data)
+
+
+def _compact_in_run(strategy):
+    messages = [
+        SystemMessage(content="system"),
+        HumanMessage(content="brief"),
+        HumanMessage(content="request 1"),
+        AIMessage(content="answer 1"),
+        HumanMessage(content="request 2"),
+        AIMessage(content="answer 2"),
+    ]
+    policy = get_compaction_policy(
+        {"default": {"strategy": strategy, "keep_last": 2}}, "tldr"
+    )
+    recorder = _EventRecorder()
+    node = RunnableLambda(
+        lambda _: compact_messages(
+            messages, policy, manager_brief="brief", channel="tldr"
+        )
+    )
+    compacted = node.invoke(None, config={"callbacks": [recorder]})
+    return messages, compacted, recorder.events
+
+
+def test_full_strategy_is_reported():
+    messages, compacted, events = _compact_in_run(STRATEGY_FULL)
+
+    assert compacted == messages
+    assert len(events) == 1
+    assert events[0]["channel"] == "tldr"
+    assert events[0]["chars_before"] == events[0]["chars_after"]
+
+
+def test_keep_last_is_reported():
+    messages, compacted, events = _compact_in_run(STRATEGY_KEEP_LAST)
+
+    assert len(compacted) == 4
+    assert events[0]["messages_before"] == len(messages)
+    assert events[0]["messages_after"] == 4
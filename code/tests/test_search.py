@@ -0,0 +1,37 @@
+import time
+
+from search import SearchBackend, run_searches
+
+
+class _SleepingBackend(SearchBackend):
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def search(self, query):
+        time.sleep(self.seconds.get(query, 0.2))
+        return [{"url": f"https://example.com/{query}", "title": query, "content": ""}]
+
+
+def test_queued_queries_get_the_full_timeout():
+    queries = ["a", "b", "c", "d"]
+
+    outcomes = run_searches(
+        _SleepingBackend({}), queries, timeout_seconds=0.3, max_concurrency=2
+    )
+
+    assert [error for _, _, error in outcomes] == [None] * 4
+    assert [query for query, _, _ in outcomes] == queries
+
+
+def test_timed_out_search_frees_its_slot():
+    backend = _SleepingBackend({"hung": 2.0, "a": 0.05, "b": 0.05})
+
+    started = time.monotonic()
+    outcomes = run_searches(
+        backend, ["hung", "a", "b"], timeout_seconds=0.2, max_concurrency=1
+    )
+
+    assert time.monotonic() - started < 1.0
+    (_, _, hung_error), (_, a_results, _), (_, b_results, _) = outcomes
+    assert isinstance(hung_error, TimeoutError)
+    assert a_results and b_results
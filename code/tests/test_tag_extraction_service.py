@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+import spacy_ner
+import tag_extraction_service
+from consts import SELECTED_TAGS
+from tag_extraction_service import TagExtractionService
+
+
+class _BlockingGraph:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.running = 0
+
+    async def ainvoke(self, state):
+        self.running += 1
+        await self.release.wait()
+        return {SELECTED_TAGS: [{"name": state["text"], "type": "task"}]}
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    graph = _BlockingGraph()
+    monkeypatch.setattr(
+        tag_extraction_service, "get_tag_generation_graph", lambda config: graph
+    )
+    monkeypatch.setattr(
+        tag_extraction_service,
+        "initialize_tag_generation_state_from_config",
+        lambda text, config, precomputed_spacy_tags: {"text": text},
+    )
+    return graph
+
+
+def _fail_on_bad(texts, spacy_config):
+    if "bad" in texts:
+        raise ValueError("bad document")
+    return [[] for _ in texts]
+
+
+def test_full_graph_slots_hold_back_the_queue(graph, monkeypatch):
+    monkeypatch.setattr(spacy_ner, "extract_entities", _fail_on_bad)
+    service = TagExtractionService(
+        {},
+        {
+            "max_batch_size": 2,
+            "max_wait_ms": 1,
+            "max_queue_size": 2,
+            "max_concurrency": 2,
+        },
+    )
+
+    async def run():
+        requests = [
+            asyncio.create_task(service.extract_tags(f"doc {i}")) for i in range(8)
+        ]
+        await asyncio.sleep(0.1)
+        stats = service.stats()
+        graph.release.set()
+        results = await asyncio.gather(*requests)
+        return stats, results
+
+    stats, results = asyncio.run(run())
+
+    assert graph.running == 8
+    assert stats["in_flight"] == 2
+    # One batch waits for a graph slot; the queue behind it is full.
+    assert stats["queue_depth"] == 2
+    assert [tags[0]["name"] for tags in results] == [f"doc {i}" for i in range(8)]
+
+
+def test_a_bad_document_fails_alone(graph, monkeypatch):
+    monkeypatch.setattr(spacy_ner, "extract_entities", _fail_on_bad)
+    graph.release.set()
+    service = TagExtractionService({}, {"max_batch_size": 3, "max_wait_ms": 50})
+
+    async def run():
+        return await asyncio.gather(
+            *(service.extract_tags(text) for text in ("good", "bad", "fine")),
+            return_exceptions=True,
+        )
+
+    good, bad, fine = asyncio.run(run())
+
+    assert good == [{"name": "good", "type": "task"}]
+    assert isinstance(bad, ValueError)
+    assert fine == [{"name": "fine", "type": "task"}]
+    assert service.stats()["errors_total"] == 1
@@ -0,0 +1,77 @@
+from tag_normalization import TagIndex, lemmatize_word, normalize_tag_name
+
+
+def _names(collapsed):
+    return sorted(tag["name"] for tag in collapsed)
+
+
+def test_versions_are_never_merged():
+    index = TagIndex(tag_types=["algorithm"])
+
+    collapsed = index.collapse(
+        {
+            "llm": [
+                {"name": "EfficientNet-B0", "type": "algorithm"},
+                {"name": "EfficientNet-B7", "type": "algorithm"},
+                {"name": "Python 3.10", "type": "tool-or-framework"},
+                {"name": "Python 3.1", "type": "tool-or-framework"},
+            ]
+        }
+    )
+
+    assert _names(collapsed) == [
+        "efficientnet-b0",
+        "efficientnet-b7",
+        "python 3.1",
+        "python 3.10",
+    ]
+
+
+def test_library_names_are_not_singularized():
+    assert normalize_tag_name("Keras") == "keras"
+    assert normalize_tag_name("pandas") == "pandas"
+    assert lemmatize_word("lens") == "lens"
+    assert normalize_tag_name("Transformer models") == "transformer"
+    assert normalize_tag_name("decision trees") == "decision tree"
+
+
+def test_gazetteer_names_are_not_singularized():
+    index = TagIndex(gazetteer={"statsmodels": "tool-or-framework"})
+
+    assert index.normalize("statsmodels") == "statsmodels"
+    collapsed = index.collapse({"llm": [{"name": "statsmodels", "type": "ORG"}]})
+    assert collapsed[0]["name"] == "statsmodels"
+    assert collapsed[0]["type"] == "tool-or-framework"
+
+
+def test_near_duplicates_still_merge():
+    index = TagIndex(gazetteer={"scikit-learn": "tool-or-framework"})
+
+    collapsed = index.collapse(
+        {
+            "llm": [{"name": "scikitlearn", "type": "tool-or-framework"}],
+            "spacy": [{"name": "Scikit Learn", "type": "ORG"}],
+        }
+    )
+
+    assert _names(collapsed) == ["scikit-learn"]
+    assert collapsed[0]["sources"] == {"llm": 1, "spacy": 1}
+
+
+def test_acronyms_need_a_definition_in_the_text():
+    index = TagIndex(
+        gazetteer={
+            "sentiment analysis": "task",
+            "medical image diagnosis": "use-case",
+            "variational auto-encoders": "algorithm",
+            "scikit-learn": "tool-or-framework",
+        }
+    )
+    tags = {
+        "spacy": [{"name": name, "type": "ORG"} for name in ("SA", "MID", "SL", "VAEs")]
+    }
+
+    assert _names(index.collapse(tags)) == ["mid", "sa", "sl", "vaes"]
+    collapsed = index.collapse(tags, text="Variational auto-encoders (VAEs) learn...")
+    assert _names(collapsed) == ["mid", "sa", "sl", "variational auto-encoders"]
+    assert collapsed[-1]["type"] == "algorithm"
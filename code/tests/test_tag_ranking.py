@@ -0,0 +1,84 @@
+import tag_ranking
+from tag_ranking import load_background_corpus, rank_candidates
+
+
+def _write_corpus(tmp_path, texts):
+    for i, text in enumerate(texts):
+        (tmp_path / f"doc{i}.md").write_text(text, encoding="utf-8")
+    return str(tmp_path / "*.md")
+
+
+def _tfidf_only(pattern):
+    return {
+        "background_corpus": pattern,
+        "weights": {"frequency": 0, "position": 0, "agreement": 0, "tfidf": 1},
+    }
+
+
+def test_document_in_corpus_is_left_out_of_idf(tmp_path):
+    document = "Mamba beats the transformer. The transformer is older."
+    others = ["A transformer paper.", "Another transformer paper.", "A transformer."]
+    pattern = _write_corpus(tmp_path, [document, *others])
+    candidates = [
+        {"name": "mamba", "type": "algorithm"},
+        {"name": "transformer", "type": "algorithm"},
+    ]
+
+    ranked = rank_candidates(candidates, document, [], _tfidf_only(pattern))
+
+    # "transformer" occurs twice but in every other document; "mamba" only occurs in
+    # the document itself, so it is the more distinctive term.
+    assert ranked[0]["name"] == "mamba"
+    assert ranked[0]["score"] == 1.0
+
+
+def test_idf_matches_a_corpus_without_the_document(tmp_path):
+    document = "Mamba and transformer."
+    others = ["A transformer paper.", "Some mamba notes.", "Some data."]
+    (tmp_path / "with").mkdir()
+    (tmp_path / "without").mkdir()
+    with_doc = _write_corpus(tmp_path / "with", [document, *others])
+    without_doc = _write_corpus(tmp_path / "without", others)
+    for name in ("mamba", "transformer", "absent"):
+        occurs = name in document.lower()
+        left_out = tag_ranking._inverse_document_frequency(
+            name, load_background_corpus(with_doc), True, occurs
+        )
+        separate = tag_ranking._inverse_document_frequency(
+            name, load_background_corpus(without_doc), False, occurs
+        )
+        assert left_out == separate
+
+
+def test_doc_freq_memo_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(tag_ranking, "DOC_FREQ_CACHE_SIZE", 2)
+    pattern = _write_corpus(tmp_path, ["A transformer.", "A mamba."])
+    candidates = [{"name": f"tag{i}", "type": "task"} for i in range(5)]
+
+    rank_candidates(candidates, "Some text.", [], _tfidf_only(pattern))
+
+    assert len(load_background_corpus(pattern)["doc_freq"]._entries) == 2
+
+
+def test_tfidf_is_weighted_down_for_a_small_corpus(tmp_path):
+    document = "Mamba and transformer. The transformer again."
+    pattern = _write_corpus(tmp_path, [document])
+    candidates = [
+        {"name": "mamba", "type": "algorithm"},
+        {"name": "transformer", "type": "algorithm"},
+    ]
+    config = {
+        "background_corpus": pattern,
+        "weights": {"frequency": 1, "position": 0, "agreement": 0, "tfidf": 1},
+    }
+
+    # Without other documents the tf-idf feature carries no information.
+    ranked = rank_candidates(candidates, document, [], config)
+    frequency_only = rank_candidates(
+        candidates,
+        document,
+        [],
+        {**config, "weights": {**config["weights"], "tfidf": 0}},
+    )
+
+    assert ranked == frequency_only
@@ -0,0 +1,89 @@
+import json
+
+from tag_type_classifier import OTHER_TYPE, TagTypeClassifier, calibrate_threshold
+
+TAG_TYPES = [
+    {"name": "dataset", "description": "A dataset (e.g., mnist, imagenet, cifar-10)"},
+    {"name": "tool-or-framework", "description": "A library (e.g., pytorch, keras)"},
+]
+GAZETTEER = {"coco captions": "dataset", "scikit-learn": "tool-or-framework"}
+
+
+def _classifier(path=None):
+    return TagTypeClassifier(TAG_TYPES, GAZETTEER, {}, assignments_path=path)
+
+
+def test_known_names_are_scored_in_context():
+    classifier = _classifier()
+
+    tag_type, confidence = classifier.classify("mnist")
+    _, confidence_in_context = classifier.classify("mnist", "PERSON")
+
+    assert tag_type == "dataset"
+    assert 0.5 < confidence < 1.0
+    assert confidence_in_context != confidence
+
+
+def test_names_unlike_every_type_go_to_the_llm():
+    classifier = _classifier()
+
+    typed, uncertain = classifier.split([{"name": "Barack Obama", "type": "PERSON"}])
+
+    assert typed == []
+    assert uncertain == [{"name": "Barack Obama", "type": "PERSON"}]
+
+
+def test_other_is_learned_and_persisted(tmp_path):
+    path = str(tmp_path / "assignments.json")
+    classifier = _classifier(path)
+
+    classifier.learn(
+        [
+            {"name": "January 2024", "type": OTHER_TYPE},
+            {"name": "February 2024", "type": OTHER_TYPE},
+            {"name": "John Smith", "type": OTHER_TYPE},
+        ],
+        labels={
+            "January 2024": "DATE",
+            "February 2024": "DATE",
+            "John Smith": "PERSON",
+        },
+    )
+
+    with open(path, encoding="utf-8") as f:
+        assert {record["type"] for record in json.load(f)} == {OTHER_TYPE}
+    tag_type, confidence = _classifier(path).classify("March 2024", "DATE")
+    assert tag_type == OTHER_TYPE
+    assert confidence >= 0.6
+
+
+def test_spacy_label_does_not_outweigh_the_name():
+    classifier = _classifier()
+    names = ["google", "openai", "tensorflow", "microsoft", "nvidia", "numpy"]
+    classifier.learn(
+        [{"name": name, "type": "tool-or-framework"} for name in names],
+        labels={name: "ORG" for name in names},
+    )
+
+    _, uncertain = classifier.split(
+        [{"name": name, "type": "ORG"} for name in ("mit", "glue", "ucla")]
+    )
+
+    assert len(uncertain) == 3
+
+
+def test_calibrate_threshold_reports_held_out_precision():
+    examples = [
+        {"name": name, "type": "dataset"}
+        for name in ("imagenet-1k", "imagenet-21k", "cifar-100", "mnist-fashion")
+    ] + [
+        {"name": name, "type": "tool-or-framework"}
+        for name in ("pytorch-lightning", "keras-nlp", "scikit-image", "pytorch3d")
+    ]
+
+    report = calibrate_threshold(TAG_TYPES, examples, {}, folds=4)
+
+    assert report["examples"] == len(examples)
+    assert report["threshold"] is not None
+    assert report["precision"] >= 0.95
+    assert 0 < report["coverage"] <= 1
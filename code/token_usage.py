@@ -0,0 +1,129 @@
+"""
+Per-node token accounting for graph runs.
+
+`TokenUsageTracker` is a LangChain callback handler. Pass it in the run config
+(`graph.invoke(state, config={"callbacks": [tracker]})`) and it groups the provider's
+usage metadata by the LangGraph node that made each call. Input tokens are split into
+tokens served from the provider's prompt cache (`input_token_details.cache_read`) and
+uncached tokens. Calls answered by the local LLM response cache are counted separately
+and add no provider tokens.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from llm_cache import LOCAL_CACHE_HIT_KEY
+
+UNKNOWN_NODE = "unknown"
+
+
+def is_local_cache_hit(generation: Any) -> bool:
+    """Returns True if the generation was served by the local LLM response cache."""
+    return bool((generation.generation_info or {}).get(LOCAL_CACHE_HIT_KEY))
+
+
+def read_generation_usage(generation: Any) -> Optional[Dict[str, int]]:
+    """
+    Returns the provider-reported token counts of a chat generation, or None if absent.
+
+    The result has `input_tokens`, `cached_input_tokens`, `uncached_input_tokens` and
+    `output_tokens` keys.
+    """
+    usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+    if not usage_metadata:
+        return None
+    input_tokens = usage_metadata.get("input_tokens", 0)
+    details = usage_metadata.get("input_token_details") or {}
+    cached = details.get("cache_read", 0) or 0
+    return {
+        "input_tokens": input_tokens,
+        "cached_input_tokens": cached,
+        "uncached_input_tokens": input_tokens - cached,
+        "output_tokens": usage_metadata.get("output_tokens", 0),
+    }
+
+
+def _empty_usage() -> Dict[str, int]:
+    return {
+        "calls": 0,
+        "local_cache_hits": 0,
+        "input_tokens": 0,
+        "cached_input_tokens": 0,
+        "uncached_input_tokens": 0,
+        "output_tokens": 0,
+    }
+
+
+class TokenUsageTracker(BaseCallbackHandler):
+    """Collects input/output token counts per LangGraph node. Thread-safe."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._run_nodes: Dict[UUID, str] = {}
+        self._usage: Dict[str, Dict[str, int]] = defaultdict(_empty_usage)
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node", UNKNOWN_NODE)
+        with self._lock:
+            self._run_nodes[run_id] = node
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            node = self._run_nodes.pop(run_id, UNKNOWN_NODE)
+            usage = self._usage[node]
+            usage["calls"] += 1
+            for generations in response.generations:
+                for generation in generations:
+                    if is_local_cache_hit(generation):
+                        usage["local_cache_hits"] += 1
+                        continue
+                    generation_usage = read_generation_usage(generation)
+                    if generation_usage is None:
+                        continue
+                    for key, value in generation_usage.items():
+                        usage[key] += value
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._run_nodes.pop(run_id, None)
+
+    def usage_by_node(self) -> Dict[str, Dict[str, int]]:
+        """Returns token counts per node, plus a `total` entry."""
+        with self._lock:
+            usage = {node: dict(counts) for node, counts in self._usage.items()}
+        total = _empty_usage()
+        for counts in usage.values():
+            for key, value in counts.items():
+                total[key] += value
+        usage["total"] = total
+        return usage
+
+    def format_report(self) -> str:
+        """Returns a per-node table of cached vs. uncached input tokens."""
+        usage = self.usage_by_node()
+        header = f"{'node':<28}{'calls':>7}{'cached in':>12}{'uncached in':>13}{'output':>9}{'cached %':>10}"
+        lines = ["Token usage by node:", header]
+        for node, counts in sorted(usage.items(), key=lambda item: item[0] == "total"):
+            input_tokens = counts["input_tokens"]
+            cached_share = (
+                counts["cached_input_tokens"] / input_tokens if input_tokens else 0.0
+            )
+            lines.append(
+                f"{node:<28}{counts['calls']:>7}{counts['cached_input_tokens']:>12}"
+                f"{counts['uncached_input_tokens']:>13}{counts['output_tokens']:>9}"
+                f"{cached_share:>10.0%}"
+            )
+        return "\n".join(lines)
@@ -1,13 +1,59 @@
+import copy
+import hashlib
+import json
+import threading
 import yaml
 import os
+from typing import Any
 
 from paths import CONFIG_FILE_PATH, DATA_DIR, OUTPUTS_DIR
-from llm import get_llm
+
+_env_loaded = False
+
+# Parsed YAML files, keyed by absolute path, with the mtime and size they were read at.
+_config_cache = {}
+_config_cache_lock = threading.Lock()
 
 
 def load_config(config_path: str = CONFIG_FILE_PATH):
-    with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    """
+    Loads a YAML config file.
+
+    The file is parsed once per change (by mtime and size); every call returns a fresh
+    copy, so callers may modify the result.
+    """
+    path = os.path.abspath(config_path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _config_cache_lock:
+        cached = _config_cache.get(path)
+    if cached is None or cached[0] != version:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = (version, yaml.safe_load(f))
+        with _config_cache_lock:
+            _config_cache[path] = cached
+    return copy.deepcopy(cached[1])
+
+
+def config_hash(config: Any) -> str:
+    """Returns a stable hash of a (JSON-like) config, independent of key order."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_env() -> None:
+    """
+    Loads the `.env` file into the environment (API keys), once per process.
+
+    Called before the first LLM client or search client is created rather than at
+    import time.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
 
 
 def load_publication_example(example_number: int) -> str: